@@ -1,35 +1,107 @@
-from typing import List, Tuple, Optional
+import os
+from typing import Dict, List, Tuple, Optional
 from emblemmind_snapshot import TurnSnapshot
 from agent.action_generator import ActionGenerator, Action
 from agent.state_evaluator import StateEvaluator
-from agent.neural_network import NeuralNetworkInterface
+from agent.numpy_network import NumpyActionEvaluator
+from agent.inference_config import InferenceConfig
+from agent.top_k import stream_top_k
+from agent.action_pruning import ActionPruner
+from agent.simulation import simulate_action
 
 class ActionCoordinator:
-    """Coordinates action generation, evaluation, and neural network processing"""
-
-    def __init__(self, snapshot: TurnSnapshot):
+    """Coordinates action generation, evaluation, and neural network processing
+
+    Meant to be long-lived: the network (and its optimizer state) is built
+    and loaded once, and each new game state is handed over with update().
+    Inference uses the NumPy export of the model when one is available, so
+    torch is only imported once something needs the torch network
+    (training, saving, or a checkpoint without a NumPy export).
+    """
+
+    def __init__(self, snapshot: TurnSnapshot, model_path: Optional[str] = None, neural_network=None,
+                 inference_config: Optional[InferenceConfig] = None):
+        self.model_path = model_path
+        self.inference_config = inference_config
+        self._neural_network = neural_network
+        self.numpy_evaluator = None
+        self.action_pruner = ActionPruner()  # Counters span the whole run
+        self.prune_actions = True
+        if neural_network is None and model_path:
+            numpy_path = NumpyActionEvaluator.numpy_path(model_path)
+            # Only trust the export if it is at least as new as the checkpoint
+            if os.path.exists(numpy_path) and (not os.path.exists(model_path)
+                                               or os.path.getmtime(numpy_path) >= os.path.getmtime(model_path)):
+                self.load_numpy_weights(numpy_path)
+        self.update(snapshot)
+
+    @property
+    def neural_network(self):
+        """The torch NeuralNetworkInterface, built (and loaded from model_path) on first use"""
+        if self._neural_network is None:
+            from agent.neural_network import NeuralNetworkInterface
+            self._neural_network = NeuralNetworkInterface(self.inference_config)
+            if self.model_path and os.path.exists(self.model_path):
+                try:
+                    self._neural_network.load_model(self.model_path)
+                    print(f"[MODEL] Loaded {self.model_path}")
+                except Exception as e:
+                    print(f"[MODEL ERROR] Could not load {self.model_path}: {e}")
+        return self._neural_network
+
+    def load_numpy_weights(self, path: str) -> bool:
+        """Switch inference to a NumPy weights export (see agent/numpy_network.py)"""
+        try:
+            self.numpy_evaluator = NumpyActionEvaluator.load(path)
+        except Exception as e:
+            print(f"[MODEL ERROR] Could not load NumPy weights {path}: {e}")
+            return False
+        return True
+
+    def evaluate_actions(self, actions: List[Action], features: List[dict]) -> List[float]:
+        """Score actions, preferring the torch-free NumPy forward pass"""
+        if self.numpy_evaluator is not None:
+            return self.numpy_evaluator.evaluate_actions(actions, features)
+        return self.neural_network.evaluate_actions(actions, features)
+
+    def update(self, snapshot: TurnSnapshot):
+        """Point the coordinator at a new game state, keeping the trained network"""
         self.snapshot = snapshot
         self.action_generator = ActionGenerator(snapshot)
         self.state_evaluator = StateEvaluator(snapshot)
-        self.neural_network = NeuralNetworkInterface()
-
-    def get_best_actions(self, num_actions: int = 5) -> List[Action]:
-        """Get the best actions according to the neural network"""
-        # Generate all possible actions
-        actions = self.action_generator.generate_all_actions()
 
-        if not actions:
-            return []
-
-        # Evaluate each action
-        features = [self.state_evaluator.evaluate_action(action) for action in actions]
+    def get_best_actions(self, num_actions: int = 5, upper_bound=None) -> List[Action]:
+        """Get the best actions according to the neural network
 
-        # Get neural network scores
-        scores = self.neural_network.evaluate_actions(actions, features)
-
-        # Sort actions by score and return top N
-        sorted_actions = sorted(zip(actions, scores), key=lambda x: x[1], reverse=True)
-        return [action for action, _ in sorted_actions[:num_actions]]
+        Candidates are streamed from the generator and scored in batches
+        into a bounded heap, so only num_actions of them are kept. upper_bound
+        is an optional cheap optimistic score used to skip hopeless actions.
+        Dominated move/attack tiles are dropped before scoring (agent/action_pruning.py).
+        """
+        def score_batch(actions: List[Action]) -> List[float]:
+            features = [self.state_evaluator.evaluate_action(action) for action in actions]
+            return self.evaluate_actions(actions, features)
+
+        candidates = self.action_generator.iter_actions()
+        if self.prune_actions:
+            candidates = self.action_pruner.iter_pruned(self.snapshot, candidates,
+                                                        self.state_evaluator.tile_features,
+                                                        self.state_evaluator.distance_fields)
+        return stream_top_k(candidates, score_batch, num_actions, upper_bound=upper_bound)
+
+    def prune(self, actions: List[Action]) -> List[Action]:
+        """Drop dominated tiles from a candidate list for the current snapshot"""
+        if not self.prune_actions:
+            return actions
+        return self.action_pruner.prune(self.snapshot, actions, self.state_evaluator.tile_features,
+                                        self.state_evaluator.distance_fields)
+
+    def prune_with_fallbacks(self, actions: List[Action]) -> Tuple[List[Action], Dict[int, List[Action]]]:
+        """prune(), plus the dropped tiles each kept tile stands in for (see ActionPruner)"""
+        if not self.prune_actions:
+            return actions, {}
+        return self.action_pruner.prune_with_fallbacks(self.snapshot, actions, self.state_evaluator.tile_features,
+                                                       self.state_evaluator.distance_fields)
 
     def train_on_experience(self,
                           actions: List[Action],
@@ -46,6 +118,25 @@ class ActionCoordinator:
 
             loss = self.neural_network.train(batch_features, batch_outcomes)
             print(f"Training batch {i//batch_size + 1}, Loss: {loss:.4f}")
+        # The NumPy export no longer matches the trained weights
+        self.numpy_evaluator = None
+
+    def train_on_batch(self, features, outcomes, weights=None, batch_size: int = 32):
+        """Train on pre-computed feature rows (e.g. sampled from agent/replay_memory.py)
+
+        Returns the per-sample TD errors for updating replay priorities.
+        """
+        errors = []
+        for i in range(0, len(features), batch_size):
+            batch_weights = weights[i:i+batch_size] if weights is not None else None
+            loss, batch_errors = self.neural_network.train(
+                features[i:i+batch_size], outcomes[i:i+batch_size],
+                weights=batch_weights, return_errors=True
+            )
+            errors.extend(batch_errors)
+            print(f"Training batch {i//batch_size + 1}, Loss: {loss:.4f}")
+        self.numpy_evaluator = None
+        return errors
 
     def save_model(self, path: str):
         """Save the neural network model"""
@@ -54,6 +145,7 @@ class ActionCoordinator:
     def load_model(self, path: str):
         """Load a neural network model"""
         self.neural_network.load_model(path)
+        self.numpy_evaluator = None
 
     def get_action_features(self, action: Action) -> dict:
         """Get the feature vector for a specific action"""
@@ -64,72 +156,5 @@ class ActionCoordinator:
         return self.state_evaluator.evaluate_state()
 
     def simulate_action(self, snapshot: TurnSnapshot, action: Action) -> Tuple[TurnSnapshot, float]:
-        """
-        Simulate the outcome of an action and return the new state and reward.
-        Handles 'move' and 'attack' actions differently:
-        - 'move': moves the unit to the target position.
-        - 'attack': does not move the unit, but simulates an attack on the target unit if in range.
-        """
-        import copy
-        new_snapshot = copy.deepcopy(snapshot)
-        reward = -1  # Default action cost
-
-        if action.action_type == 'move':
-            # Move the unit to the target position
-            for unit in new_snapshot.units:
-                if unit.id == action.unit.id:
-                    unit.position = action.target_position
-                    unit.turn_status = 0x42  # Mark as acted
-                    break
-            terrain = new_snapshot.map.get_terrain_at(action.target_position[0], action.target_position[1])
-            if terrain in ['F', '^']:
-                reward += 10
-            elif terrain == '#':
-                reward -= 10
-
-        elif action.action_type == 'attack' and action.target_unit is not None:
-            # Find the acting unit and the target enemy in the new snapshot
-            acting_unit = None
-            target_enemy = None
-            for unit in new_snapshot.units:
-                if unit.id == action.unit.id:
-                    acting_unit = unit
-                    break
-            for enemy in new_snapshot.enemies:
-                if enemy.id == action.target_unit.id:
-                    target_enemy = enemy
-                    break
-            if acting_unit is not None and target_enemy is not None:
-                # Check if the enemy is in range for the selected weapon
-                from utils.fe_data_mappings import ITEM_ATTACK_RANGES
-                item_id = action.item_id
-                if item_id in ITEM_ATTACK_RANGES:
-                    min_range, max_range = ITEM_ATTACK_RANGES[item_id]
-                    dist = abs(target_enemy.position[0] - acting_unit.position[0]) + abs(target_enemy.position[1] - acting_unit.position[1])
-                    if min_range <= dist <= max_range:
-                        # Simulate damage (simple: strength - defense)
-                        attacker_str = acting_unit.stats[0] if len(acting_unit.stats) > 0 else 0
-                        defender_def = target_enemy.stats[4] if len(target_enemy.stats) > 4 else 0
-                        damage = max(0, attacker_str - defender_def)
-                        target_enemy.hp = (max(0, target_enemy.hp[0] - damage), target_enemy.hp[1])
-                        acting_unit.turn_status = 0x42  # Mark as acted
-                        # Reward for defeating an enemy
-                        if target_enemy.hp[0] == 0:
-                            reward += 50  # Defeating an enemy is highly rewarded
-                        else:
-                            reward += damage  # Reward for damage dealt
-                        # TODO: Add more realistic combat (weapon triangle, crit, counterattack, etc.)
-        else:
-            # For other action types, fallback to old logic (move to target position)
-            for unit in new_snapshot.units:
-                if unit.id == action.unit.id:
-                    unit.position = action.target_position
-                    unit.turn_status = 0x42  # Mark as acted
-                    break
-            terrain = new_snapshot.map.get_terrain_at(action.target_position[0], action.target_position[1])
-            if terrain in ['F', '^']:
-                reward += 10
-            elif terrain == '#':
-                reward -= 10
-
-        return new_snapshot, reward
\ No newline at end of file
+        """Simulate the outcome of an action and return the new state and reward (see agent/simulation.py)"""
+        return simulate_action(snapshot, action)
@@ -1,7 +1,8 @@
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
 from dataclasses import dataclass
 from emblemmind_snapshot import TurnSnapshot, Unit
 from utils.fe_data_mappings import ITEM_ATTACK_RANGES, get_weapon_type, get_item_name
+from agent.bitboard import snapshot_boards
 
 @dataclass
 class Action:
@@ -30,6 +31,22 @@ class ActionGenerator:
                 actions.extend(self._generate_unit_actions(unit))
         return actions
 
+    def iter_actions(self) -> Iterator[Action]:
+        """Stream candidates unit by unit instead of materializing the whole action space
+
+        Within a unit the cheap, usually decisive categories come first
+        (items, rescues, attacks) and the large movement fan-out last.
+        """
+        for unit in self.units:
+            if unit.can_act:
+                yield from self._iter_unit_actions(unit)
+
+    def _iter_unit_actions(self, unit: Unit, movement_map=None, range_map=None) -> Iterator[Action]:
+        yield from self._generate_item_actions(unit)
+        yield from self._generate_rescue_actions(unit)
+        yield from self._generate_attack_actions(unit, movement_map, range_map)
+        yield from self._iter_movement_actions(unit)
+
     def _generate_unit_actions(self, unit: Unit, movement_map=None, range_map=None) -> List[Action]:
         """Generate all possible actions for a single unit, optionally using movement and range maps for attack actions"""
         actions = []
@@ -50,7 +67,10 @@ class ActionGenerator:
 
     def _generate_movement_actions(self, unit: Unit) -> List[Action]:
         """Generate all possible movement actions for a unit"""
-        actions = []
+        return list(self._iter_movement_actions(unit))
+
+    def _iter_movement_actions(self, unit: Unit) -> Iterator[Action]:
+        boards = snapshot_boards(self.snapshot)
         movement_range = unit.movement_range
 
         # Get all reachable positions within movement range
@@ -62,13 +82,12 @@ class ActionGenerator:
                 distance = abs(x - unit.position[0]) + abs(y - unit.position[1])
                 if distance <= movement_range:
                     # Check if position is unoccupied
-                    if not self.snapshot.get_unit_at(x, y):
-                        actions.append(Action(
+                    if not boards.layout.test(boards.occupied, (x, y)):
+                        yield Action(
                             unit=unit,
                             action_type='move',
                             target_position=(x, y)
-                        ))
-        return actions
+                        )
 
     def _generate_attack_actions(self, unit: Unit, movement_map=None, range_map=None) -> List[Action]:
         """Generate all possible attack actions for a unit, considering movement and range maps"""
@@ -0,0 +1,142 @@
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from emblemmind_snapshot import TurnSnapshot
+from agent.action_generator import Action
+from agent.tile_features import TileFeatures
+from agent.distance_fields import DistanceFields
+
+class ActionPruner:
+    """Drops dominated move/attack tiles before scoring.
+
+    Each candidate tile gets a small vector, oriented so that larger is
+    better: terrain def/avoid/res, minus the number of enemies that can
+    reach it, minus the damage they could deal, and for moves minus the
+    terrain distance to the nearest visible enemy. Moves are compared
+    among the unit's moves. Attacks are compared only with attacks from
+    the same unit, on the same target, with the same weapon, at the same
+    range (so counterattack exposure is unchanged).
+
+    A tile is removed when another tile in its group is at least as good
+    everywhere and strictly better somewhere. Tiles with identical vectors
+    collapse to the first one generated. Other action types pass through.
+    prune_with_fallbacks() also returns the dropped tiles under the kept
+    tile that stands in for them, so a caller can fall back to them if
+    the kept tile is later occupied. Counters accumulate across snapshots;
+    see stats().
+    """
+
+    def __init__(self):
+        self.seen: Dict[str, int] = {}
+        self.kept: Dict[str, int] = {}
+
+    def prune(self, snapshot: TurnSnapshot, actions: List[Action],
+              tile_features: Optional[TileFeatures] = None,
+              distance_fields: Optional[DistanceFields] = None) -> List[Action]:
+        """Pareto-prune one list of candidates (any mix of units), keeping generation order"""
+        return self.prune_with_fallbacks(snapshot, actions, tile_features, distance_fields)[0]
+
+    def prune_with_fallbacks(self, snapshot: TurnSnapshot, actions: List[Action],
+                             tile_features: Optional[TileFeatures] = None,
+                             distance_fields: Optional[DistanceFields] = None
+                             ) -> Tuple[List[Action], Dict[int, List[Action]]]:
+        """(kept actions, fallbacks), where fallbacks maps an index into the kept list
+        to the dropped actions it stands in for, best first (fewest dominating tiles)"""
+        if not actions:
+            return actions, {}
+        tile_features = tile_features or TileFeatures(snapshot)
+        distance_fields = distance_fields or DistanceFields(snapshot)
+        groups: Dict[tuple, List[int]] = {}
+        for i, action in enumerate(actions):
+            if action.action_type == 'move':
+                key = (action.unit.id, 'move')
+            elif action.action_type == 'attack' and action.target_unit is not None:
+                tx, ty = action.target_unit.position
+                x, y = action.target_position
+                key = (action.unit.id, 'attack', action.target_unit.id, action.target_unit.position,
+                       action.item_id, abs(tx - x) + abs(ty - y))
+            else:
+                continue
+            groups.setdefault(key, []).append(i)
+
+        keep = np.ones(len(actions), dtype=bool)
+        stand_ins: Dict[int, List[Tuple[int, int]]] = {}  # kept index -> [(dominator count, dropped index)]
+        damage_planes = {}
+        for key, indices in groups.items():
+            if len(indices) < 2:
+                continue
+            unit = actions[indices[0]].unit
+            if unit.id not in damage_planes:
+                damage_planes[unit.id] = tile_features.expected_damage(unit)
+            vectors = self._vectors([actions[i] for i in indices], key[1] == 'move',
+                                    tile_features, damage_planes[unit.id], distance_fields)
+            front = pareto_front(vectors)
+            keep[np.asarray(indices)] = front
+            representative, dominators = pareto_representatives(vectors)
+            for row in np.flatnonzero(~front):
+                stand_ins.setdefault(indices[representative[row]], []).append((int(dominators[row]), indices[row]))
+
+        for action, kept in zip(actions, keep):
+            self.seen[action.action_type] = self.seen.get(action.action_type, 0) + 1
+            if kept:
+                self.kept[action.action_type] = self.kept.get(action.action_type, 0) + 1
+        kept_positions = np.cumsum(keep) - 1  # Index of each kept action in the returned list
+        fallbacks = {int(kept_positions[i]): [actions[j] for _, j in sorted(dropped)]
+                     for i, dropped in stand_ins.items()}
+        return [action for action, kept in zip(actions, keep) if kept], fallbacks
+
+    def _vectors(self, actions: List[Action], is_move: bool, tile_features: TileFeatures,
+                 damage: np.ndarray, distance_fields: DistanceFields) -> np.ndarray:
+        terrain = tile_features.terrain
+        columns = [
+            [tile_features.at(terrain.terrain_def, a.target_position, 0) for a in actions],
+            [tile_features.at(terrain.terrain_avoid, a.target_position, 0) for a in actions],
+            [tile_features.at(terrain.terrain_res, a.target_position, 0) for a in actions],
+            [-tile_features.at(tile_features.enemy_threat_count, a.target_position, 0) for a in actions],
+            [-tile_features.at(damage, a.target_position, 0) for a in actions]
+        ]
+        if is_move:
+            columns.append([-distance_fields.min_enemy_distance(a.unit, a.target_position) for a in actions])
+        return np.array(columns, dtype=np.float64).T
+
+    def iter_pruned(self, snapshot: TurnSnapshot, actions: Iterable[Action],
+                    tile_features: Optional[TileFeatures] = None,
+                    distance_fields: Optional[DistanceFields] = None) -> Iterator[Action]:
+        """Prune a stream grouped by unit (as ActionGenerator.iter_actions yields), one unit at a time"""
+        tile_features = tile_features or TileFeatures(snapshot)
+        distance_fields = distance_fields or DistanceFields(snapshot)
+        buffer: List[Action] = []
+        for action in actions:
+            if buffer and action.unit is not buffer[0].unit:
+                yield from self.prune(snapshot, buffer, tile_features, distance_fields)
+                buffer = []
+            buffer.append(action)
+        if buffer:
+            yield from self.prune(snapshot, buffer, tile_features, distance_fields)
+
+    def stats(self) -> Dict[str, float]:
+        """Candidates seen/kept per action type and the overall reduction factor"""
+        seen, kept = sum(self.seen.values()), sum(self.kept.values())
+        stats = {f"{action_type}_seen": count for action_type, count in self.seen.items()}
+        stats.update({f"{action_type}_kept": count for action_type, count in self.kept.items()})
+        stats['reduction'] = round(seen / kept, 2) if kept else 1.0
+        return stats
+
+def pareto_front(vectors: np.ndarray) -> np.ndarray:
+    """Mask of rows not dominated by another row (larger is better); exact duplicates keep the first"""
+    n = len(vectors)
+    geq = (vectors[:, None, :] >= vectors[None, :, :]).all(axis=2)  # geq[j, i]: row j >= row i everywhere
+    gt = (vectors[:, None, :] > vectors[None, :, :]).any(axis=2)
+    dominated = (geq & gt).any(axis=0)
+    equal = geq & geq.T
+    earlier_duplicate = np.tril(equal, k=-1).any(axis=1)  # Row i equals some row j < i
+    return ~(dominated | earlier_duplicate) if n else np.zeros(0, dtype=bool)
+
+def pareto_representatives(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """For each row, the first front row at least as good everywhere (itself when on the front),
+    and how many rows strictly dominate it"""
+    if not len(vectors):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    geq = (vectors[:, None, :] >= vectors[None, :, :]).all(axis=2)
+    gt = (vectors[:, None, :] > vectors[None, :, :]).any(axis=2)
+    covers = geq & pareto_front(vectors)[:, None]  # covers[j, i]: front row j >= row i everywhere
+    return covers.argmax(axis=0), (geq & gt).sum(axis=0)
@@ -0,0 +1,512 @@
+import time
+from collections import Counter
+import numpy as np
+from functools import lru_cache
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+from agent.action_generator import Action
+from agent.rng import Combatant, strike_order
+
+Distribution = List[Tuple[int, float]]  # (damage dealt, probability)
+MAX_SUBSETS = 32768  # Targets with more attack subsets than this get a plain kill-value bound
+
+@lru_cache(maxsize=None)  # Hit rates are small integers; each is enumerated once
+def two_rn_hit_probability(hit: int) -> float:
+    """Chance that FE7's averaged two-RN roll lands against a displayed hit rate"""
+    hit = max(0, min(100, hit))
+    return sum(1 for a in range(100) for b in range(100) if (a + b) // 2 < hit) / 10000
+
+@dataclass(eq=False)
+class AttackOption:
+    """One way an attacker can fight one enemy: from a tile, with a weapon.
+
+    damage is the distribution of total damage dealt to the enemy over the
+    battle, risk the expected cost to the attacker (e.g. death chance times
+    a weight). target is any hashable enemy key, usually its slot.
+    """
+    attacker: int
+    target: Hashable
+    tile: Tuple[int, int]
+    item_id: Optional[int]
+    damage: Distribution
+    risk: float = 0.0
+    action: Optional[Action] = None
+
+    @property
+    def land_probability(self) -> float:
+        return sum(p for d, p in self.damage if d > 0)
+
+    def kill_probability(self, hp: int) -> float:
+        return sum(p for d, p in self.damage if d >= hp)
+
+    @classmethod
+    def from_forecast(cls, action: Action, target: Hashable, battle_struct: Dict, death_weight: float = 1.0) -> 'AttackOption':
+        """Single-strike option from a probed attacker battle struct, read the way trial_run scores attacks"""
+        p = two_rn_hit_probability(battle_struct.get('battle_hit', battle_struct.get('hit', 100)))
+        will_die = battle_struct['cur_hp'] <= 0 or battle_struct['attack'] >= action.unit.hp[0]
+        return cls(action.unit.id, target, tuple(action.target_position), action.item_id,
+                   [(battle_struct['attack'], p), (0, 1 - p)], death_weight if will_die else 0.0, action)
+
+    @classmethod
+    def from_combatants(cls, attacker_id: int, target: Hashable, tile: Tuple[int, int], item_id: Optional[int],
+                        attacker: Combatant, defender: Combatant, death_weight: float = 1.0,
+                        action: Optional[Action] = None) -> 'AttackOption':
+        """Exact damage distribution and death risk by enumerating every hit/crit branch of the battle"""
+        strikes = []
+        for side in strike_order(attacker, defender):
+            unit = attacker if side == 'attacker' else defender
+            strikes.extend([side] * (2 if unit.brave else 1))
+        damage: Dict[int, float] = {}
+        death = 0.0
+        stack = [(0, attacker.hp, defender.hp, 1.0)]
+        while stack:
+            i, attacker_hp, defender_hp, p = stack.pop()
+            if i == len(strikes) or attacker_hp <= 0 or defender_hp <= 0:
+                dealt = defender.hp - defender_hp
+                damage[dealt] = damage.get(dealt, 0.0) + p
+                death += p if attacker_hp <= 0 else 0.0
+                continue
+            unit, other = (attacker, defender) if strikes[i] == 'attacker' else (defender, attacker)
+            hit, crit = two_rn_hit_probability(unit.hit), unit.crit / 100
+            base = max(0, unit.attack - other.defense)
+            for multiplier, q in ((0, 1 - hit), (1, hit * (1 - crit)), (3, hit * crit)):
+                if q <= 0:
+                    continue
+                if strikes[i] == 'attacker':
+                    stack.append((i + 1, attacker_hp, max(0, defender_hp - base * multiplier), p * q))
+                else:
+                    stack.append((i + 1, max(0, attacker_hp - base * multiplier), defender_hp, p * q))
+        return cls(attacker_id, target, tile, item_id, sorted(damage.items()), death * death_weight, action)
+
+@dataclass
+class AssignmentPlan:
+    """Conflict-free attacks in execution order (per target: chip damage first, finisher last)"""
+    steps: List[AttackOption] = field(default_factory=list)
+    value: float = 0.0
+    expected_kills: float = 0.0
+    risk: float = 0.0
+    nodes: int = 0
+    optimal: bool = True
+
+def _finishing_order(options: List[AttackOption], hp: int) -> List[AttackOption]:
+    """Weakest standalone attack first, so the likeliest killer strikes last"""
+    return sorted(options, key=lambda o: (o.kill_probability(hp), o.land_probability, -o.risk))
+
+def _strike(remaining: Dict[int, float], damage: Distribution) -> Dict[int, float]:
+    """Distribution of the target's HP after one more battle"""
+    nxt: Dict[int, float] = {}
+    for left, p in remaining.items():
+        if left <= 0:
+            nxt[0] = nxt.get(0, 0.0) + p
+            continue
+        for dealt, q in damage:
+            after = max(0, left - dealt)
+            nxt[after] = nxt.get(after, 0.0) + p * q
+    return nxt
+
+def _resolve_target(options: List[AttackOption], hp: int) -> Tuple[Dict[int, float], float]:
+    """(HP distribution afterwards, risk) of attackers striking in the given order.
+
+    An attacker only fights (and only takes its risk) if the target is
+    still alive when its turn comes.
+    """
+    remaining = {hp: 1.0}
+    risk = 0.0
+    for option in options:
+        risk += option.risk * (1.0 - remaining.get(0, 0.0))
+        remaining = _strike(remaining, option.damage)
+    return remaining, risk
+
+def _target_value(options: List[AttackOption], hp: int, kill_value: float) -> Tuple[float, float, float]:
+    """(value, kill probability, risk) of one target's attackers striking in finishing order"""
+    remaining, risk = _resolve_target(_finishing_order(options, hp), hp)
+    kill = remaining.get(0, 0.0)
+    return kill * kill_value - risk, kill, risk
+
+TileOptions = Dict[int, Dict[Tuple[int, int], AttackOption]]  # id(attack) -> {tile: option}
+
+class _SubsetTable:
+    """Outcome of every subset of the attacks on one target that uses each attacker at most once.
+
+    attacks come in finishing order. Subsets are numbered in mixed radix: an
+    attacker's digit is 0 when it sits out, else 1 + the position of its
+    attack among its own attacks here, so a subset's index is the sum of its
+    attacks' codes. kills and risks match _resolve_target; seated says
+    whether the attacks can stand on distinct tiles of their own.
+    """
+
+    def __init__(self, attacks: List[AttackOption], hp: int, tiles: TileOptions):
+        self.attackers = list(dict.fromkeys(o.attacker for o in attacks))
+        counts = {a: sum(o.attacker == a for o in attacks) for a in self.attackers}
+        shape = tuple(counts[a] + 1 for a in reversed(self.attackers))  # The first attacker's digit varies fastest
+        size = int(np.prod(shape))
+        self.uses = np.indices(shape).reshape(len(shape), size).T[:, ::-1] > 0
+        self.code: Dict[int, int] = {}
+        stride = 1
+        for attacker in self.attackers:
+            for digit, o in enumerate((o for o in attacks if o.attacker == attacker), 1):
+                self.code[id(o)] = digit * stride
+            stride *= counts[attacker] + 1
+
+        left = np.zeros((size, hp + 1))  # Distribution of HP left
+        left[0, hp] = 1.0
+        self.risks = np.zeros(size)
+        tile_index = {tile: i for i, tile in enumerate({tile for o in attacks for tile in tiles[id(o)]})}
+        union = np.zeros((size, len(tile_index)), dtype=bool)
+        filled = np.zeros(1, dtype=int)
+        hps = np.arange(hp + 1)
+        for o in attacks:
+            # o strikes after every attack already in these subsets, so it fights only if they left the target alive
+            source = filled[~self.uses[filled, self.attackers.index(o.attacker)]]
+            target = source + self.code[id(o)]
+            before = left[source]
+            self.risks[target] = self.risks[source] + o.risk * (1.0 - before[:, 0])
+            strike = np.zeros((hp + 1, hp + 1))  # HP before -> HP after
+            for dealt, p in o.damage:
+                strike[hps, np.maximum(0, hps - dealt)] += p
+            left[target] = before @ strike
+            union[target] = union[source]
+            union[np.ix_(target, [tile_index[tile] for tile in tiles[id(o)]])] = True
+            filled = np.concatenate([filled, target])
+        self.kills = left[:, 0]
+
+        # Hall's condition: enough tiles between them for the subset and for every smaller subset
+        self.seated = union.sum(axis=1) >= self.uses.sum(axis=1)
+        grid = self.seated.reshape(shape)
+        for axis in range(len(shape)):
+            grid &= grid[(slice(None),) * axis + (slice(0, 1),)]  # Sitting that attacker out
+
+def _attacker_prices(rewards: Dict[Hashable, np.ndarray], uses: Dict[Hashable, np.ndarray],
+                     columns: Dict[Hashable, List[int]], attackers: int, floor: float, rounds: int = 40,
+                     deadline: Optional[float] = None) -> np.ndarray:
+    """Per-attacker prices from subgradient steps on the Lagrangian dual of 'each attacker fights once'.
+
+    The dual value for prices p is sum(p) plus, per target, the best subset
+    reward less its attackers' prices (uses[t][s] marks the attackers, by
+    position in columns[t], of subset s); every p >= 0 bounds the plan
+    value. floor is a known plan value (Polyak step target); stops early at
+    deadline.
+    """
+    prices, best, best_prices, scale = np.zeros(attackers), float('inf'), np.zeros(attackers), 1.0
+    for _ in range(rounds):
+        dual, used = float(prices.sum()), np.zeros(attackers)
+        for t, reward in rewards.items():
+            reduced = reward - uses[t] @ prices[columns[t]]
+            s = int(reduced.argmax())
+            if reduced[s] > 0:
+                dual += float(reduced[s])
+                used[columns[t]] += uses[t][s]
+        if dual < best - 1e-9:
+            best, best_prices = dual, prices
+        else:
+            scale /= 2
+        slack = 1.0 - used
+        norm = float(slack @ slack)
+        if norm == 0 or best - floor < 1e-9 or (deadline is not None and time.perf_counter() > deadline):
+            break
+        prices = np.maximum(0.0, prices - scale * (dual - floor) / norm * slack)
+    return best_prices
+
+def _group_tiles(options: List[AttackOption]) -> Tuple[List[AttackOption], TileOptions]:
+    """One attack per set of options that differ only by tile, and each attack's options by tile"""
+    groups: Dict[tuple, AttackOption] = {}
+    tiles: TileOptions = {}
+    for option in options:
+        key = (option.attacker, option.target, option.item_id, tuple(sorted(option.damage)), option.risk)
+        attack = groups.setdefault(key, option)
+        tiles.setdefault(id(attack), {}).setdefault(option.tile, option)
+    return list(groups.values()), tiles
+
+class _PlanState:
+    """Attacks chosen so far, per target, with cached per-target terms and a tile for each.
+
+    An attack stands for every option that differs from it only by tile
+    (tiles maps id(attack) to {tile: option}); add() seats it on one of
+    them, moving already seated attacks to their other tiles if needed.
+    Targets with a _SubsetTable read their terms from it, at the sum of
+    their assigned attacks' codes.
+    """
+
+    def __init__(self, enemy_hp: Dict[int, int], values: Dict[int, float], order_key,
+                 tiles: TileOptions, tables: Dict[int, _SubsetTable]):
+        self.enemy_hp = enemy_hp
+        self.values = values
+        self.order_key = order_key  # Cached _finishing_order key
+        self.tiles = tiles
+        self.tables = tables
+        self.assigned: Dict[int, List[AttackOption]] = {t: [] for t in enemy_hp}
+        self.have: Dict[int, int] = {t: 0 for t in enemy_hp}  # Table index of the assigned attacks
+        self.terms: Dict[int, Tuple[float, float, float]] = {t: (0.0, 0.0, 0.0) for t in enemy_hp}
+        self.by_attacker: Dict[int, AttackOption] = {}
+        self.seated: Dict[Tuple[int, int], AttackOption] = {}  # tile -> attack standing on it
+        self.seat: Dict[int, Tuple[int, int]] = {}  # id(attack) -> its tile
+        self.value = 0.0
+
+    def _retarget(self, target: int):
+        previous = self.terms[target][0]
+        if target in self.tables:
+            table = self.tables[target]
+            kill, risk = float(table.kills[self.have[target]]), float(table.risks[self.have[target]])
+        else:
+            order = sorted(self.assigned[target], key=self.order_key)
+            remaining, risk = _resolve_target(order, self.enemy_hp[target])
+            kill = remaining.get(0, 0.0)
+        self.terms[target] = (kill * self.values[target] - risk, kill, risk)
+        self.value += self.terms[target][0] - previous
+
+    def _take_seat(self, attack: AttackOption, visited: set) -> bool:
+        """Augmenting path: a free tile of attack's, or one whose occupant can move elsewhere"""
+        for tile in self.tiles[id(attack)]:
+            if tile in visited:
+                continue
+            visited.add(tile)
+            occupant = self.seated.get(tile)
+            if occupant is None or self._take_seat(occupant, visited):
+                self.seated[tile] = attack
+                self.seat[id(attack)] = tile
+                return True
+        return False
+
+    def add(self, attack: AttackOption) -> bool:
+        """Add attack if a tile can be found for it; False (and no change) otherwise"""
+        if not self._take_seat(attack, set()):
+            return False
+        self.assigned[attack.target].append(attack)
+        if attack.target in self.tables:
+            self.have[attack.target] += self.tables[attack.target].code[id(attack)]
+        self.by_attacker[attack.attacker] = attack
+        self._retarget(attack.target)
+        return True
+
+    def remove(self, attack: AttackOption):
+        self.assigned[attack.target].remove(attack)
+        if attack.target in self.tables:
+            self.have[attack.target] -= self.tables[attack.target].code[id(attack)]
+        del self.by_attacker[attack.attacker]
+        del self.seated[self.seat.pop(id(attack))]
+        self._retarget(attack.target)
+
+    def plan(self) -> AssignmentPlan:
+        steps = []
+        for target in sorted(self.assigned, key=lambda t: -self.terms[t][1]):
+            steps.extend(self.tiles[id(attack)][self.seat[id(attack)]]
+                         for attack in sorted(self.assigned[target], key=self.order_key))
+        return AssignmentPlan(steps, self.value, sum(k for _, k, _ in self.terms.values()),
+                              sum(r for _, _, r in self.terms.values()))
+
+def hungarian(weights: List[List[float]]) -> List[int]:
+    """Max-weight assignment of each row to a distinct column (needs rows <= columns); column per row"""
+    n, m = len(weights), len(weights[0]) if weights else 0
+    u, v, match, way = [0.0] * (n + 1), [0.0] * (m + 1), [0] * (m + 1), [0] * (m + 1)
+    for i in range(1, n + 1):
+        match[0], j0 = i, 0
+        minv, used = [float('inf')] * (m + 1), [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = match[j0], float('inf'), 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = -weights[i0 - 1][j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j], way[j] = cur, j0
+                    if minv[j] < delta:
+                        delta, j1 = minv[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    columns = [-1] * n
+    for j in range(1, m + 1):
+        if match[j]:
+            columns[match[j] - 1] = j - 1
+    return columns
+
+def solve_assignment(options: Sequence[AttackOption], enemy_hp: Dict[Hashable, int],
+                     kill_value: Optional[Dict[Hashable, float]] = None,
+                     max_nodes: int = 100000, time_limit: Optional[float] = 0.02) -> AssignmentPlan:
+    """Pick at most one option per attacker, no two on the same tile, maximizing expected kills minus risk.
+
+    Options that differ only by tile are searched as one attack; tiles are
+    assigned by bipartite matching as attacks are added.
+
+    1. Hungarian assignment of attackers to distinct targets on standalone
+       value (kill chance times kill value minus risk).
+    2. Local search: re-choose one attacker's attack (or have it sit out),
+       or send two attackers at the same target together, while that
+       improves the plan; the pair moves find chip-and-finish kills.
+    3. Depth-first branch and bound over attackers from that incumbent,
+       bounded by a Lagrangian relaxation: each attacker gets a price
+       (subgradient steps at the root), and each target may take any
+       seatable subset of the remaining attacks on it, worth its exact
+       value (tabulated up front, up to MAX_SUBSETS subsets per target)
+       less their prices. Only tiles shared between targets are relaxed.
+
+    Stops at max_nodes or time_limit seconds with the best plan so far
+    (optimal=False); plan.nodes counts search nodes.
+    """
+    deadline = time.perf_counter() + time_limit if time_limit else None
+
+    def expired() -> bool:
+        return deadline is not None and time.perf_counter() > deadline
+
+    values = {t: (kill_value or {}).get(t, 1.0) for t in enemy_hp}
+    options = [o for o in options if o.target in enemy_hp and enemy_hp[o.target] > 0]
+    attacks, tiles = _group_tiles(options)
+    by_attacker: Dict[int, List[AttackOption]] = {}
+    for attack in attacks:
+        by_attacker.setdefault(attack.attacker, []).append(attack)
+
+    kill = {id(o): o.kill_probability(enemy_hp[o.target]) for o in attacks}
+    land = {id(o): o.land_probability for o in attacks}
+    rank = {id(o): i for i, o in enumerate(attacks)}
+
+    def standalone(option: AttackOption) -> float:
+        return kill[id(option)] * values[option.target] - option.risk
+
+    def optimistic(option: AttackOption) -> float:
+        return land[id(option)] * values[option.target]
+
+    def order_key(option: AttackOption) -> tuple:
+        return kill[id(option)], land[id(option)], -option.risk, rank[id(option)]  # Total, so subsets agree
+
+    for group in by_attacker.values():
+        group.sort(key=standalone, reverse=True)
+    attackers = sorted(by_attacker, key=lambda a: max(optimistic(o) for o in by_attacker[a]), reverse=True)
+    targets = list(enemy_hp)
+    if not attackers:
+        return AssignmentPlan(nodes=0)
+
+    # 1. One attacker per target; extra columns let an attacker sit out
+    weights = [[max((standalone(o) for o in by_attacker[a] if o.target == t), default=-1e9) for t in targets]
+               + [0.0] * len(attackers) for a in attackers]
+    state = _PlanState(enemy_hp, values, order_key, tiles, {})
+    for row, column in sorted(enumerate(hungarian(weights)), key=lambda rc: -weights[rc[0]][rc[1]]):
+        if column < len(targets) and weights[row][column] > 0:
+            for option in by_attacker[attackers[row]]:
+                if option.target == targets[column] and state.add(option):
+                    break
+
+    # 2. Re-choose one attacker, or send two attackers at one target, while that helps
+    def gain(changes: List[Tuple[int, Optional[AttackOption]]]) -> float:
+        base = state.value
+        old = [state.by_attacker[a] for a, _ in changes if a in state.by_attacker]
+        for option in old:
+            state.remove(option)
+        added = [option for _, option in changes if option is not None and state.add(option)]
+        result = state.value - base if len(added) == sum(o is not None for _, o in changes) else float('-inf')
+        for option in added:
+            state.remove(option)
+        for option in old:
+            state.add(option)
+        return result
+
+    moves: List[List[Tuple[int, Optional[AttackOption]]]] = []
+    for attacker in attackers:
+        moves.append([(attacker, None)])
+        moves.extend([(attacker, option)] for option in by_attacker[attacker])
+    for target in targets:
+        leads = [next((o for o in by_attacker[a] if o.target == target), None) for a in attackers]
+        leads = [o for o in leads if o is not None]
+        moves.extend([(a.attacker, a), (b.attacker, b)] for i, a in enumerate(leads) for b in leads[i + 1:])
+    while not expired():
+        best_gain, best_move = 1e-9, None
+        for move in moves:
+            if expired():
+                break
+            if all(state.by_attacker.get(a) is o for a, o in move):
+                continue
+            move_gain = gain(move)
+            if move_gain > best_gain:
+                best_gain, best_move = move_gain, move
+        if best_move is None:
+            break
+        for attacker, _ in best_move:
+            if attacker in state.by_attacker:
+                state.remove(state.by_attacker[attacker])
+        for _, option in best_move:
+            if option is not None:
+                state.add(option)
+    best = state.plan()
+
+    # 3. Branch and bound; every subset of the attacks on a target, in finishing order, tabulated once
+    reach = {t: sorted((o for a in attackers for o in by_attacker[a] if o.target == t), key=order_key)
+             for t in targets}
+    tables: Dict[int, _SubsetTable] = {}
+    for t in targets:
+        if expired():
+            break
+        if np.prod([n + 1 for n in Counter(o.attacker for o in reach[t]).values()]) <= MAX_SUBSETS:
+            tables[t] = _SubsetTable(reach[t], enemy_hp[t], tiles)
+    search_state = _PlanState(enemy_hp, values, order_key, tiles, tables)
+    nodes = 0
+    stopped = False
+
+    index = {a: i for i, a in enumerate(attackers)}
+    columns = {t: [index[a] for a in table.attackers] for t, table in tables.items()}
+    uses = {t: table.uses.astype(float) for t, table in tables.items()}
+    rewards = {t: np.where(table.seated, table.kills * values[t] - table.risks, -np.inf)
+               for t, table in tables.items()}
+    if expired():
+        best.nodes, best.optimal = 0, False
+        return best
+    prices = _attacker_prices(rewards, uses, columns, len(attackers), best.value, deadline=deadline)
+    subset_prices = {t: uses[t] @ prices[columns[t]] for t in tables}
+    suffix_prices = [float(prices[depth:].sum()) for depth in range(len(attackers) + 1)]
+    open_subsets: Dict[Tuple[int, int], np.ndarray] = {}
+    live: List[List[int]] = []  # Targets some attacker from depth on can still reach
+    for depth in range(len(attackers) + 1):
+        live.append([t for t in targets if any(index[o.attacker] >= depth for o in reach[t])])
+        for t, table in tables.items():
+            decided = [i for i, column in enumerate(columns[t]) if column < depth]
+            open_subsets[t, depth] = np.flatnonzero(~table.uses[:, decided].any(axis=1))
+    target_bounds: Dict[tuple, float] = {}
+
+    def target_bound(target: int, depth: int) -> float:
+        """Most target can add, less the prices of the remaining attackers it would take"""
+        now, kill_now, risk_now = search_state.terms[target]
+        if target not in rewards:
+            return (1.0 - kill_now) * values[target] + risk_now
+        have = search_state.have[target]
+        key = (target, depth, have)
+        if key not in target_bounds:
+            free = open_subsets[target, depth]
+            gain = float((rewards[target][have + free] - subset_prices[target][free]).max()) - now
+            target_bounds[key] = max(0.0, gain)
+        return target_bounds[key]
+
+    def bound(depth: int) -> float:
+        return search_state.value + suffix_prices[depth] + sum(target_bound(t, depth) for t in live[depth])
+
+    def search(depth: int):
+        nonlocal best, nodes, stopped
+        nodes += 1
+        if nodes > max_nodes or expired():
+            stopped = True
+        if stopped:
+            return
+        if search_state.value > best.value + 1e-12:
+            best = search_state.plan()
+        if depth == len(attackers) or bound(depth) <= best.value + 1e-12:
+            return
+        for option in by_attacker[attackers[depth]]:
+            if not search_state.add(option):
+                continue
+            search(depth + 1)
+            search_state.remove(option)
+            if stopped:
+                return
+        search(depth + 1)  # This attacker does not attack
+
+    search(0)
+    best.nodes = nodes
+    best.optimal = not stopped
+    return best
@@ -0,0 +1,237 @@
+import time
+import numpy as np
+from typing import Optional, Tuple
+from emblemmind_snapshot import TurnSnapshot
+from utils.fe_data_mappings import ITEM_ATTACK_RANGES
+
+# Stat indices in Unit.stats (order written by fe_memory_reader.lua)
+STR, SKL, SPD, LCK, DEF, RES, MOV, CON, AID = range(9)
+
+ACTED = 0x02  # turn_status bit set once a unit has moved this phase
+IMPASSABLE_SYMBOLS = {'#', '-'}  # Walls and off-map tiles
+GOOD_TERRAIN_SYMBOLS = {'F', '^'}  # Same terrain bonus as ActionCoordinator.simulate_action
+
+# Per-item (min_range, max_range) lookup so weapon ranges can be gathered with array indexing
+_MIN_RANGE = np.zeros(256, dtype=np.int16)
+_MAX_RANGE = np.zeros(256, dtype=np.int16)
+for _item_id, (_lo, _hi) in ITEM_ATTACK_RANGES.items():
+    if _item_id < 256:
+        _MIN_RANGE[_item_id] = _lo
+        _MAX_RANGE[_item_id] = _hi
+
+class BatchSimulator:
+    """Steps N copies of a chapter state at once using NumPy arrays.
+
+    Units are laid out as players followed by enemies, in snapshot order.
+    Each step takes one action per environment as (unit index, destination,
+    target index) where a target of -1 means a plain move. Rules mirror
+    ActionCoordinator.simulate_action (strength minus defence damage) with
+    counters and follow-up strikes added.
+    """
+
+    def __init__(self, snapshot: TurnSnapshot, num_envs: int):
+        self.num_envs = num_envs
+        self.units = list(snapshot.units) + list(snapshot.enemies)
+        self.num_units = len(self.units)
+        self.is_enemy = np.array([u.is_enemy for u in self.units], dtype=bool)
+        self.width = snapshot.map.width
+        self.height = snapshot.map.height
+
+        grid = snapshot.map.grid
+        self.passable = np.array(
+            [[grid[y][x] not in IMPASSABLE_SYMBOLS for x in range(self.width)] for y in range(self.height)],
+            dtype=bool
+        )
+        self.terrain_reward = np.array(
+            [[10 if grid[y][x] in GOOD_TERRAIN_SYMBOLS else (-10 if grid[y][x] == '#' else 0)
+              for x in range(self.width)] for y in range(self.height)],
+            dtype=np.float32
+        )
+
+        # Initial state, copied into every environment on reset
+        self._init_pos = np.array([u.position for u in self.units], dtype=np.int16).reshape(self.num_units, 2)
+        self._init_hp = np.array([u.hp[0] for u in self.units], dtype=np.int16)
+        self.max_hp = np.array([u.hp[1] for u in self.units], dtype=np.int16)
+        self._init_stats = np.array(
+            [list(u.stats) + [0] * (9 - len(u.stats)) for u in self.units], dtype=np.int16
+        ).reshape(self.num_units, 9)
+        # RAM only stores the movement bonus; use the full range (class base + bonus)
+        self._init_stats[:, MOV] = np.array([u.movement_range for u in self.units], dtype=np.int16)
+        items = np.zeros((self.num_units, 5, 2), dtype=np.int16)
+        for i, unit in enumerate(self.units):
+            for slot, (item_id, uses) in enumerate(unit.items[:5]):
+                items[i, slot] = (item_id, uses)
+        self._init_items = items
+        self._init_status = np.array([u.turn_status for u in self.units], dtype=np.uint8)
+
+        n, u = num_envs, self.num_units
+        self.pos = np.empty((n, u, 2), dtype=np.int16)
+        self.hp = np.empty((n, u), dtype=np.int16)
+        self.stats = np.empty((n, u, 9), dtype=np.int16)
+        self.items = np.empty((n, u, 5, 2), dtype=np.int16)
+        self.turn_status = np.empty((n, u), dtype=np.uint8)
+        self._rows = np.arange(n)
+        self.reset()
+
+    def reset(self, env_mask: Optional[np.ndarray] = None):
+        """Restore the initial chapter state in all (or the masked) environments"""
+        envs = self._rows if env_mask is None else np.flatnonzero(env_mask)
+        self.pos[envs] = self._init_pos
+        self.hp[envs] = self._init_hp
+        self.stats[envs] = self._init_stats
+        self.items[envs] = self._init_items
+        self.turn_status[envs] = self._init_status
+
+    def end_phase(self, env_mask: Optional[np.ndarray] = None):
+        """Clear the acted flag on every player unit (start of the next player phase)"""
+        envs = self._rows if env_mask is None else np.flatnonzero(env_mask)
+        players = ~self.is_enemy
+        status = self.turn_status[envs]
+        status[:, players] &= np.uint8(~ACTED & 0xFF)
+        self.turn_status[envs] = status
+
+    def weapon_ranges(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Slot of the first usable weapon per unit and its (min, max) range"""
+        ids = self.items[..., 0]
+        usable = (self.items[..., 1] > 0) & (_MAX_RANGE[ids] > 0)
+        slot = np.argmax(usable, axis=-1)
+        has_weapon = usable.any(axis=-1)
+        weapon = np.take_along_axis(ids, slot[..., None], axis=-1)[..., 0]
+        min_range = np.where(has_weapon, _MIN_RANGE[weapon], 0)
+        max_range = np.where(has_weapon, _MAX_RANGE[weapon], 0)
+        return slot, min_range, max_range
+
+    def occupancy(self) -> np.ndarray:
+        """(N, H, W) count of living units per tile"""
+        occupied = np.zeros((self.num_envs, self.height, self.width), dtype=np.int16)
+        alive = self.hp > 0
+        env_idx = np.broadcast_to(self._rows[:, None], alive.shape)[alive]
+        np.add.at(occupied, (env_idx, self.pos[..., 1][alive], self.pos[..., 0][alive]), 1)
+        return occupied
+
+    def valid_destinations(self, unit_idx: np.ndarray) -> np.ndarray:
+        """(N, H, W) mask of tiles each environment's selected unit may move to"""
+        ys, xs = np.mgrid[0:self.height, 0:self.width]
+        pos = self.pos[self._rows, unit_idx]
+        mov = self.stats[self._rows, unit_idx, MOV]
+        dist = np.abs(xs[None] - pos[:, 0, None, None]) + np.abs(ys[None] - pos[:, 1, None, None])
+        mask = (dist <= mov[:, None, None]) & self.passable[None] & (self.occupancy() == 0)
+        mask[self._rows, pos[:, 1], pos[:, 0]] = True  # Staying put is always allowed
+        return mask
+
+    def step(self, unit_idx: np.ndarray, dest: np.ndarray, target_idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Apply one action per environment.
+
+        Args:
+            unit_idx: (N,) acting unit index
+            dest: (N, 2) destination tile (x, y)
+            target_idx: (N,) unit to attack after moving, or -1 to just move
+
+        Returns:
+            (rewards, valid, done) arrays of shape (N,)
+        """
+        rows = self._rows
+        unit_idx = np.asarray(unit_idx, dtype=np.int64)
+        target_idx = np.asarray(target_idx, dtype=np.int64)
+        dest = np.asarray(dest, dtype=np.int16)
+        dx, dy = dest[:, 0], dest[:, 1]
+
+        # --- Movement validation ---
+        pos = self.pos[rows, unit_idx]
+        alive = self.hp > 0
+        in_bounds = (dx >= 0) & (dx < self.width) & (dy >= 0) & (dy < self.height)
+        cx, cy = np.clip(dx, 0, self.width - 1), np.clip(dy, 0, self.height - 1)
+        dist = np.abs(dx - pos[:, 0]) + np.abs(dy - pos[:, 1])
+        blocked = ((self.pos[..., 0] == dx[:, None]) & (self.pos[..., 1] == dy[:, None]) & alive)
+        blocked[rows, unit_idx] = False
+        can_act = (~self.is_enemy[unit_idx]) & alive[rows, unit_idx] & ((self.turn_status[rows, unit_idx] & ACTED) == 0)
+        valid = (can_act & in_bounds & self.passable[cy, cx]
+                 & (dist <= self.stats[rows, unit_idx, MOV]) & ~blocked.any(axis=1))
+
+        # --- Attack validation ---
+        attacking = target_idx >= 0
+        tgt = np.where(attacking, target_idx, 0)
+        slot, min_range, max_range = self.weapon_ranges()
+        tpos = self.pos[rows, tgt]
+        attack_dist = np.abs(tpos[:, 0] - dx) + np.abs(tpos[:, 1] - dy)
+        attack_ok = (self.is_enemy[tgt] & alive[rows, tgt]
+                     & (attack_dist >= min_range[rows, unit_idx]) & (attack_dist <= max_range[rows, unit_idx]))
+        valid &= ~attacking | attack_ok
+        attacking &= valid
+
+        rewards = np.full(self.num_envs, -1.0, dtype=np.float32)
+
+        # --- Apply movement ---
+        self.pos[rows[valid], unit_idx[valid]] = dest[valid]
+        self.turn_status[rows[valid], unit_idx[valid]] |= ACTED
+        moving = valid & ~attacking
+        rewards[moving] += self.terrain_reward[cy[moving], cx[moving]]
+
+        # --- Combat resolution ---
+        if attacking.any():
+            a_stats = self.stats[rows, unit_idx]
+            d_stats = self.stats[rows, tgt]
+            a_dmg = np.maximum(0, a_stats[:, STR] - d_stats[:, DEF])
+            d_dmg = np.maximum(0, d_stats[:, STR] - a_stats[:, DEF])
+            a_double = a_stats[:, SPD] - d_stats[:, SPD] >= 4
+            d_double = d_stats[:, SPD] - a_stats[:, SPD] >= 4
+            counters = (attack_dist >= min_range[rows, tgt]) & (attack_dist <= max_range[rows, tgt])
+
+            a_hp = self.hp[rows, unit_idx].astype(np.int32)
+            d_hp = self.hp[rows, tgt].astype(np.int32)
+            start_d_hp = d_hp.copy()
+            # Attack, counter, follow-up: each strike only lands while both units stand
+            d_hp = np.where(attacking, d_hp - a_dmg, d_hp)
+            a_hp = np.where(attacking & counters & (d_hp > 0), a_hp - d_dmg, a_hp)
+            d_hp = np.where(attacking & a_double & (a_hp > 0) & (d_hp > 0), d_hp - a_dmg, d_hp)
+            a_hp = np.where(attacking & counters & d_double & (a_hp > 0) & (d_hp > 0), a_hp - d_dmg, a_hp)
+            a_hp, d_hp = np.maximum(a_hp, 0), np.maximum(d_hp, 0)
+
+            self.hp[rows[attacking], unit_idx[attacking]] = a_hp[attacking]
+            self.hp[rows[attacking], tgt[attacking]] = d_hp[attacking]
+            used_slot = slot[rows, unit_idx]
+            self.items[rows[attacking], unit_idx[attacking], used_slot[attacking], 1] -= 1
+
+            killed = attacking & (d_hp == 0)
+            rewards[killed] += 50
+            dealt = attacking & ~killed
+            rewards[dealt] += (start_d_hp - d_hp)[dealt]
+
+        return rewards, valid, self.done()
+
+    def done(self) -> np.ndarray:
+        """(N,) true where either side has been wiped out"""
+        alive = self.hp > 0
+        enemies_left = (alive & self.is_enemy).any(axis=1)
+        players_left = (alive & ~self.is_enemy).any(axis=1)
+        return ~enemies_left | ~players_left
+
+def benchmark(snapshot: TurnSnapshot, num_envs: int = 4096, steps: int = 200, seed: int = 0) -> float:
+    """Step random actions and return env-steps per second"""
+    rng = np.random.default_rng(seed)
+    sim = BatchSimulator(snapshot, num_envs)
+    players = np.flatnonzero(~sim.is_enemy)
+    enemies = np.flatnonzero(sim.is_enemy)
+    if len(players) == 0:
+        return 0.0
+    start = time.perf_counter()
+    for i in range(steps):
+        unit_idx = rng.choice(players, size=num_envs)
+        pos = sim.pos[sim._rows, unit_idx]
+        dest = pos + rng.integers(-2, 3, size=(num_envs, 2)).astype(np.int16)
+        target = rng.choice(enemies, size=num_envs) if len(enemies) else np.full(num_envs, -1)
+        target = np.where(rng.random(num_envs) < 0.5, target, -1)
+        _, _, done = sim.step(unit_idx, dest, target)
+        if i % 5 == 4:
+            sim.end_phase()
+        if done.any():
+            sim.reset(done)
+    elapsed = time.perf_counter() - start
+    return num_envs * steps / elapsed
+
+if __name__ == "__main__":
+    import os
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+    snap = TurnSnapshot.from_files(os.path.join(data_dir, 'fe_state.txt'), os.path.join(data_dir, 'fe_map.txt'))
+    for n in (256, 1024, 4096, 16384):
+        print(f"{n:6d} envs: {benchmark(snap, num_envs=n):,.0f} env-steps/sec")
@@ -0,0 +1,188 @@
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from emblemmind_snapshot import TurnSnapshot, Unit
+from agent.distance_fields import path_table_for
+from agent.tile_features import terrain_planes
+from utils.fe_data_mappings import ITEM_ATTACK_RANGES
+
+def popcount(board: int) -> int:
+    return board.bit_count() if hasattr(board, 'bit_count') else bin(board).count('1')
+
+class BitboardLayout:
+    """Packs sets of tiles on a W x H map into Python ints (bit y*W + x).
+
+    Set algebra is plain int arithmetic (&, |, ^, & ~); shift() moves a
+    whole set by (dx, dy) without wrapping across rows, so neighbour
+    expansion and attack-range rings are a handful of shifts. words()
+    exposes the same bits as a uint64 array for NumPy code.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.full = (1 << self.size) - 1
+        self._column_masks: Dict[Tuple[str, int], int] = {}
+        self._ring_offsets: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+
+    def index(self, x: int, y: int) -> int:
+        return y * self.width + x
+
+    def bit(self, x: int, y: int) -> int:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return 1 << (y * self.width + x)
+        return 0
+
+    def test(self, board: int, position: Tuple[int, int]) -> bool:
+        x, y = position
+        return 0 <= x < self.width and 0 <= y < self.height and (board >> (y * self.width + x)) & 1 == 1
+
+    def from_positions(self, positions: Iterable[Tuple[int, int]]) -> int:
+        board = 0
+        for x, y in positions:
+            board |= self.bit(x, y)
+        return board
+
+    def from_mask(self, mask: np.ndarray) -> int:
+        """Board from an (H, W) bool array"""
+        packed = np.packbits(np.asarray(mask, dtype=bool).ravel(), bitorder='little')
+        return int.from_bytes(packed.tobytes(), 'little')
+
+    def to_mask(self, board: int) -> np.ndarray:
+        data = np.frombuffer(board.to_bytes((self.size + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(data, bitorder='little')[:self.size].reshape(self.height, self.width).astype(bool)
+
+    def words(self, board: int) -> np.ndarray:
+        """Board as little-endian uint64 words"""
+        count = (self.size + 63) // 64
+        return np.frombuffer(board.to_bytes(count * 8, 'little'), dtype='<u8').copy()
+
+    def from_words(self, words: np.ndarray) -> int:
+        return int.from_bytes(np.asarray(words, dtype='<u8').tobytes(), 'little') & self.full
+
+    def positions(self, board: int) -> Iterator[Tuple[int, int]]:
+        """Iterate set tiles in index order, one lowest-bit extraction per tile"""
+        while board:
+            low = board & -board
+            i = low.bit_length() - 1
+            yield i % self.width, i // self.width
+            board ^= low
+
+    def _columns(self, side: str, count: int) -> int:
+        """Mask of the first (side 'lo') or last (side 'hi') `count` columns"""
+        key = (side, count)
+        if key not in self._column_masks:
+            count = max(0, min(count, self.width))
+            row = (1 << count) - 1 if side == 'lo' else ((1 << count) - 1) << (self.width - count)
+            self._column_masks[key] = sum(row << (y * self.width) for y in range(self.height))
+        return self._column_masks[key]
+
+    def shift(self, board: int, dx: int, dy: int) -> int:
+        """Move every tile by (dx, dy); tiles pushed off the map are dropped"""
+        if dx > 0:
+            board = (board & self._columns('lo', self.width - dx)) << dx
+        elif dx < 0:
+            board = (board & self._columns('hi', self.width + dx)) >> -dx
+        if dy > 0:
+            board <<= dy * self.width
+        elif dy < 0:
+            board >>= -dy * self.width
+        return board & self.full
+
+    def expand(self, board: int) -> int:
+        """Board plus its 4-neighbours"""
+        return (board | self.shift(board, 1, 0) | self.shift(board, -1, 0)
+                | self.shift(board, 0, 1) | self.shift(board, 0, -1))
+
+    def dilate(self, board: int, steps: int, within: Optional[int] = None) -> int:
+        """Tiles within `steps` Manhattan moves, optionally only stepping through `within`"""
+        for _ in range(steps):
+            grown = self.expand(board)
+            if within is not None:
+                grown &= within | board
+            if grown == board:
+                break
+            board = grown
+        return board
+
+    def ring(self, board: int, min_range: int, max_range: int) -> int:
+        """Tiles at Manhattan distance min_range..max_range from some tile of the board"""
+        key = (min_range, max_range)
+        if key not in self._ring_offsets:
+            self._ring_offsets[key] = [(dx, dy) for dx in range(-max_range, max_range + 1)
+                                       for dy in range(-max_range, max_range + 1)
+                                       if min_range <= abs(dx) + abs(dy) <= max_range]
+        result = 0
+        for dx, dy in self._ring_offsets[key]:
+            result |= self.shift(board, dx, dy)
+        return result
+
+class SnapshotBoards:
+    """Occupancy, good-terrain and per-enemy threat bitboards for one snapshot"""
+
+    def __init__(self, snapshot: TurnSnapshot):
+        self.map = snapshot.map
+        self.layout = layout = BitboardLayout(snapshot.map.width, snapshot.map.height)
+        self.allies = layout.from_positions(u.position for u in snapshot.units)
+        self.enemies = layout.from_positions(e.position for e in snapshot.enemies)
+        self.occupied = self.allies | self.enemies
+        self.good_terrain = layout.from_mask(terrain_planes(snapshot.map).good_terrain)
+        self._visible_enemies = [e for e in snapshot.enemies if e.is_alive and e.is_visible]
+        self._threats: Dict[tuple, int] = {}  # By (id, position): generic enemies share character IDs
+        self._threat_union: Optional[int] = None
+
+    def enemy_threat(self, enemy: Unit) -> int:
+        """Tiles the enemy can hit after moving up to its MOV onto an empty tile.
+
+        Movement is by terrain cost when a PathTable is registered for the
+        map and the enemy's movement type, else Manhattan.
+        """
+        key = (enemy.id, enemy.position)
+        if key not in self._threats:
+            layout = self.layout
+            table = path_table_for(self.map, enemy.movement_type)
+            x, y = enemy.position
+            if table is not None and 0 <= x < table.width and 0 <= y < table.height:
+                stand = layout.from_mask(np.asarray(table.field(enemy.position)) <= enemy.movement_range)
+            else:
+                stand = layout.dilate(layout.bit(x, y), enemy.movement_range)
+            stand &= ~self.occupied
+            threat = 0
+            for item_id, uses in enemy.items:
+                if uses > 0 and item_id in ITEM_ATTACK_RANGES:
+                    min_range, max_range = ITEM_ATTACK_RANGES[item_id]
+                    threat |= layout.ring(stand, min_range, max_range)
+            self._threats[key] = threat
+        return self._threats[key]
+
+    @property
+    def threat_union(self) -> int:
+        """Tiles at least one visible enemy can hit"""
+        if self._threat_union is None:
+            self._threat_union = 0
+            for enemy in self._visible_enemies:
+                self._threat_union |= self.enemy_threat(enemy)
+        return self._threat_union
+
+    def safe_tiles(self, reach: int) -> int:
+        """Tiles of a reach set that no visible enemy can hit"""
+        return reach & ~self.threat_union
+
+    def movement_board(self, movement_map: List[List[int]]) -> int:
+        """Reach set from the game's MOVEMENT_MAP (0xFF = unreachable)"""
+        if not movement_map:
+            return 0
+        mask = np.zeros((self.layout.height, self.layout.width), dtype=bool)
+        grid = np.array(movement_map, dtype=np.int32)[:self.layout.height, :self.layout.width]
+        mask[:grid.shape[0], :grid.shape[1]] = grid != 0xFF
+        return self.layout.from_mask(mask)
+
+_cached: Optional[Tuple[TurnSnapshot, tuple, SnapshotBoards]] = None
+
+def snapshot_boards(snapshot: TurnSnapshot) -> SnapshotBoards:
+    """SnapshotBoards for this snapshot, reused while its units stay where they are"""
+    global _cached
+    signature = tuple((u.id, u.position, u.is_alive) for u in snapshot.units + snapshot.enemies)
+    if _cached is None or _cached[0] is not snapshot or _cached[1] != signature:
+        _cached = (snapshot, signature, SnapshotBoards(snapshot))
+    return _cached[2]
@@ -0,0 +1,157 @@
+from typing import Dict, List, Optional, Set, Tuple
+from emblemmind_snapshot import TurnSnapshot, Unit
+from agent.action_generator import Action
+
+Entry = Tuple[int, int]  # (unit id, index into that unit's action list)
+TargetKey = Tuple[int, Tuple[int, int]]  # (character id, tile): generic enemies share character IDs
+
+def target_key(unit: Unit) -> TargetKey:
+    return unit.id, tuple(unit.position)
+
+class CandidateIndex:
+    """Each remaining unit's candidate actions for one player phase, kept valid incrementally.
+
+    Actions are indexed by target (character ID and tile, for attacks) and by destination tile
+    (every action ends with the unit on target_position). An action is live
+    unless its target is dead or another unit now stands on its tile. After
+    each executed action, apply() touches only the entries for the tiles
+    and target that changed, and only those units' cached lists are rebuilt.
+    Actions for a freed tile come back only if they were generated at the
+    start of the phase; nothing new is probed.
+
+    fallbacks (per unit, as ActionPruner.prune_with_fallbacks returns them)
+    are tiles pruned in favour of a kept action. The kept action and its
+    fallbacks form one slot; the slot offers its first live member, so
+    when the kept tile is occupied the best dropped tile is promoted.
+
+    attack_version(unit_id) changes whenever the unit's live attacks change
+    or a target it can attack is struck, so callers can reuse forecasts
+    for those attacks until then.
+    """
+
+    def __init__(self, units: List[Unit], unit_actions: List[List[Action]], snapshot: TurnSnapshot,
+                 fallbacks: Optional[List[Dict[int, List[Action]]]] = None):
+        self.units: Dict[int, Unit] = {unit.id: unit for unit in units}
+        self.order: List[int] = [unit.id for unit in units]
+        self.actions: Dict[int, List[Action]] = {}
+        self._slot_of: Dict[int, List[int]] = {}  # action index -> index of the slot's kept action
+        self._members: Dict[int, Dict[int, List[int]]] = {}  # kept action index -> slot's action indices, best first
+        for n, (unit, actions) in enumerate(zip(units, unit_actions)):
+            spares = fallbacks[n] if fallbacks is not None else {}
+            self.actions[unit.id] = list(actions)
+            self._slot_of[unit.id] = list(range(len(actions)))
+            self._members[unit.id] = {i: [i] for i in range(len(actions))}
+            for i, dropped in spares.items():
+                for action in dropped:
+                    self._members[unit.id][i].append(len(self.actions[unit.id]))
+                    self._slot_of[unit.id].append(i)
+                    self.actions[unit.id].append(action)
+        self.by_target: Dict[TargetKey, List[Entry]] = {}
+        self.by_tile: Dict[Tuple[int, int], List[Entry]] = {}
+        self.occupants: Dict[Tuple[int, int], int] = {u.position: u.id for u in snapshot.units + snapshot.enemies
+                                                      if u.is_alive}
+        self._dead: Dict[int, Set[int]] = {unit_id: set() for unit_id in self.order}
+        self._blocked: Dict[int, Set[int]] = {unit_id: set() for unit_id in self.order}
+        self._attack_counts: Dict[int, int] = {unit_id: 0 for unit_id in self.order}
+        self._attack_versions: Dict[int, int] = {unit_id: 0 for unit_id in self.order}
+        self._live: Dict[int, Optional[List[Action]]] = {unit_id: None for unit_id in self.order}
+        for unit_id, actions in self.actions.items():
+            for i, action in enumerate(actions):
+                if action.action_type == 'attack':
+                    if self._slot_of[unit_id][i] == i:
+                        self._attack_counts[unit_id] += 1
+                    if action.target_unit is not None:
+                        self.by_target.setdefault(target_key(action.target_unit), []).append((unit_id, i))
+                self.by_tile.setdefault(tuple(action.target_position), []).append((unit_id, i))
+
+    def _is_live(self, unit_id: int, i: int) -> bool:
+        return i not in self._dead[unit_id] and i not in self._blocked[unit_id]
+
+    def _slot_is_live(self, unit_id: int, slot: int) -> bool:
+        return any(self._is_live(unit_id, i) for i in self._members[unit_id][slot])
+
+    def _mark(self, flags: Dict[int, Set[int]], entry: Entry, on: bool):
+        unit_id, i = entry
+        if unit_id not in self._live:
+            return  # Unit already acted
+        slot = self._slot_of[unit_id][i]
+        was_live, slot_was_live = self._is_live(unit_id, i), self._slot_is_live(unit_id, slot)
+        (flags[unit_id].add if on else flags[unit_id].discard)(i)
+        if was_live != self._is_live(unit_id, i):
+            self._live[unit_id] = None
+            if self.actions[unit_id][i].action_type == 'attack':
+                self._attack_versions[unit_id] += 1
+            slot_live = self._slot_is_live(unit_id, slot)
+            if slot_was_live != slot_live and self.actions[unit_id][slot].action_type == 'attack':
+                self._attack_counts[unit_id] += 1 if slot_live else -1
+
+    def live_actions(self, unit_id: int) -> List[Action]:
+        """Currently valid actions for a unit (one per slot, fallbacks promoted), in generation order"""
+        if self._live[unit_id] is None:
+            live = []
+            for slot, members in self._members[unit_id].items():
+                i = next((i for i in members if self._is_live(unit_id, i)), None)
+                if i is not None:
+                    live.append(self.actions[unit_id][i])
+            self._live[unit_id] = live
+        return self._live[unit_id]
+
+    def has_attack(self, unit_id: int) -> bool:
+        return self._attack_counts[unit_id] > 0
+
+    def attack_version(self, unit_id: int) -> int:
+        return self._attack_versions[unit_id]
+
+    def occupy(self, position: Tuple[int, int], occupant: int):
+        self.occupants[position] = occupant
+        for entry in self.by_tile.get(position, ()):
+            self._mark(self._blocked, entry, entry[0] != occupant)
+
+    def vacate(self, position: Tuple[int, int]):
+        self.occupants.pop(position, None)
+        for entry in self.by_tile.get(position, ()):
+            self._mark(self._blocked, entry, False)
+
+    def remove_target(self, target: Unit):
+        """Invalidate every attack on a defeated enemy"""
+        for entry in self.by_target.get(target_key(target), ()):
+            self._mark(self._dead, entry, True)
+
+    def strike_target(self, target: Unit):
+        """A target took damage: forecasts of attacks on it are stale"""
+        for unit_id in {unit_id for unit_id, _ in self.by_target.get(target_key(target), ())}:
+            if unit_id in self._attack_versions:
+                self._attack_versions[unit_id] += 1
+
+    def apply(self, unit: Unit, old_position: Tuple[int, int], killed: Optional[Unit] = None,
+              struck: Optional[Unit] = None):
+        """Record an executed action: the unit moved from old_position and may have struck or killed a target"""
+        if struck is not None and struck is not killed:
+            self.strike_target(struck)
+        if killed is not None:
+            self.remove_target(killed)
+            if self.occupants.get(killed.position) == killed.id:
+                self.vacate(killed.position)
+        if tuple(unit.position) != tuple(old_position):
+            if self.occupants.get(old_position) == unit.id:
+                self.vacate(old_position)
+            self.occupy(tuple(unit.position), unit.id)
+
+    def remove_unit(self, unit_id: int):
+        """The unit has acted; its candidates stop being tracked"""
+        if unit_id in self._live:
+            self.order.remove(unit_id)
+            for table in (self._live, self._dead, self._blocked, self._attack_counts, self._attack_versions):
+                del table[unit_id]
+
+    def partition(self) -> Tuple[List[Unit], List[List[Action]], List[Unit], List[List[Action]]]:
+        """(attack units, their actions, other units, their actions), each in phase order"""
+        attack_units, attack_actions, other_units, other_actions = [], [], [], []
+        for unit_id in self.order:
+            if self.has_attack(unit_id):
+                attack_units.append(self.units[unit_id])
+                attack_actions.append(self.live_actions(unit_id))
+            else:
+                other_units.append(self.units[unit_id])
+                other_actions.append(self.live_actions(unit_id))
+        return attack_units, attack_actions, other_units, other_actions
@@ -0,0 +1,142 @@
+import heapq
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+from emblemmind_snapshot import TerrainMap, TurnSnapshot, Unit
+from agent.tile_features import TerrainPlanes, terrain_hash, terrain_planes
+from utils.terrain_data import IMPASSABLE
+
+FIELD_CACHE_SIZE = 64
+
+def distance_field(cost: np.ndarray, sources: Iterable[Tuple[int, int]]) -> np.ndarray:
+    """Multi-source Dijkstra over a (H, W) movement cost grid.
+
+    Entering a tile costs its movement cost; IMPASSABLE tiles are never
+    entered. Sources start at 0 whatever their own terrain. Returns (H, W)
+    float32 distances, inf where no source can reach.
+    """
+    height, width = cost.shape
+    dist = np.full((height, width), np.inf, dtype=np.float32)
+    heap = []
+    for x, y in sources:
+        if 0 <= x < width and 0 <= y < height and dist[y, x] > 0:
+            dist[y, x] = 0
+            heap.append((0, x, y))
+    heapq.heapify(heap)
+    cost_rows = cost.tolist()  # Python ints are much faster to index than NumPy scalars
+    dist_rows = dist.tolist()
+    while heap:
+        d, x, y = heapq.heappop(heap)
+        if d > dist_rows[y][x]:
+            continue
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < width and 0 <= ny < height:
+                step = cost_rows[ny][nx]
+                if step >= IMPASSABLE:
+                    continue
+                nd = d + step
+                if nd < dist_rows[ny][nx]:
+                    dist_rows[ny][nx] = nd
+                    heapq.heappush(heap, (nd, nx, ny))
+    return np.array(dist_rows, dtype=np.float32)
+
+_field_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+_path_tables: Dict[Tuple[str, str], "PathTable"] = {}  # (terrain hash, movement type), filled by agent/path_tables.py
+
+def register_path_table(terrain_map: TerrainMap, move_type: str, table: "PathTable"):
+    """Answer distance queries for this map and movement type from an all-pairs table"""
+    _path_tables[(terrain_hash(terrain_map), move_type)] = table
+
+def path_table_for(terrain_map: TerrainMap, move_type: str) -> Optional["PathTable"]:
+    """Registered PathTable for this map and movement type (None if there is none)"""
+    return _path_tables.get((terrain_hash(terrain_map), move_type)) if _path_tables else None
+
+def cached_distance_field(terrain_map: TerrainMap, move_type: str,
+                          sources: FrozenSet[Tuple[int, int]],
+                          planes: Optional[TerrainPlanes] = None, map_key: Optional[str] = None) -> np.ndarray:
+    """distance_field from an LRU keyed by (terrain hash, movement type, source set).
+
+    When a PathTable is registered for the map and movement type the field
+    is a min over its rows instead of a Dijkstra run. Callers that already
+    hold the map's terrain_hash pass it as map_key.
+    """
+    key = (map_key or terrain_hash(terrain_map), move_type, sources)
+    field = _field_cache.get(key)
+    if field is None:
+        table = _path_tables.get(key[:2])
+        if table is not None:
+            field = table.nearest_field(sources)
+        else:
+            planes = planes or terrain_planes(terrain_map)
+            field = distance_field(planes.movement_cost(move_type), sources)
+        field.setflags(write=False)  # Shared between callers
+        _field_cache[key] = field
+        while len(_field_cache) > FIELD_CACHE_SIZE:
+            _field_cache.popitem(last=False)
+    else:
+        _field_cache.move_to_end(key)
+    return field
+
+class DistanceFields:
+    """Terrain-aware distance-to-nearest-enemy / ally fields for one snapshot.
+
+    Each field is the movement cost for a given movement type to walk from
+    the nearest source unit to every tile (the reverse walk differs only by
+    the two endpoint tiles' own costs). Fields are built lazily and
+    shared through the module LRU, so snapshots of the same map and unit
+    positions reuse them; each instance also keeps the fields it has used,
+    so repeat queries are a dict hit plus a single array lookup.
+    """
+
+    def __init__(self, snapshot: TurnSnapshot):
+        self.snapshot = snapshot
+        self.map_key = terrain_hash(snapshot.map)
+        self.terrain = terrain_planes(snapshot.map)
+        self._fields: Dict[Tuple[str, FrozenSet[Tuple[int, int]]], np.ndarray] = {}
+        self.visible_enemies = frozenset(e.position for e in snapshot.enemies if e.is_alive and e.is_visible)
+        self.all_enemies = frozenset(e.position for e in snapshot.enemies if e.is_alive)
+        self.allies = frozenset(u.position for u in snapshot.units if u.is_alive)
+
+    def field(self, move_type: str, sources: FrozenSet[Tuple[int, int]]) -> np.ndarray:
+        key = (move_type, sources)
+        field = self._fields.get(key)
+        if field is None:
+            field = self._fields[key] = cached_distance_field(self.snapshot.map, move_type, sources,
+                                                              self.terrain, self.map_key)
+        return field
+
+    def enemy_field(self, move_type: str, only_visible: bool = True) -> np.ndarray:
+        return self.field(move_type, self.visible_enemies if only_visible else self.all_enemies)
+
+    def ally_field(self, move_type: str) -> np.ndarray:
+        return self.field(move_type, self.allies)
+
+    def _lookup(self, field: np.ndarray, unit: Unit, position, sources) -> float:
+        x, y = position if position is not None else unit.position
+        if not sources:
+            return 0
+        distance = float(field[y, x]) if 0 <= x < self.terrain.width and 0 <= y < self.terrain.height else float('inf')
+        if distance == float('inf'):
+            # Off the map or cut off by terrain: fall back to Manhattan so scores stay finite
+            return min(abs(x - sx) + abs(y - sy) for sx, sy in sources)
+        return distance
+
+    def min_enemy_distance(self, unit: Unit, position=None, only_visible: bool = True) -> float:
+        """Movement cost from `position` (default: the unit's tile) to the nearest enemy, 0 if none"""
+        sources = self.visible_enemies if only_visible else self.all_enemies
+        return self._lookup(self.field(unit.movement_type, sources), unit, position, sources)
+
+    def min_ally_distance(self, unit: Unit, position=None) -> float:
+        """Movement cost from `position` (default: the unit's tile) to the nearest other ally, 0 if none"""
+        sources = self.allies
+        if not unit.is_enemy and unit.is_alive:
+            sources = sources - {unit.position}
+        return self._lookup(self.field(unit.movement_type, sources), unit, position, sources)
+
+def pair_distance(terrain_map: TerrainMap, move_type: str, start: Tuple[int, int], goal: Tuple[int, int]) -> float:
+    """Movement cost between two tiles (cached per start tile)"""
+    field = cached_distance_field(terrain_map, move_type, frozenset([start]))
+    x, y = goal
+    if 0 <= y < field.shape[0] and 0 <= x < field.shape[1]:
+        return float(field[y, x])
+    return float('inf')
@@ -0,0 +1,278 @@
+import copy
+import time
+import numpy as np
+from multiprocessing import get_context, shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+from emblemmind_snapshot import TurnSnapshot
+from agent.action_generator import Action, ActionGenerator
+from agent.macro_actions import MacroActionSpace
+from agent.reward import compute_reward, is_player_dead, is_level_beaten
+from agent.simulation import simulate_action
+
+MAX_UNITS = 32        # Unit slots in the observation (players first, then enemies)
+UNIT_FEATURES = 8     # Features per unit slot
+MAX_ACTIONS = 256     # Size of the (masked) discrete action space
+OBSERVATION_SIZE = MAX_UNITS * UNIT_FEATURES + 3
+
+def encode_observation(snapshot: TurnSnapshot) -> np.ndarray:
+    """Encode a snapshot as a fixed-size float32 vector"""
+    obs = np.zeros(OBSERVATION_SIZE, dtype=np.float32)
+    width = max(1, snapshot.map.width)
+    height = max(1, snapshot.map.height)
+    for slot, unit in enumerate((snapshot.units + snapshot.enemies)[:MAX_UNITS]):
+        max_hp = max(1, unit.hp[1])
+        obs[slot * UNIT_FEATURES:(slot + 1) * UNIT_FEATURES] = (
+            1.0,  # Slot in use
+            unit.position[0] / width,
+            unit.position[1] / height,
+            unit.hp[0] / max_hp,
+            float(unit.is_enemy),
+            float(unit.can_act),
+            unit.stats[0] / 30.0 if len(unit.stats) > 0 else 0.0,  # Strength
+            unit.stats[4] / 30.0 if len(unit.stats) > 4 else 0.0   # Defense
+        )
+    obs[-3] = snapshot.current_turn / 50.0
+    obs[-2] = snapshot.turn_phase / 0x80
+    obs[-1] = len([e for e in snapshot.enemies if e.is_alive]) / MAX_UNITS
+    return obs
+
+class SimulatorBackend:
+    """Runs episodes on the Python simulator (agent/simulation.py)"""
+
+    def __init__(self, snapshot: TurnSnapshot):
+        self.initial_snapshot = snapshot
+
+    def reset(self) -> TurnSnapshot:
+        return copy.deepcopy(self.initial_snapshot)
+
+    def legal_actions(self, snapshot: TurnSnapshot) -> List[Action]:
+        return ActionGenerator(snapshot).generate_all_actions()
+
+    def execute(self, snapshot: TurnSnapshot, action: Action) -> TurnSnapshot:
+        new_snapshot, _ = simulate_action(snapshot, action)
+        return new_snapshot
+
+    def end_phase(self, snapshot: TurnSnapshot) -> TurnSnapshot:
+        """Skip the (unsimulated) enemy phase and start the next player phase"""
+        new_snapshot = copy.deepcopy(snapshot)
+        for unit in new_snapshot.units:
+            if unit.is_alive:
+                unit.turn_status = 0x00
+        new_snapshot.current_turn += 1
+        return new_snapshot
+
+class BizHawkBackend:
+    """Runs episodes in BizHawk through the trial_run_agent input helpers"""
+
+    def __init__(self):
+        # Imported lazily: these pull in keyboard/window control, which the simulator never needs
+        import trial_run_agent
+        self.bridge = trial_run_agent
+        self.cursor_pos = None
+
+    def reset(self) -> TurnSnapshot:
+        self.bridge.press_reset()
+        time.sleep(0.5)
+        snapshot = TurnSnapshot.from_files(self.bridge.STATE_FILE, self.bridge.MAP_FILE)
+        if snapshot.phase_text != 'Player':
+            snapshot = self.bridge.wait_for_state_update(snapshot)
+        self.cursor_pos = snapshot.cursor_position
+        return snapshot
+
+    def legal_actions(self, snapshot: TurnSnapshot) -> List[Action]:
+        generator = ActionGenerator(snapshot)
+        actions = []
+        for unit in snapshot.get_available_units():
+            if unit.has_acted or not unit.can_act:
+                continue
+            self.cursor_pos, unit_actions = self.bridge.probe_unit_actions(generator, unit, snapshot, self.cursor_pos)
+            actions.extend(unit_actions)
+        return actions
+
+    def execute(self, snapshot: TurnSnapshot, action: Action) -> TurnSnapshot:
+        self.cursor_pos, new_snapshot = self.bridge.execute_action_in_bizhawk(action, self.cursor_pos, snapshot)
+        return new_snapshot
+
+    def end_phase(self, snapshot: TurnSnapshot) -> TurnSnapshot:
+        self.cursor_pos = self.bridge.end_turn_in_bizhawk(self.cursor_pos, snapshot)
+        return self.bridge.wait_for_state_update(snapshot)
+
+class EmblemMindEnv:
+    """Gym-style environment over a simulator or BizHawk backend.
+
+    Actions are indices into the current list of legal actions, padded to
+    MAX_ACTIONS; action_mask() marks which indices are valid. Alternatively
+    macro_masks()/step_macro() expose the fixed per-unit MacroActionSpace.
+    When no unit can act the backend ends the phase automatically.
+    """
+
+    def __init__(self, backend, max_steps: int = 200):
+        self.backend = backend
+        self.max_steps = max_steps
+        self.snapshot = None
+        self.actions: List[Action] = []
+        self.steps = 0
+        self._macro_space: Optional[MacroActionSpace] = None
+
+    def reset(self) -> np.ndarray:
+        self.snapshot = self.backend.reset()
+        self.steps = 0
+        self._refresh_actions()
+        return self.observation()
+
+    def observation(self) -> np.ndarray:
+        return encode_observation(self.snapshot)
+
+    def action_mask(self) -> np.ndarray:
+        mask = np.zeros(MAX_ACTIONS, dtype=bool)
+        mask[:len(self.actions)] = True
+        return mask
+
+    def macro_space(self) -> MacroActionSpace:
+        if self._macro_space is None or self._macro_space.snapshot is not self.snapshot:
+            self._macro_space = MacroActionSpace(self.snapshot, max_targets=MAX_UNITS)
+        return self._macro_space
+
+    def macro_masks(self) -> np.ndarray:
+        """(player units, macro_space().size) legal macro-action masks"""
+        return self.macro_space().masks()
+
+    def step(self, action_index: int) -> Tuple[np.ndarray, float, bool, Dict]:
+        if not 0 <= action_index < len(self.actions):
+            raise ValueError(f"Action {action_index} is masked out ({len(self.actions)} legal actions)")
+        return self._step_action(self.actions[action_index])
+
+    def step_macro(self, unit_slot: int, code: int) -> Tuple[np.ndarray, float, bool, Dict]:
+        space = self.macro_space()
+        if not 0 <= unit_slot < len(self.snapshot.units) or not 0 <= code < space.size \
+                or not space.mask(unit_slot)[code]:
+            raise ValueError(f"Macro action {code} of unit slot {unit_slot} is masked out")
+        return self._step_action(space.to_action(space.decode(unit_slot, code)))
+
+    def _step_action(self, action: Action) -> Tuple[np.ndarray, float, bool, Dict]:
+        prev_snapshot = self.snapshot
+        self.snapshot = self.backend.execute(prev_snapshot, action)
+        self.steps += 1
+        beaten = is_level_beaten(self.snapshot)
+        dead = is_player_dead(self.snapshot)
+        reward = compute_reward(prev_snapshot, self.snapshot, action, level_beaten=beaten, player_dead=dead)
+        done = beaten or dead or self.steps >= self.max_steps
+        if not done:
+            self._refresh_actions()
+            done = not self.actions
+        info = {
+            'action': f"{action.unit.name} {action.action_type} {action.target_position}",
+            'level_beaten': beaten,
+            'player_dead': dead,
+            'turn': self.snapshot.current_turn
+        }
+        return self.observation(), float(reward), done, info
+
+    def _refresh_actions(self):
+        self.actions = self.backend.legal_actions(self.snapshot)[:MAX_ACTIONS]
+        if not self.actions:
+            self.snapshot = self.backend.end_phase(self.snapshot)
+            self.actions = self.backend.legal_actions(self.snapshot)[:MAX_ACTIONS]
+
+def _env_worker(remote, parent_remote, env_fn: Callable[[], EmblemMindEnv], index: int,
+                num_envs: int, obs_name: str, mask_name: str):
+    """Subprocess loop: step one environment and write results into shared memory"""
+    parent_remote.close()
+    obs_shm = shared_memory.SharedMemory(name=obs_name)
+    mask_shm = shared_memory.SharedMemory(name=mask_name)
+    obs_buf = np.ndarray((num_envs, OBSERVATION_SIZE), dtype=np.float32, buffer=obs_shm.buf)
+    mask_buf = np.ndarray((num_envs, MAX_ACTIONS), dtype=bool, buffer=mask_shm.buf)
+    env = env_fn()
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == 'reset':
+                obs_buf[index] = env.reset()
+                mask_buf[index] = env.action_mask()
+                remote.send(None)
+            elif cmd == 'step':
+                obs, reward, done, info = env.step(data)
+                if done:
+                    info['terminal_observation'] = obs
+                    obs = env.reset()
+                obs_buf[index] = obs
+                mask_buf[index] = env.action_mask()
+                remote.send((reward, done, info))
+            elif cmd == 'close':
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        del obs_buf, mask_buf
+        obs_shm.close()
+        mask_shm.close()
+        remote.close()
+
+class SubprocVectorEnv:
+    """Runs K environments in worker processes with shared-memory observations.
+
+    Workers write observations and action masks straight into shared
+    buffers, so only rewards, done flags and small info dicts cross the
+    pipes. env_fns must be picklable (module-level functions) so they work
+    with the spawn start method.
+    """
+
+    def __init__(self, env_fns: List[Callable[[], EmblemMindEnv]], start_method: Optional[str] = None):
+        self.num_envs = len(env_fns)
+        ctx = get_context(start_method)
+        self._obs_shm = shared_memory.SharedMemory(create=True, size=self.num_envs * OBSERVATION_SIZE * 4)
+        self._mask_shm = shared_memory.SharedMemory(create=True, size=self.num_envs * MAX_ACTIONS)
+        self.observations = np.ndarray((self.num_envs, OBSERVATION_SIZE), dtype=np.float32, buffer=self._obs_shm.buf)
+        self.action_masks = np.ndarray((self.num_envs, MAX_ACTIONS), dtype=bool, buffer=self._mask_shm.buf)
+        self.remotes, self.processes = [], []
+        for index, env_fn in enumerate(env_fns):
+            remote, work_remote = ctx.Pipe()
+            process = ctx.Process(
+                target=_env_worker,
+                args=(work_remote, remote, env_fn, index, self.num_envs, self._obs_shm.name, self._mask_shm.name),
+                daemon=True
+            )
+            process.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+        self.closed = False
+
+    def reset(self) -> np.ndarray:
+        for remote in self.remotes:
+            remote.send(('reset', None))
+        for remote in self.remotes:
+            remote.recv()
+        return self.observations.copy()
+
+    def step_async(self, actions):
+        for remote, action in zip(self.remotes, actions):
+            remote.send(('step', int(action)))
+
+    def step_wait(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Dict]]:
+        results = [remote.recv() for remote in self.remotes]
+        rewards, dones, infos = zip(*results)
+        return (self.observations.copy(), np.array(rewards, dtype=np.float32),
+                np.array(dones, dtype=bool), list(infos))
+
+    def step(self, actions):
+        """Step every environment; finished environments are reset automatically"""
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+        for remote in self.remotes:
+            try:
+                remote.send(('close', None))
+            except (BrokenPipeError, EOFError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+        del self.observations, self.action_masks
+        self._obs_shm.close()
+        self._obs_shm.unlink()
+        self._mask_shm.close()
+        self._mask_shm.unlink()
+        self.closed = True
@@ -0,0 +1,127 @@
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from emblemmind_snapshot import TurnSnapshot, Unit
+
+class ForecastCache:
+    """Two-tier cache of combat forecasts (battle structs) keyed by matchup.
+
+    The in-memory tier is an LRU of the most recently used forecasts. Every
+    forecast is also written through to a sqlite database so later runs (and
+    other processes probing the same chapter) can reuse it without touching
+    the emulator.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, timeout=10.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS forecasts (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(attacker: Unit, item_id: Optional[int], defender: Unit,
+                 snapshot: TurnSnapshot, attack_tile: Tuple[int, int]) -> tuple:
+        """Build the canonical key for a forecast.
+
+        Everything the game uses to compute the battle struct goes in: both
+        units' class, level, HP and stats, the attacker's weapon and its
+        uses (the equipped weapon when item_id is None), the defender's
+        counter weapon and uses, and the terrain both units stand on.
+        Positions themselves are left out so identical matchups on identical
+        terrain share one entry; get() rewrites them on the way out.
+        """
+        def unit_part(unit: Unit) -> tuple:
+            return (unit.class_id, unit.level, tuple(unit.hp), tuple(int(s) for s in unit.stats))
+
+        if item_id is None:
+            attacker_weapon = next(((i, uses) for i, uses in attacker.items if uses > 0), (-1, 0))
+        else:
+            attacker_weapon = (item_id, next((uses for i, uses in attacker.items if i == item_id and uses > 0), 0))
+        defender_weapon = next(((i, uses) for i, uses in defender.items if uses > 0), (0, 0))
+        attack_terrain = snapshot.map.get_terrain_at(attack_tile[0], attack_tile[1])
+        defend_terrain = snapshot.map.get_terrain_at(defender.position[0], defender.position[1])
+        distance = abs(attack_tile[0] - defender.position[0]) + abs(attack_tile[1] - defender.position[1])
+        return (
+            unit_part(attacker), item_id is None, attacker_weapon,
+            unit_part(defender), defender_weapon,
+            attack_terrain, defend_terrain, distance
+        )
+
+    def get(self, key: tuple, position: Optional[Tuple[int, int]] = None) -> Optional[Dict]:
+        """Look up a forecast, promoting disk hits into the memory tier.
+
+        The key leaves positions out, so the stored struct carries the x/y
+        of whichever probe filled it; pass the attack tile as position to
+        get a copy with x/y set to it.
+        """
+        battle_struct = None
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            battle_struct = self._memory[key]
+        elif self._conn is not None:
+            row = self._conn.execute(
+                "SELECT value FROM forecasts WHERE key = ?", (self._encode_key(key),)
+            ).fetchone()
+            if row is not None:
+                battle_struct = json.loads(row[0])
+                self._remember(key, battle_struct)
+                self.disk_hits += 1
+        if battle_struct is None:
+            self.misses += 1
+            return None
+        if position is not None:
+            battle_struct = dict(battle_struct, x=position[0], y=position[1])
+        return battle_struct
+
+    def put(self, key: tuple, battle_struct: Dict):
+        """Store a forecast in both tiers"""
+        if battle_struct is None:
+            return
+        self._remember(key, battle_struct)
+        if self._conn is not None:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO forecasts (key, value) VALUES (?, ?)",
+                (self._encode_key(key), json.dumps(battle_struct))
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters"""
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'memory_entries': len(self._memory)
+        }
+
+    def close(self):
+        """Close the on-disk tier"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _remember(self, key: tuple, battle_struct: Dict):
+        self._memory[key] = battle_struct
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _encode_key(key: tuple) -> str:
+        return json.dumps(key, separators=(',', ':'))
@@ -0,0 +1,203 @@
+import copy
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from emblemmind_snapshot import TurnSnapshot, Unit
+from agent.action_generator import Action
+from agent.distance_fields import distance_field, path_table_for
+from agent.state_evaluator import StateEvaluator
+from agent.tile_features import terrain_planes
+from utils.fe_data_mappings import ITEM_ATTACK_RANGES
+
+class IncrementalEvaluator:
+    """StateEvaluator.evaluate_state maintained as a sum of cached per-unit terms.
+
+    Each living ally contributes its health term plus 5 / (movement cost
+    to the nearest visible enemy); each visible enemy its health penalty
+    minus 5 / (cost to the nearest ally). The nearest-source distance is
+    the min over single-source distances, which is exactly what the
+    multi-source fields in agent/distance_fields.py compute, and each term
+    remembers which unit was nearest. Single-source distances are read
+    from the registered PathTable (agent/path_tables.py) when there is
+    one, else from a per-tile Dijkstra field. delta() and apply() then only
+    recompute the acting unit, its target, and units whose nearest unit
+    was one of them (or that the mover now comes closer to).
+
+    Actions resolve exactly as agent/simulation.py simulate_action does
+    (an attack first moves the unit to target_position), so after apply()
+    the value matches StateEvaluator(evaluator.snapshot).evaluate_state();
+    check() asserts it.
+    """
+
+    def __init__(self, snapshot: TurnSnapshot, copy_snapshot: bool = True):
+        self.snapshot = copy.deepcopy(snapshot) if copy_snapshot else snapshot
+        self.terrain = terrain_planes(self.snapshot.map)
+        self._rows: Dict[Tuple[str, Tuple[int, int]], List[float]] = {}
+        # Class (and so movement type) never changes mid-phase; Unit.movement_type is a table lookup
+        self._move_types: Dict[int, str] = {id(u): u.movement_type for u in self.snapshot.units + self.snapshot.enemies}
+        self.ally_terms: List[float] = []
+        self.ally_nearest: List[Optional[int]] = []
+        self.enemy_terms: List[float] = []
+        self.enemy_nearest: List[Optional[int]] = []
+        for slot in range(len(self.snapshot.units)):
+            term, nearest = self._ally_term(slot)
+            self.ally_terms.append(term)
+            self.ally_nearest.append(nearest)
+        for slot in range(len(self.snapshot.enemies)):
+            term, nearest = self._enemy_term(slot)
+            self.enemy_terms.append(term)
+            self.enemy_nearest.append(nearest)
+        self.value = sum(self.ally_terms) + sum(self.enemy_terms)
+
+    def _row(self, move_type: str, position: Tuple[int, int]) -> List[float]:
+        """Flat costs from position to every tile: a PathTable row when registered, else one Dijkstra run"""
+        key = (move_type, position)
+        if key not in self._rows:
+            table = path_table_for(self.snapshot.map, move_type)
+            if table is not None and 0 <= position[0] < table.width and 0 <= position[1] < table.height:
+                row = np.asarray(table.field(position), dtype=np.float32)
+                row[np.asarray(table.field(position)) == table.unreachable] = np.inf
+            else:
+                row = distance_field(self.terrain.movement_cost(move_type), [position])
+            self._rows[key] = row.ravel().tolist()
+        return self._rows[key]
+
+    def _distance_to(self, unit: Unit, position: Tuple[int, int]) -> float:
+        x, y = unit.position
+        if not (0 <= x < self.terrain.width and 0 <= y < self.terrain.height):
+            return float('inf')
+        move_type = self._move_types.get(id(unit)) or unit.movement_type
+        return self._row(move_type, position)[y * self.terrain.width + x]
+
+    def _nearest(self, unit: Unit, sources: List[Tuple[int, Tuple[int, int]]]) -> Tuple[float, Optional[int]]:
+        """(distance, slot of the nearest source); slot is None when the Manhattan fallback applied"""
+        if not sources:
+            return 0, None
+        best, best_slot = float('inf'), None
+        for slot, position in sources:
+            distance = self._distance_to(unit, position)
+            if distance < best:
+                best, best_slot = distance, slot
+        if best == float('inf'):
+            # Same fallback as DistanceFields: cut off by terrain or off the map
+            x, y = unit.position
+            return min(abs(x - sx) + abs(y - sy) for _, (sx, sy) in sources), None
+        return best, best_slot
+
+    def _enemy_sources(self) -> List[Tuple[int, Tuple[int, int]]]:
+        return [(slot, e.position) for slot, e in enumerate(self.snapshot.enemies) if e.is_alive and e.is_visible]
+
+    def _ally_sources(self) -> List[Tuple[int, Tuple[int, int]]]:
+        return [(slot, u.position) for slot, u in enumerate(self.snapshot.units) if u.is_alive]
+
+    def _ally_term(self, slot: int, sources=None) -> Tuple[float, Optional[int]]:
+        unit = self.snapshot.units[slot]
+        if not unit.is_alive:
+            return 0.0, None
+        distance, nearest = self._nearest(unit, self._enemy_sources() if sources is None else sources)
+        term = unit.hp[0] / unit.hp[1] * 10
+        if distance > 0:
+            term += 5 / distance
+        return term, nearest
+
+    def _enemy_term(self, slot: int, sources=None) -> Tuple[float, Optional[int]]:
+        enemy = self.snapshot.enemies[slot]
+        if not (enemy.is_visible and enemy.is_alive):
+            return 0.0, None
+        distance, nearest = self._nearest(enemy, self._ally_sources() if sources is None else sources)
+        term = -(1 - enemy.hp[0] / enemy.hp[1]) * 10
+        if distance > 0:
+            term -= 5 / distance
+        return term, nearest
+
+    def _effects(self, action: Action) -> Tuple[Optional[int], Optional[Tuple[int, int]], Optional[int], Optional[int]]:
+        """(ally slot, new position, enemy slot, new HP) as simulate_action would resolve the action"""
+        ally_slot = next((i for i, u in enumerate(self.snapshot.units) if u.id == action.unit.id), None)
+        if ally_slot is None:
+            return None, None, None, None
+        new_position = tuple(action.target_position)
+        if action.action_type != 'attack':
+            return ally_slot, new_position, None, None
+        if action.target_unit is None:
+            return None, None, None, None
+        # Generic enemies share IDs, so the target is the enemy with its ID on its tile
+        target_key = (action.target_unit.id, tuple(action.target_unit.position))
+        enemy_slot = next((i for i, e in enumerate(self.snapshot.enemies) if (e.id, tuple(e.position)) == target_key), None)
+        if enemy_slot is None:
+            return None, None, None, None
+        attacker, target = self.snapshot.units[ally_slot], self.snapshot.enemies[enemy_slot]
+        if action.item_id not in ITEM_ATTACK_RANGES:
+            return ally_slot, new_position, None, None
+        # The attacker walks to target_position and strikes from there
+        min_range, max_range = ITEM_ATTACK_RANGES[action.item_id]
+        dist = abs(target.position[0] - new_position[0]) + abs(target.position[1] - new_position[1])
+        if not min_range <= dist <= max_range:
+            return ally_slot, new_position, None, None
+        attacker_str = attacker.stats[0] if len(attacker.stats) > 0 else 0
+        defender_def = target.stats[4] if len(target.stats) > 4 else 0
+        return ally_slot, new_position, enemy_slot, max(0, target.hp[0] - max(0, attacker_str - defender_def))
+
+    def _resolve(self, action: Action, commit: bool) -> float:
+        ally_slot, new_position, enemy_slot, new_hp = self._effects(action)
+        if ally_slot is None and enemy_slot is None:
+            return 0.0
+        units, enemies = self.snapshot.units, self.snapshot.enemies
+        old_position = units[ally_slot].position if ally_slot is not None else None
+        old_hp = enemies[enemy_slot].hp if enemy_slot is not None else None
+        if ally_slot is not None:
+            units[ally_slot].position = new_position
+        if enemy_slot is not None:
+            enemies[enemy_slot].hp = (new_hp, old_hp[1])
+
+        new_terms: Dict[Tuple[str, int], Tuple[float, Optional[int]]] = {}
+        enemy_sources = self._enemy_sources()
+        ally_sources = self._ally_sources()
+        target_died = enemy_slot is not None and old_hp[0] > 0 and new_hp == 0
+        for slot in range(len(units)):
+            nearest = self.ally_nearest[slot]
+            if slot == ally_slot or (target_died and (nearest == enemy_slot or nearest is None)):
+                new_terms[('ally', slot)] = self._ally_term(slot, enemy_sources)
+        for slot in range(len(enemies)):
+            enemy = enemies[slot]
+            if slot == enemy_slot:
+                new_terms[('enemy', slot)] = self._enemy_term(slot, ally_sources)
+            elif ally_slot is not None and enemy.is_visible and enemy.is_alive:
+                nearest = self.enemy_nearest[slot]
+                if nearest is None or nearest == ally_slot:
+                    new_terms[('enemy', slot)] = self._enemy_term(slot, ally_sources)
+                elif self._distance_to(enemy, new_position) < self._distance_to(enemy, units[nearest].position):
+                    new_terms[('enemy', slot)] = self._enemy_term(slot, ally_sources)
+
+        delta = 0.0
+        for (side, slot), (term, nearest) in new_terms.items():
+            terms, nearests = (self.ally_terms, self.ally_nearest) if side == 'ally' else (self.enemy_terms, self.enemy_nearest)
+            delta += term - terms[slot]
+            if commit:
+                terms[slot], nearests[slot] = term, nearest
+
+        if commit:
+            if ally_slot is not None:
+                units[ally_slot].turn_status = 0x42  # Mark as acted, as simulate_action does
+            self.value += delta
+        else:
+            if ally_slot is not None:
+                units[ally_slot].position = old_position
+            if enemy_slot is not None:
+                enemies[enemy_slot].hp = old_hp
+        return delta
+
+    def delta(self, action: Action) -> float:
+        """Change in evaluate_state the action would cause, without applying it"""
+        return self._resolve(action, commit=False)
+
+    def apply(self, action: Action) -> float:
+        """Apply the action to the evaluator's snapshot and return the change in value"""
+        return self._resolve(action, commit=True)
+
+    def full_value(self) -> float:
+        """evaluate_state recomputed from scratch on the current snapshot"""
+        return StateEvaluator(self.snapshot).evaluate_state()
+
+    def check(self, tolerance: float = 1e-6) -> bool:
+        """Does the incremental value still match a full evaluation?"""
+        return abs(self.value - self.full_value()) <= tolerance
+
@@ -0,0 +1,339 @@
+import heapq
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+from emblemmind_snapshot import TurnSnapshot, Unit
+from agent.tile_features import terrain_planes, unit_max_range
+from agent.distance_fields import distance_field, path_table_for
+from utils.terrain_data import IMPASSABLE
+
+INF = float('inf')
+
+class IncrementalDistanceField:
+    """Multi-source distance field that repairs itself after local changes.
+
+    Same costs as distance_field (entering a tile costs its movement cost),
+    plus a set of blocked tiles (e.g. occupied by units that cannot be
+    passed). Each tile remembers its parent in the shortest-path forest, so:
+
+    - adding a source or unblocking a tile only relaxes outward from it;
+    - removing a source or blocking a tile only resets the subtree hanging
+      off it, reseeds that subtree from its untouched boundary and reruns
+      Dijkstra inside it.
+
+    last_updated counts the tiles touched by the last change. from_field()
+    seeds the distances from an already computed field (e.g. a PathTable's
+    nearest_field) instead of running Dijkstra.
+    """
+
+    def __init__(self, cost: np.ndarray, sources: Iterable[Tuple[int, int]] = (),
+                 blocked: Iterable[Tuple[int, int]] = (), seed: Optional[np.ndarray] = None):
+        self.height, self.width = cost.shape
+        size = self.height * self.width
+        self._cost = cost.ravel().tolist()
+        self._neighbours: List[List[int]] = []
+        for i in range(size):
+            x, y = i % self.width, i // self.width
+            self._neighbours.append([ny * self.width + nx for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1))
+                                     if 0 <= nx < self.width and 0 <= ny < self.height])
+        self.dist = [INF] * size
+        self.parent = [-1] * size
+        self._children = [set() for _ in range(size)]
+        self.sources = set()
+        self.blocked = {self._index(pos) for pos in blocked if self._in_bounds(pos)}
+        self.last_updated = 0
+        heap = []
+        for pos in sources:
+            if self._in_bounds(pos):
+                i = self._index(pos)
+                self.sources.add(i)
+                self.dist[i] = 0
+                heap.append((0, i))
+        if seed is None:
+            self.last_updated = self._propagate(heap)
+        else:
+            self._adopt(seed)
+
+    @classmethod
+    def from_field(cls, cost: np.ndarray, field: np.ndarray, sources: Iterable[Tuple[int, int]],
+                   blocked: Iterable[Tuple[int, int]] = ()) -> 'IncrementalDistanceField':
+        """Wrap a distance_field-equal (H, W) field over these sources so it can be repaired"""
+        return cls(cost, sources, blocked, seed=field)
+
+    def _adopt(self, field: np.ndarray):
+        """Take distances from a finished field; each tile's parent is a neighbour it is reached through"""
+        dist = self.dist
+        for i, d in enumerate(field.ravel().tolist()):
+            if i not in self.sources:
+                dist[i] = d
+        for i in range(len(dist)):
+            if i in self.sources or dist[i] == INF:
+                continue
+            step = self._step(i)
+            # Every step costs at least 1, so parents are strictly nearer and the forest has no cycles
+            parent = next((n for n in self._neighbours[i] if dist[n] + step == dist[i]), -1)
+            self._set_parent(i, parent)
+
+    def _in_bounds(self, position: Tuple[int, int]) -> bool:
+        return 0 <= position[0] < self.width and 0 <= position[1] < self.height
+
+    def _index(self, position: Tuple[int, int]) -> int:
+        return position[1] * self.width + position[0]
+
+    def _step(self, i: int) -> float:
+        """Cost of entering tile i"""
+        cost = self._cost[i]
+        return INF if cost >= IMPASSABLE or i in self.blocked else cost
+
+    def _set_parent(self, i: int, parent: int):
+        old = self.parent[i]
+        if old >= 0:
+            self._children[old].discard(i)
+        self.parent[i] = parent
+        if parent >= 0:
+            self._children[parent].add(i)
+
+    def _propagate(self, heap: List[Tuple[float, int]]) -> int:
+        heapq.heapify(heap)
+        settled = 0
+        dist = self.dist
+        while heap:
+            d, i = heapq.heappop(heap)
+            if d > dist[i]:
+                continue
+            settled += 1
+            for n in self._neighbours[i]:
+                nd = d + self._step(n)
+                if nd < dist[n]:
+                    dist[n] = nd
+                    self._set_parent(n, i)
+                    heapq.heappush(heap, (nd, n))
+        return settled
+
+    def _invalidate(self, root: int):
+        """Reset the shortest-path subtree under root and recompute it from its boundary"""
+        affected = [root]
+        stack = [root]
+        while stack:
+            for child in self._children[stack.pop()]:
+                affected.append(child)
+                stack.append(child)
+        affected_set = set(affected)
+        for i in affected:
+            self.dist[i] = INF
+            self._set_parent(i, -1)
+        heap = []
+        for i in affected:
+            if i in self.sources:
+                self.dist[i] = 0
+                heap.append((0, i))
+                continue
+            step = self._step(i)
+            if step == INF:
+                continue
+            for n in self._neighbours[i]:
+                if n not in affected_set and self.dist[n] + step < self.dist[i]:
+                    self.dist[i] = self.dist[n] + step
+                    self._set_parent(i, n)
+            if self.dist[i] < INF:
+                heap.append((self.dist[i], i))
+        self.last_updated = len(affected) + self._propagate(heap)
+
+    def add_source(self, position: Tuple[int, int]):
+        if not self._in_bounds(position):
+            return
+        i = self._index(position)
+        self.sources.add(i)
+        if self.dist[i] > 0:
+            self.dist[i] = 0
+            self._set_parent(i, -1)
+            self.last_updated = self._propagate([(0, i)])
+
+    def remove_source(self, position: Tuple[int, int]):
+        if not self._in_bounds(position):
+            return
+        i = self._index(position)
+        if i in self.sources:
+            self.sources.discard(i)
+            self._invalidate(i)
+
+    def move_source(self, old: Tuple[int, int], new: Tuple[int, int]):
+        self.remove_source(old)
+        self.add_source(new)
+
+    def set_blocked(self, position: Tuple[int, int], blocked: bool = True):
+        """Block or free a tile (sources still count as reached even when blocked)"""
+        if not self._in_bounds(position):
+            return
+        i = self._index(position)
+        if blocked and i not in self.blocked:
+            self.blocked.add(i)
+            if i not in self.sources:
+                self._invalidate(i)
+        elif not blocked and i in self.blocked:
+            self.blocked.discard(i)
+            step = self._step(i)
+            best, parent = self.dist[i], self.parent[i]
+            for n in self._neighbours[i]:
+                if self.dist[n] + step < best:
+                    best, parent = self.dist[n] + step, n
+            if best < self.dist[i]:
+                self.dist[i] = best
+                self._set_parent(i, parent)
+                self.last_updated = self._propagate([(best, i)])
+
+    def at(self, position: Tuple[int, int]) -> float:
+        return self.dist[self._index(position)] if self._in_bounds(position) else INF
+
+    @property
+    def field(self) -> np.ndarray:
+        """(H, W) float32 copy of the distances (inf where unreachable)"""
+        return np.array(self.dist, dtype=np.float32).reshape(self.height, self.width)
+
+def _dilate(mask: np.ndarray, steps: int) -> np.ndarray:
+    """Grow a mask by `steps` tiles in Manhattan distance"""
+    grown = mask.copy()
+    for _ in range(steps):
+        shifted = grown.copy()
+        shifted[1:, :] |= grown[:-1, :]
+        shifted[:-1, :] |= grown[1:, :]
+        shifted[:, 1:] |= grown[:, :-1]
+        shifted[:, :-1] |= grown[:, 1:]
+        grown = shifted
+    return grown
+
+class IncrementalThreatMap:
+    """Per-tile count of enemies that can move and strike it, kept up to date per action.
+
+    Each visible enemy's reach is its terrain movement range (player units
+    block it) grown by its longest weapon range. When a player unit moves
+    or dies, only enemies whose movement area touches the changed tiles are
+    recomputed; a killed enemy just has its mask subtracted.
+    """
+
+    def __init__(self, snapshot: TurnSnapshot):
+        self.terrain = terrain_planes(snapshot.map)
+        self.allies = {u.position for u in snapshot.units if u.is_alive}
+        # Keyed by slot in snapshot.enemies: generic enemies share character IDs
+        self.enemies: Dict[int, Unit] = {slot: e for slot, e in enumerate(snapshot.enemies) if e.is_alive and e.is_visible}
+        self.positions: Dict[int, Tuple[int, int]] = {slot: e.position for slot, e in self.enemies.items()}
+        self.move_masks: Dict[int, np.ndarray] = {}
+        self.reach_masks: Dict[int, np.ndarray] = {}
+        self.count = np.zeros((self.terrain.height, self.terrain.width), dtype=np.int16)
+        self.last_recomputed = 0
+        for slot in self.enemies:
+            self._compute(slot)
+
+    def _compute(self, slot: int):
+        enemy = self.enemies[slot]
+        cost = self.terrain.movement_cost(enemy.movement_type).copy()
+        for x, y in self.allies:
+            if 0 <= x < self.terrain.width and 0 <= y < self.terrain.height:
+                cost[y, x] = IMPASSABLE
+        move_mask = distance_field(cost, [self.positions[slot]]) <= enemy.movement_range
+        reach_mask = _dilate(move_mask, unit_max_range(enemy))
+        if slot in self.reach_masks:
+            self.count -= self.reach_masks[slot]
+        self.move_masks[slot] = move_mask
+        self.reach_masks[slot] = reach_mask
+        self.count += reach_mask
+
+    def _touches(self, slot: int, positions: Iterable[Tuple[int, int]]) -> bool:
+        """Could a change at these tiles alter this enemy's movement area?"""
+        mask = self.move_masks[slot]
+        for x, y in positions:
+            for nx, ny in ((x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if 0 <= nx < self.terrain.width and 0 <= ny < self.terrain.height and mask[ny, nx]:
+                    return True
+        return False
+
+    def _refresh(self, positions: Iterable[Tuple[int, int]]):
+        positions = list(positions)
+        affected = [slot for slot in self.enemies if self._touches(slot, positions)]
+        for slot in affected:
+            self._compute(slot)
+        self.last_recomputed = len(affected)
+
+    def move_ally(self, old: Tuple[int, int], new: Tuple[int, int]):
+        if old == new:
+            return
+        self.allies.discard(old)
+        self.allies.add(new)
+        self._refresh([old, new])
+
+    def remove_ally(self, position: Tuple[int, int]):
+        self.allies.discard(position)
+        self._refresh([position])
+
+    def slot_of(self, enemy: Unit) -> int:
+        """Slot of a tracked enemy by its current tile (-1 if not tracked)"""
+        return next((slot for slot, position in self.positions.items()
+                     if position == enemy.position and self.enemies[slot].id == enemy.id), -1)
+
+    def move_enemy(self, slot: int, position: Tuple[int, int]):
+        if slot in self.enemies:
+            self.positions[slot] = position
+            self._compute(slot)
+            self.last_recomputed = 1
+
+    def remove_enemy(self, slot: int):
+        if slot in self.enemies:
+            self.count -= self.reach_masks.pop(slot)
+            del self.move_masks[slot], self.enemies[slot], self.positions[slot]
+            self.last_recomputed = 0
+
+    def threatened_by(self, position: Tuple[int, int]) -> int:
+        x, y = position
+        if 0 <= x < self.terrain.width and 0 <= y < self.terrain.height:
+            return int(self.count[y, x])
+        return 0
+
+class PhaseDistanceFields:
+    """Distance-to-nearest-enemy fields for one player phase, one per movement type.
+
+    Each field is built on first use, seeded from the PathTable's
+    nearest_field when one is registered for the map and movement type
+    (see agent/path_tables.py) and by Dijkstra otherwise. When an enemy
+    dies the field is repaired in place instead of rebuilt, and every
+    query is a single lookup.
+    """
+
+    def __init__(self, snapshot: TurnSnapshot, enemies: Iterable[Unit]):
+        self.map = snapshot.map
+        self.terrain = terrain_planes(snapshot.map)
+        # Keyed by slot in snapshot.enemies: generic enemies share character IDs
+        tracked = list(enemies)
+        self.enemies: Dict[int, Tuple[int, int]] = {slot: e.position for slot, e in enumerate(snapshot.enemies)
+                                                    if any(e is t for t in tracked)}
+        self._units: Dict[int, Unit] = {slot: snapshot.enemies[slot] for slot in self.enemies}
+        self.fields: Dict[str, IncrementalDistanceField] = {}
+
+    def field(self, move_type: str) -> IncrementalDistanceField:
+        if move_type not in self.fields:
+            cost = self.terrain.movement_cost(move_type)
+            sources = list(self.enemies.values())
+            table = path_table_for(self.map, move_type)
+            if table is not None:
+                self.fields[move_type] = IncrementalDistanceField.from_field(cost, table.nearest_field(sources), sources)
+            else:
+                self.fields[move_type] = IncrementalDistanceField(cost, sources)
+        return self.fields[move_type]
+
+    def min_enemy_distance(self, move_type: str, position: Tuple[int, int]) -> float:
+        if not self.enemies:
+            return INF
+        return self.field(move_type).at(position)
+
+    def slot_of(self, enemy: Unit) -> int:
+        """Slot of a tracked enemy by its character ID and current tile (-1 if not tracked)"""
+        return next((slot for slot, position in self.enemies.items()
+                     if position == enemy.position and self._units[slot].id == enemy.id), -1)
+
+    def remove_enemy(self, slot: int):
+        """Drop one enemy; its tile stays a source while another tracked enemy stands there"""
+        position = self.enemies.pop(slot, None)
+        if position is None:
+            return
+        del self._units[slot]
+        if position not in self.enemies.values():
+            for field in self.fields.values():
+                field.remove_source(position)
@@ -0,0 +1,64 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass
+class InferenceConfig:
+    """How the torch action evaluator runs at inference time.
+
+    The agent shares its cores with several emulators, so the default is a
+    single intra-op thread rather than torch's one-per-core pool.
+    quantize swaps the Linear layers for dynamic int8 versions and freeze
+    traces the model into a frozen TorchScript graph; both can be combined.
+    """
+    num_threads: int = 1
+    num_interop_threads: Optional[int] = 1
+    quantize: bool = False
+    freeze: bool = False
+
+    @classmethod
+    def from_env(cls) -> 'InferenceConfig':
+        """Read EMBLEMMIND_THREADS / EMBLEMMIND_QUANTIZE / EMBLEMMIND_FREEZE"""
+        return cls(
+            num_threads=int(os.environ.get('EMBLEMMIND_THREADS', 1)),
+            num_interop_threads=int(os.environ.get('EMBLEMMIND_INTEROP_THREADS', 1)),
+            quantize=os.environ.get('EMBLEMMIND_QUANTIZE', '0') == '1',
+            freeze=os.environ.get('EMBLEMMIND_FREEZE', '0') == '1'
+        )
+
+    @property
+    def mode_name(self) -> str:
+        parts = ['int8' if self.quantize else 'fp32']
+        if self.freeze:
+            parts.append('frozen')
+        return '+'.join(parts) + f" x{self.num_threads}t"
+
+_interop_set = False
+
+def apply_thread_settings(config: InferenceConfig):
+    """Pin torch's thread pools; the inter-op pool can only be sized once per process"""
+    global _interop_set
+    import torch
+    torch.set_num_threads(config.num_threads)
+    if config.num_interop_threads and not _interop_set:
+        try:
+            torch.set_num_interop_threads(config.num_interop_threads)
+        except RuntimeError:
+            # Already started (e.g. something ran a parallel op first)
+            pass
+        _interop_set = True
+
+def build_inference_model(model, config: InferenceConfig, input_size: int):
+    """Return an eval-mode copy of `model` prepared according to `config`"""
+    import copy
+    import torch
+    import torch.nn as nn
+    apply_thread_settings(config)
+    inference_model = copy.deepcopy(model).eval()
+    if config.quantize:
+        inference_model = torch.ao.quantization.quantize_dynamic(inference_model, {nn.Linear}, dtype=torch.qint8)
+    if config.freeze:
+        with torch.no_grad():
+            traced = torch.jit.trace(inference_model, torch.zeros(1, input_size))
+        inference_model = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+    return inference_model
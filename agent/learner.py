@@ -0,0 +1,141 @@
+import os
+import queue
+import time
+import multiprocessing as mp
+from typing import Optional
+import numpy as np
+from agent.prioritized_replay import PrioritizedReplay
+from agent.replay_memory import ReplayMemory, encode_action
+
+END_OF_EPISODE = 'end_episode'
+
+def _drain(transition_queue, memory: PrioritizedReplay, max_items: int = 1024) -> int:
+    """Move queued transitions into the replay memory without blocking"""
+    received = 0
+    for _ in range(max_items):
+        try:
+            item = transition_queue.get_nowait()
+        except queue.Empty:
+            break
+        if item == END_OF_EPISODE:
+            memory.end_episode()
+            continue
+        features, action_code, reward, done, effective = item
+        memory.add(features, action_code, reward, done=done, effective=effective)
+        received += 1
+    return received
+
+def _publish(network, weights_path: str, version):
+    """Atomically replace the NumPy weights file, then bump the shared version"""
+    network.export_numpy_weights(weights_path)
+    with version.get_lock():
+        version.value += 1
+
+def _learner_main(transition_queue, version, stop_event, memory_dir: str, capacity: int,
+                  weights_path: str, batch_size: int, publish_every: int,
+                  updates_per_transition: int, init_checkpoint: Optional[str]):
+    """Learner process: fill the replay memory from the queue and train continuously"""
+    # torch is only needed here; the actor never pays for training
+    from agent.neural_network import NeuralNetworkInterface
+    memory = PrioritizedReplay(ReplayMemory(memory_dir, capacity))
+    network = NeuralNetworkInterface()
+    if init_checkpoint and os.path.exists(init_checkpoint):
+        try:
+            network.load_model(init_checkpoint)
+            print(f"[LEARNER] Loaded checkpoint {init_checkpoint}")
+        except Exception as e:
+            print(f"[LEARNER ERROR] Could not load {init_checkpoint}: {e}")
+    _publish(network, weights_path, version)
+
+    received = len(memory)
+    updates = 0
+    try:
+        while not stop_event.is_set():
+            received += _drain(transition_queue, memory)
+            # Cap the replay ratio so a small buffer isn't trained on endlessly
+            if len(memory) < batch_size or updates >= received * updates_per_transition:
+                time.sleep(0.05)
+                continue
+            batch = memory.sample(batch_size)
+            if batch is None:
+                time.sleep(0.05)
+                continue
+            loss, errors = network.train(batch['features'], batch['rewards'],
+                                         weights=batch['weights'], return_errors=True)
+            memory.update_priorities(batch['indices'], errors)
+            updates += 1
+            if updates % publish_every == 0:
+                _publish(network, weights_path, version)
+                memory.flush()
+                print(f"[LEARNER] {updates} updates, loss {loss:.4f}, published v{version.value}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _drain(transition_queue, memory, max_items=1 << 20)
+        memory.flush()
+        _publish(network, weights_path, version)
+        if init_checkpoint:
+            network.save_model(init_checkpoint)
+
+class AsyncLearner:
+    """Actor-side handle to a learner process.
+
+    Exposes the same add/end_episode/flush calls as PrioritizedReplay, but
+    transitions are queued to a separate process that owns the replay
+    memory and trains continuously. The learner publishes weights to a file
+    and bumps a shared version counter; sync() swaps them into the actor's
+    coordinator between phases when the version has moved. Weights are
+    published as a NumPy export, so the actor never needs torch. Neither
+    side ever waits on the other.
+    """
+
+    def __init__(self, memory_dir: str, capacity: int, weights_path: str,
+                 batch_size: int = 32, publish_every: int = 50,
+                 updates_per_transition: int = 4, init_checkpoint: Optional[str] = None):
+        ctx = mp.get_context('spawn')
+        self.weights_path = weights_path
+        self.queue = ctx.Queue()
+        self.version = ctx.Value('i', 0)
+        self.stop_event = ctx.Event()
+        self.loaded_version = 0
+        self.process = ctx.Process(
+            target=_learner_main,
+            args=(self.queue, self.version, self.stop_event, memory_dir, capacity,
+                  weights_path, batch_size, publish_every, updates_per_transition, init_checkpoint),
+            daemon=True
+        )
+
+    def start(self):
+        self.process.start()
+        print(f"[LEARNER] Started learner process (pid {self.process.pid})")
+
+    def add(self, features: np.ndarray, action, reward: float,
+            done: bool = False, effective: bool = True):
+        """Queue a transition for the learner (never blocks the actor)"""
+        self.queue.put((np.asarray(features, dtype=np.float32), encode_action(action),
+                        float(reward), done, effective))
+
+    def end_episode(self):
+        self.queue.put(END_OF_EPISODE)
+
+    def flush(self):
+        """The learner owns the replay memory and flushes it itself"""
+        pass
+
+    def sync(self, coordinator) -> bool:
+        """Load the newest published weights if they changed; returns True on swap"""
+        current = self.version.value
+        if current == self.loaded_version or not os.path.exists(self.weights_path):
+            return False
+        if not coordinator.load_numpy_weights(self.weights_path):
+            return False
+        self.loaded_version = current
+        print(f"[LEARNER] Swapped in weights v{current}")
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """Stop the learner after it drains the queue and publishes final weights"""
+        self.stop_event.set()
+        self.process.join(timeout=timeout)
+        if self.process.is_alive():
+            self.process.terminate()
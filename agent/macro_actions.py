@@ -0,0 +1,173 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from emblemmind_snapshot import TurnSnapshot, Unit
+from agent.action_generator import Action
+from agent.distance_fields import distance_field
+from agent.tile_features import manhattan_field, terrain_planes
+from utils.fe_data_mappings import ITEM_ATTACK_RANGES, get_item_name, get_weapon_type
+from utils.terrain_data import IMPASSABLE
+
+VERBS = ('wait', 'attack', 'item', 'rescue')
+ITEM_SLOTS = 5  # FE7 inventory size
+HEALING_NAMES = ("vulnerary", "elixir", "recover", "heal")
+
+@dataclass(frozen=True)
+class MacroAction:
+    """One whole unit turn: move to destination, then verb on target with the item in item_slot.
+
+    target is a slot in snapshot.enemies (attack) or snapshot.units
+    (rescue), item_slot an index into the unit's inventory; both are -1
+    when unused.
+    """
+    unit_slot: int
+    destination: Tuple[int, int]
+    verb: str
+    target: int = -1
+    item_slot: int = -1
+
+class MacroActionSpace:
+    """Flat, maskable action space over MacroActions for one snapshot.
+
+    Each unit's actions are numbered with a mixed-radix code
+    (tile, verb, target + 1, item_slot + 1), so the size per unit depends
+    only on the map dimensions and slot counts and stays fixed across the
+    turns of a chapter. Legality comes from the unit's reach (the game's
+    MOVEMENT_MAP when given, otherwise terrain Dijkstra with enemies
+    blocking) and the weapon ranges of its inventory, mirroring what
+    ActionGenerator would emit.
+    """
+
+    def __init__(self, snapshot: TurnSnapshot, max_targets: Optional[int] = None):
+        self.snapshot = snapshot
+        self.width = snapshot.map.width
+        self.height = snapshot.map.height
+        self.max_targets = max_targets or max(len(snapshot.units), len(snapshot.enemies), 1)
+        self.radix = (self.width * self.height, len(VERBS), self.max_targets + 1, ITEM_SLOTS + 1)
+        self.size = int(np.prod(self.radix))
+        self._legal: Dict[int, List[MacroAction]] = {}
+
+    def encode(self, macro: MacroAction) -> int:
+        """Index of a macro action within its unit's action space"""
+        x, y = macro.destination
+        code = y * self.width + x
+        for digit, base in ((VERBS.index(macro.verb), self.radix[1]),
+                            (macro.target + 1, self.radix[2]), (macro.item_slot + 1, self.radix[3])):
+            code = code * base + digit
+        return code
+
+    def decode(self, unit_slot: int, code: int) -> MacroAction:
+        code, item = divmod(code, self.radix[3])
+        code, target = divmod(code, self.radix[2])
+        tile, verb = divmod(code, self.radix[1])
+        return MacroAction(unit_slot, (tile % self.width, tile // self.width), VERBS[verb], target - 1, item - 1)
+
+    def reach(self, unit: Unit, movement_map: Optional[List[List[int]]] = None) -> np.ndarray:
+        """(H, W) tiles the unit can end its move on"""
+        occupied = np.zeros((self.height, self.width), dtype=bool)
+        for other in self.snapshot.units + self.snapshot.enemies:
+            x, y = other.position
+            if other is not unit and other.is_alive and 0 <= x < self.width and 0 <= y < self.height:
+                occupied[y, x] = True
+        if movement_map:
+            grid = np.full((self.height, self.width), 0xFF, dtype=np.int32)
+            rows = np.array(movement_map, dtype=np.int32)[:self.height, :self.width]
+            grid[:rows.shape[0], :rows.shape[1]] = rows
+            reach = grid != 0xFF
+        else:
+            cost = terrain_planes(self.snapshot.map).movement_cost(unit.movement_type).copy()
+            for enemy in self.snapshot.enemies:
+                x, y = enemy.position
+                if enemy.is_alive and 0 <= x < self.width and 0 <= y < self.height:
+                    cost[y, x] = IMPASSABLE  # Enemies cannot be walked through
+            reach = distance_field(cost, [unit.position]) <= unit.movement_range
+        x, y = unit.position
+        if 0 <= x < self.width and 0 <= y < self.height:
+            reach[y, x] = True
+        return reach & ~occupied
+
+    def legal_actions(self, unit_slot: int, movement_map: Optional[List[List[int]]] = None) -> List[MacroAction]:
+        """Every legal macro action of a unit, wait moves first, in tile order within each verb"""
+        if movement_map is None and unit_slot in self._legal:
+            return self._legal[unit_slot]
+        unit = self.snapshot.units[unit_slot]
+        if not unit.can_act:
+            return []
+        reach = self.reach(unit, movement_map)
+        ys, xs = np.nonzero(reach)
+        tiles = list(zip(xs.tolist(), ys.tolist()))
+        actions = [MacroAction(unit_slot, tile, 'wait') for tile in tiles]
+
+        for item_slot, (item_id, uses) in enumerate(unit.items[:ITEM_SLOTS]):
+            if uses <= 0 or item_id not in ITEM_ATTACK_RANGES:
+                continue
+            min_range, max_range = ITEM_ATTACK_RANGES[item_id]
+            for target, enemy in enumerate(self.snapshot.enemies[:self.max_targets]):
+                if not (enemy.is_visible and enemy.is_alive):
+                    continue
+                distance = manhattan_field(self.height, self.width, enemy.position)
+                ys, xs = np.nonzero(reach & (distance >= min_range) & (distance <= max_range))
+                actions.extend(MacroAction(unit_slot, tile, 'attack', target, item_slot)
+                               for tile in zip(xs.tolist(), ys.tolist()))
+
+        if unit.hp[0] < unit.hp[1]:
+            for item_slot, (item_id, uses) in enumerate(unit.items[:ITEM_SLOTS]):
+                weapon_type = get_weapon_type(item_id)
+                if uses > 0 and (weapon_type is None or weapon_type == "Item") \
+                        and any(h in get_item_name(item_id).lower() for h in HEALING_NAMES):
+                    actions.extend(MacroAction(unit_slot, tile, 'item', item_slot=item_slot) for tile in tiles)
+
+        for target, ally in enumerate(self.snapshot.units[:self.max_targets]):
+            # Same rule as ActionGenerator._generate_rescue_actions
+            if ally.is_rescued and ally.position == unit.position:
+                actions.append(MacroAction(unit_slot, unit.position, 'rescue', target))
+
+        if movement_map is None:
+            self._legal[unit_slot] = actions
+        return actions
+
+    def mask(self, unit_slot: int, movement_map: Optional[List[List[int]]] = None) -> np.ndarray:
+        """Bool vector of length size, True at the codes of legal actions"""
+        mask = np.zeros(self.size, dtype=bool)
+        codes = [self.encode(macro) for macro in self.legal_actions(unit_slot, movement_map)]
+        mask[codes] = True
+        return mask
+
+    def masks(self) -> np.ndarray:
+        """(units, size) legal-action masks for every unit in snapshot order"""
+        return np.stack([self.mask(slot) for slot in range(len(self.snapshot.units))]) \
+            if self.snapshot.units else np.zeros((0, self.size), dtype=bool)
+
+    def to_action(self, macro: MacroAction) -> Action:
+        """The equivalent Action (a 'wait' becomes a move to the destination)"""
+        unit = self.snapshot.units[macro.unit_slot]
+        item_id = unit.items[macro.item_slot][0] if macro.item_slot >= 0 else None
+        if macro.verb == 'attack':
+            return Action(unit, 'attack', macro.destination, self.snapshot.enemies[macro.target], item_id)
+        if macro.verb == 'rescue':
+            return Action(unit, 'rescue', macro.destination, self.snapshot.units[macro.target])
+        if macro.verb == 'item':
+            return Action(unit, 'item', macro.destination, item_id=item_id)
+        return Action(unit, 'move', macro.destination)
+
+    def from_action(self, action: Action) -> Optional[MacroAction]:
+        """MacroAction for an Action of this snapshot (None if its unit, target or item is not found)"""
+        unit_slot = next((i for i, u in enumerate(self.snapshot.units) if u is action.unit), None)
+        if unit_slot is None:
+            return None
+        destination = tuple(action.target_position)
+        item_slot = -1
+        if action.item_id is not None:
+            item_slot = next((i for i, (item_id, uses) in enumerate(action.unit.items[:ITEM_SLOTS])
+                              if item_id == action.item_id and uses > 0), None)
+            if item_slot is None:
+                return None
+        if action.action_type == 'attack':
+            target = next((i for i, e in enumerate(self.snapshot.enemies) if e is action.target_unit), None)
+            return None if target is None else MacroAction(unit_slot, destination, 'attack', target, item_slot)
+        if action.action_type == 'rescue':
+            target = next((i for i, u in enumerate(self.snapshot.units) if u is action.target_unit), None)
+            return None if target is None else MacroAction(unit_slot, destination, 'rescue', target)
+        if action.action_type == 'item':
+            return MacroAction(unit_slot, destination, 'item', item_slot=item_slot)
+        return MacroAction(unit_slot, destination, 'wait')
@@ -0,0 +1,39 @@
+import numpy as np
+from typing import Optional
+from emblemmind_snapshot import TurnSnapshot, Unit
+from agent.tile_features import TileFeatures, manhattan_field
+
+PLANE_NAMES = (
+    'terrain_def',     # tiles.json defense bonus / 5
+    'terrain_avoid',   # tiles.json avoid bonus / 50
+    'terrain_res',     # tiles.json resistance bonus / 5
+    'allies',          # Living player units
+    'enemies',         # Living visible enemies
+    'enemy_threat',    # Number of enemies that can reach and hit the tile / 4
+    'unit_reach',      # Tiles the selected unit can move to
+    'unit_position'    # The selected unit itself
+)
+NUM_PLANES = len(PLANE_NAMES)
+
+def build_map_planes(snapshot: TurnSnapshot, unit: Optional[Unit] = None,
+                     tile_features: Optional[TileFeatures] = None) -> np.ndarray:
+    """Stack the [C, H, W] float32 map planes the tile-scoring network reads"""
+    features = tile_features or TileFeatures(snapshot)
+    height, width = features.height, features.width
+    planes = np.zeros((NUM_PLANES, height, width), dtype=np.float32)
+    planes[0] = features.terrain.terrain_def / 5.0
+    planes[1] = features.terrain.terrain_avoid / 50.0
+    planes[2] = features.terrain.terrain_res / 5.0
+    planes[3] = features.ally_mask
+    for enemy in snapshot.enemies:
+        if enemy.is_alive and enemy.is_visible and features.in_bounds(enemy.position):
+            planes[4, enemy.position[1], enemy.position[0]] = 1.0
+    planes[5] = features.enemy_threat_count / 4.0
+
+    if unit is not None:
+        planes[6] = (manhattan_field(height, width, unit.position) <= unit.movement_range) & ~features.occupied
+        if features.in_bounds(unit.position):
+            x, y = unit.position
+            planes[6, y, x] = 1.0  # Staying put is always an option
+            planes[7, y, x] = 1.0
+    return planes
@@ -1,14 +1,17 @@
+import os
 import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from typing import List, Dict
+from typing import List, Dict, Optional
 from agent.action_generator import Action
+from agent.state_evaluator import FEATURE_SIZE, features_to_array
+from agent.inference_config import InferenceConfig, build_inference_model
 
 class ActionEvaluator(nn.Module):
     """Neural network for evaluating actions"""
 
-    def __init__(self, input_size: int = 10):
+    def __init__(self, input_size: int = FEATURE_SIZE):
         super(ActionEvaluator, self).__init__()
 
         # Define the network architecture
@@ -39,86 +42,102 @@ class ActionEvaluator(nn.Module):
 class NeuralNetworkInterface:
     """Interface between the game and the neural network"""
 
-    def __init__(self):
+    def __init__(self, inference_config: Optional[InferenceConfig] = None):
         self.model = ActionEvaluator()
         self.optimizer = optim.Adam(self.model.parameters(), lr=0.001)
         self.criterion = nn.MSELoss()
+        self.inference_config = inference_config
+        self._inference_model = None  # Built from self.model on demand, dropped whenever weights change
+
+    def configure_inference(self, inference_config: Optional[InferenceConfig]):
+        """Switch thread count / int8 / frozen-graph settings (None = plain eager fp32)"""
+        self.inference_config = inference_config
+        self._inference_model = None
+
+    def inference_model(self):
+        if self.inference_config is None:
+            return self.model
+        if self._inference_model is None:
+            self._inference_model = build_inference_model(self.model, self.inference_config, FEATURE_SIZE)
+        return self._inference_model
+
+    def score_array(self, features) -> np.ndarray:
+        """Score a batch of feature dicts or a feature array, returning (N,) scores"""
+        feature_tensor = self._features_to_tensor(features)
+        with torch.no_grad():
+            scores = self.inference_model()(feature_tensor)
+        return scores.view(-1).numpy()
 
     def evaluate_actions(self, actions: List[Action], features: List[Dict]) -> List[float]:
         """Evaluate a list of actions using the neural network"""
-        # Convert features to tensor
-        feature_tensor = self._features_to_tensor(features)
-
-        # Get predictions
-        with torch.no_grad():
-            scores = self.model(feature_tensor)
+        scores = self.score_array(features).tolist()
 
         # Update action scores
         for action, score in zip(actions, scores):
-            action.score = score.item()
+            action.score = score
+
+        return scores
 
-        return [score.item() for score in scores]
+    def train(self, features, targets: List[float], weights=None, return_errors: bool = False):
+        """Train the neural network on a batch of feature dicts or a feature array
 
-    def train(self, features: List[Dict], targets: List[float]):
-        """Train the neural network on a batch of data"""
+        weights are per-sample importance-sampling weights (prioritized
+        replay); with return_errors the per-sample TD errors are returned
+        alongside the loss so priorities can be updated.
+        """
         # Convert to tensors
         feature_tensor = self._features_to_tensor(features)
-        target_tensor = torch.tensor(targets, dtype=torch.float32).view(-1, 1)
+        target_tensor = torch.as_tensor(np.asarray(targets, dtype=np.float32)).view(-1, 1)
 
         # Forward pass
         self.optimizer.zero_grad()
         outputs = self.model(feature_tensor)
-        loss = self.criterion(outputs, target_tensor)
+        if weights is None:
+            loss = self.criterion(outputs, target_tensor)
+        else:
+            weight_tensor = torch.as_tensor(np.asarray(weights, dtype=np.float32)).view(-1, 1)
+            loss = (weight_tensor * (outputs - target_tensor) ** 2).mean()
 
         # Backward pass and optimize
         loss.backward()
         self.optimizer.step()
+        self._inference_model = None
 
+        if return_errors:
+            errors = (target_tensor - outputs).detach().view(-1).numpy()
+            return loss.item(), errors
         return loss.item()
 
-    def _features_to_tensor(self, features: List[Dict]) -> torch.Tensor:
-        """Convert feature dictionaries to a tensor"""
-        # Extract and normalize features
-        feature_list = []
-        for feat in features:
-            # Basic features
-            feature_vector = [
-                feat['action_type'] / 3.0,  # Normalize to [0,1]
-                feat['unit_health'],
-                feat['target_distance'] / 10.0,  # Normalize assuming max distance of 10
-                feat['terrain_cost'] / 3.0,  # Normalize to [0,1]
-                feat['threat_level'],
-                feat['potential_damage'] / 20.0,  # Normalize assuming max damage of 20
-                feat['position_value']
-            ]
-
-            # Optional features
-            if 'target_health' in feat:
-                feature_vector.extend([
-                    feat['target_health'],
-                    float(feat['target_is_enemy'])
-                ])
-            else:
-                feature_vector.extend([0.0, 0.0])
-
-            if 'item_id' in feat:
-                feature_vector.append(feat['item_id'] / 1000.0)  # Normalize item ID
-            else:
-                feature_vector.append(0.0)
-
-            feature_list.append(feature_vector)
-
-        return torch.tensor(feature_list, dtype=torch.float32)
+    def _features_to_tensor(self, features) -> torch.Tensor:
+        """Convert feature dictionaries (or an already-built feature array) to a tensor"""
+        if isinstance(features, np.ndarray):
+            return torch.from_numpy(np.ascontiguousarray(features, dtype=np.float32))
+        return torch.from_numpy(features_to_array(features))
 
     def save_model(self, path: str):
-        """Save the model to a file"""
+        """Save the model to a file (plus a NumPy export for torch-free inference)"""
         torch.save({
             'model_state_dict': self.model.state_dict(),
             'optimizer_state_dict': self.optimizer.state_dict()
         }, path)
+        self.export_numpy_weights(os.path.splitext(path)[0] + '.npz')
+
+    def export_numpy_weights(self, path: str):
+        """Write the Linear layers as w0, b0, w1, b1, ... for agent/numpy_network.py"""
+        arrays = {}
+        linear_layers = [m for m in self.model.network if isinstance(m, nn.Linear)]
+        for i, layer in enumerate(linear_layers):
+            arrays[f"w{i}"] = layer.weight.detach().cpu().numpy()
+            arrays[f"b{i}"] = layer.bias.detach().cpu().numpy()
+        # np.savez appends .npz to names without it, so write through a handle
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
 
     def load_model(self, path: str):
         """Load the model from a file"""
         checkpoint = torch.load(path)
         self.model.load_state_dict(checkpoint['model_state_dict'])
-        self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
\ No newline at end of file
+        self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
+        self._inference_model = None
\ No newline at end of file
@@ -0,0 +1,59 @@
+import os
+import numpy as np
+from typing import Dict, List
+from agent.action_generator import Action
+from agent.state_evaluator import features_to_array
+
+class NumpyActionEvaluator:
+    """Pure-NumPy forward pass of the ActionEvaluator MLP.
+
+    Loads the .npz written by NeuralNetworkInterface.export_numpy_weights
+    (w0, b0, w1, b1, ... in layer order, ReLU between layers) so actions can
+    be scored without importing torch.
+    """
+
+    def __init__(self, weights: Dict[str, np.ndarray]):
+        self.layers = []
+        i = 0
+        while f"w{i}" in weights:
+            # Store transposed so the forward pass is x @ W + b
+            self.layers.append((np.ascontiguousarray(weights[f"w{i}"].T, dtype=np.float32),
+                                np.asarray(weights[f"b{i}"], dtype=np.float32)))
+            i += 1
+        if not self.layers:
+            raise ValueError("No layers found in weights")
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyActionEvaluator':
+        with np.load(path) as data:
+            return cls({key: data[key] for key in data.files})
+
+    @staticmethod
+    def numpy_path(model_path: str) -> str:
+        """Where the NumPy export of a torch checkpoint lives"""
+        return os.path.splitext(model_path)[0] + '.npz'
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        """Score a (N, FEATURE_SIZE) batch, returning (N,) scores"""
+        for i, (weight, bias) in enumerate(self.layers):
+            x = x @ weight + bias
+            if i < len(self.layers) - 1:
+                np.maximum(x, 0.0, out=x)
+        return x[:, 0]
+
+    def evaluate_actions(self, actions: List[Action], features: List[Dict]) -> List[float]:
+        """Same contract as NeuralNetworkInterface.evaluate_actions"""
+        scores = self.forward(features_to_array(features)).tolist()
+        for action, score in zip(actions, scores):
+            action.score = score
+        return scores
+
+if __name__ == "__main__":
+    # Export an existing torch checkpoint: python -m agent.numpy_network [saved_model.pt]
+    import sys
+    from agent.neural_network import NeuralNetworkInterface
+    model_path = sys.argv[1] if len(sys.argv) > 1 else 'saved_model.pt'
+    network = NeuralNetworkInterface()
+    network.load_model(model_path)
+    network.export_numpy_weights(NumpyActionEvaluator.numpy_path(model_path))
+    print(f"Exported {model_path} -> {NumpyActionEvaluator.numpy_path(model_path)}")
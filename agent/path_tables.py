@@ -0,0 +1,170 @@
+import json
+import math
+import os
+import numpy as np
+from typing import Dict, Iterable, Optional, Tuple
+from emblemmind_snapshot import TerrainMap
+from agent.distance_fields import distance_field, register_path_table
+from agent.tile_features import terrain_hash, terrain_planes
+
+PATH_TABLE_DIR = os.path.join('data', 'path_tables')
+UNREACHABLE_U8 = np.iinfo(np.uint8).max
+UNREACHABLE_U16 = np.iinfo(np.uint16).max
+
+def table_name(chapter_id: int, map_hash: str, move_type: str) -> str:
+    return f"ch{chapter_id:02X}_{map_hash[:16]}_{move_type}"
+
+def build_distance_matrix(terrain_map: TerrainMap, move_type: str) -> np.ndarray:
+    """All-pairs movement cost as an (H*W, H*W) matrix, row = start tile index y*W+x.
+
+    Stored as uint8 when every reachable cost fits, else uint16; the dtype's
+    max value marks unreachable pairs.
+    """
+    planes = terrain_planes(terrain_map)
+    cost = planes.movement_cost(move_type)
+    height, width = cost.shape
+    rows = np.empty((height * width, height * width), dtype=np.float32)
+    for y in range(height):
+        for x in range(width):
+            rows[y * width + x] = distance_field(cost, [(x, y)]).ravel()
+    finite = rows[np.isfinite(rows)]
+    dtype = np.uint8 if finite.size == 0 or finite.max() < UNREACHABLE_U8 else np.uint16
+    unreachable = np.iinfo(dtype).max
+    rows[~np.isfinite(rows)] = unreachable
+    return np.minimum(rows, unreachable).astype(dtype)
+
+class PathTable:
+    """Memory-mapped all-pairs distance matrix for one chapter map and movement type"""
+
+    def __init__(self, matrix: np.ndarray, width: int, height: int, move_type: str):
+        self.matrix = matrix
+        self.width = width
+        self.height = height
+        self.move_type = move_type
+        self.unreachable = np.iinfo(matrix.dtype).max
+
+    @classmethod
+    def load(cls, path: str) -> 'PathTable':
+        with open(path + '.json', 'r') as f:
+            header = json.load(f)
+        size = header['width'] * header['height']
+        matrix = np.memmap(path + '.bin', dtype=header['dtype'], mode='r', shape=(size, size))
+        return cls(matrix, header['width'], header['height'], header['move_type'])
+
+    @classmethod
+    def build(cls, path: str, terrain_map: TerrainMap, move_type: str) -> 'PathTable':
+        """Compute the matrix and write it next to a small JSON header"""
+        matrix = build_distance_matrix(terrain_map, move_type)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        matrix.tofile(path + '.bin.tmp')
+        os.replace(path + '.bin.tmp', path + '.bin')
+        with open(path + '.json', 'w') as f:
+            json.dump({'width': terrain_map.width, 'height': terrain_map.height,
+                       'dtype': matrix.dtype.name, 'move_type': move_type}, f)
+        return cls.load(path)
+
+    def _index(self, position: Tuple[int, int]) -> int:
+        x, y = position
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"{position} is off the {self.width}x{self.height} map")
+        return y * self.width + x
+
+    def distance(self, start: Tuple[int, int], goal: Tuple[int, int]) -> float:
+        """Movement cost to walk from start to goal (inf if unreachable)"""
+        value = int(self.matrix[self._index(start), self._index(goal)])
+        return float('inf') if value == self.unreachable else float(value)
+
+    def field(self, start: Tuple[int, int]) -> np.ndarray:
+        """(H, W) view of the costs from one tile to every other (unreachable = dtype max)"""
+        return self.matrix[self._index(start)].reshape(self.height, self.width)
+
+    def nearest_field(self, sources: Iterable[Tuple[int, int]]) -> np.ndarray:
+        """(H, W) float32 cost from the nearest of several start tiles, inf where unreachable.
+
+        Equal to distance_field over the same sources, as a min over rows.
+        """
+        rows = [self._index(position) for position in sources
+                if 0 <= position[0] < self.width and 0 <= position[1] < self.height]
+        if not rows:
+            return np.full((self.height, self.width), np.inf, dtype=np.float32)
+        nearest = np.asarray(self.matrix[sorted(rows)]).min(axis=0)
+        field = nearest.astype(np.float32)
+        field[nearest == self.unreachable] = np.inf
+        return field.reshape(self.height, self.width)
+
+    def turns_to_reach(self, start: Tuple[int, int], goal: Tuple[int, int], movement: int) -> float:
+        """Player phases needed to stand on goal with the given MOV (inf if unreachable)"""
+        cost = self.distance(start, goal)
+        if cost == 0:
+            return 0
+        return math.ceil(cost / movement) if movement > 0 and cost != float('inf') else float('inf')
+
+    def can_reach(self, start: Tuple[int, int], goal: Tuple[int, int], movement: int,
+                  turns: int = 1, attack_range: int = 0) -> bool:
+        """Can a unit at start stand within attack_range of goal in `turns` moves?"""
+        budget = movement * turns
+        if attack_range <= 0:
+            return self.distance(start, goal) <= budget
+        gx, gy = goal
+        row = self.field(start)
+        ys, xs = np.ogrid[0:self.height, 0:self.width]
+        in_range = (np.abs(xs - gx) + np.abs(ys - gy)) <= attack_range
+        return bool((row[in_range] <= budget).any())
+
+class PathTables:
+    """On-disk store of PathTable files keyed by chapter, terrain hash and movement type.
+
+    Tables are written by the offline precompute (python -m agent.path_tables)
+    or on first sight of a chapter with ensure(); every later replay of the
+    chapter just memory-maps them.
+    """
+
+    def __init__(self, directory: str = PATH_TABLE_DIR):
+        self.directory = directory
+        self._loaded: Dict[tuple, PathTable] = {}
+
+    def path(self, chapter_id: int, terrain_map: TerrainMap, move_type: str) -> str:
+        return os.path.join(self.directory, table_name(chapter_id, terrain_hash(terrain_map), move_type))
+
+    def get(self, chapter_id: int, terrain_map: TerrainMap, move_type: str,
+            build: bool = False) -> Optional[PathTable]:
+        """Memory-mapped table for this chapter map, building it first if asked (None if missing)"""
+        key = (chapter_id, terrain_hash(terrain_map), move_type)
+        table = self._loaded.get(key)
+        if table is not None:
+            return table
+        path = self.path(chapter_id, terrain_map, move_type)
+        try:
+            if os.path.exists(path + '.json') and os.path.exists(path + '.bin'):
+                table = PathTable.load(path)
+            elif build:
+                table = PathTable.build(path, terrain_map, move_type)
+        except (OSError, ValueError) as e:
+            print(f"[PATH TABLE ERROR] Could not load {path}: {e}")
+            return None
+        if table is not None:
+            self._loaded[key] = table
+            register_path_table(terrain_map, move_type, table)
+        return table
+
+    def ensure(self, chapter_id: int, terrain_map: TerrainMap, move_types: Iterable[str]):
+        """Precompute any missing tables for these movement types and register them with
+        agent/distance_fields.py, so distance fields and reach queries on this map become lookups"""
+        for move_type in set(move_types):
+            self.get(chapter_id, terrain_map, move_type, build=True)
+
+if __name__ == "__main__":
+    # Precompute tables for a map export: python -m agent.path_tables [fe_state.txt fe_map.txt]
+    import sys
+    import time
+    from emblemmind_snapshot import TurnSnapshot
+    from utils.terrain_data import MOVEMENT_COSTS
+    state_path = sys.argv[1] if len(sys.argv) > 1 else 'data/fe_state.txt'
+    map_path = sys.argv[2] if len(sys.argv) > 2 else 'data/fe_map.txt'
+    snapshot = TurnSnapshot.from_files(state_path, map_path)
+    tables = PathTables()
+    for move_type in MOVEMENT_COSTS:
+        start = time.perf_counter()
+        table = tables.get(snapshot.chapter_id, snapshot.map, move_type, build=True)
+        print(f"{move_type:14s} {table.matrix.dtype.name} {table.matrix.nbytes / 1024:.0f} KiB "
+              f"({time.perf_counter() - start:.2f}s)")
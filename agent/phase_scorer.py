@@ -0,0 +1,56 @@
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from emblemmind_snapshot import Unit
+from agent.action_generator import Action
+from agent.top_k import top_k_indices
+
+@dataclass
+class PhaseScores:
+    """Scores for every unit's candidate actions from one forward pass.
+
+    actions and scores are flat; unit i's candidates occupy
+    [offsets[i], offsets[i + 1]).
+    """
+    actions: List[Action]
+    scores: np.ndarray
+    offsets: np.ndarray
+    unit_segments: Dict[int, int] = field(default_factory=dict)  # unit id -> segment number
+
+    def segment(self, unit_id: int):
+        i = self.unit_segments.get(unit_id)
+        if i is None:
+            return 0, 0
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def top_k(self, unit_id: int, k: int = 1, allowed: Optional[List[Action]] = None) -> List[Action]:
+        """Best k actions for a unit, optionally restricted to a subset of its candidates"""
+        start, end = self.segment(unit_id)
+        scores = self.scores[start:end]
+        if allowed is not None:
+            allowed_ids = {id(a) for a in allowed}
+            keep = np.array([id(a) in allowed_ids for a in self.actions[start:end]], dtype=bool)
+            scores = np.where(keep, scores, -np.inf)
+            k = min(k, int(keep.sum()))
+        return [self.actions[start + i] for i in top_k_indices(scores, k)]
+
+class PhaseScorer:
+    """Scores all units' candidates for a phase in a single evaluator call"""
+
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+
+    def score(self, units: List[Unit], unit_actions: List[List[Action]]) -> PhaseScores:
+        flat_actions = []
+        offsets = [0]
+        unit_segments = {}
+        for i, (unit, actions) in enumerate(zip(units, unit_actions)):
+            flat_actions.extend(actions)
+            offsets.append(len(flat_actions))
+            unit_segments[unit.id] = i
+        features = [self.coordinator.get_action_features(a) for a in flat_actions]
+        if flat_actions:
+            scores = np.asarray(self.coordinator.evaluate_actions(flat_actions, features), dtype=np.float32)
+        else:
+            scores = np.zeros(0, dtype=np.float32)
+        return PhaseScores(flat_actions, scores, np.array(offsets, dtype=np.int64), unit_segments)
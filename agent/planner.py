@@ -0,0 +1,21 @@
+from typing import Dict
+from emblemmind_snapshot import TurnSnapshot
+from agent.search import AlphaBetaSearch, GreedySearch, SearchResult
+
+# Every mode takes time_budget (seconds) and returns a SearchResult from search(snapshot)
+SEARCH_MODES: Dict[str, type] = {
+    GreedySearch.name: GreedySearch,
+    AlphaBetaSearch.name: AlphaBetaSearch,
+}
+
+class Planner:
+    """Picks the next player action for a snapshot with one of SEARCH_MODES."""
+
+    def __init__(self, mode: str = AlphaBetaSearch.name, time_budget: float = 1.0, **options):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {mode!r} (expected one of {sorted(SEARCH_MODES)})")
+        self.mode = mode
+        self.search = SEARCH_MODES[mode](time_budget=time_budget, **options)
+
+    def plan(self, snapshot: TurnSnapshot) -> SearchResult:
+        return self.search.search(snapshot)
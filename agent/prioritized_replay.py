@@ -0,0 +1,121 @@
+import numpy as np
+from typing import Dict, Optional
+from agent.replay_memory import ReplayMemory
+
+class SumTree:
+    """Binary tree of priorities where each node holds the sum of its children.
+
+    Leaves live at [leaf_base, 2 * leaf_base) and the root at index 1, so
+    updates and prefix-sum lookups touch one node per level. Batches of
+    updates and lookups are done level by level with NumPy.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.leaf_base = 1
+        while self.leaf_base < capacity:
+            self.leaf_base *= 2
+        self.tree = np.zeros(2 * self.leaf_base, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def get(self, indices) -> np.ndarray:
+        return self.tree[self.leaf_base + np.asarray(indices)]
+
+    def set(self, index: int, priority: float):
+        """Single-leaf update without NumPy call overhead"""
+        tree = self.tree
+        node = self.leaf_base + index
+        tree[node] = priority
+        node //= 2
+        while node >= 1:
+            tree[node] = tree[2 * node] + tree[2 * node + 1]
+            node //= 2
+
+    def update(self, indices, priorities):
+        """Set leaf priorities and refresh their ancestors"""
+        nodes = self.leaf_base + np.asarray(indices, dtype=np.int64).ravel()
+        self.tree[nodes] = np.asarray(priorities, dtype=np.float64).ravel()
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            nodes = np.unique(nodes // 2)
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """Leaf indices whose prefix-sum interval contains each value"""
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        while nodes[0] < self.leaf_base:
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values >= left_sum
+            values = np.where(go_right, values - left_sum, values)
+            nodes = np.where(go_right, left + 1, left)
+        return np.minimum(nodes - self.leaf_base, self.capacity - 1)
+
+class PrioritizedReplay:
+    """Proportional prioritized sampling over a ReplayMemory.
+
+    Transitions are sampled with probability p_i^alpha / sum(p^alpha) and
+    come back with importance-sampling weights (N * P(i))^-beta normalised
+    by their maximum. New effective transitions get the current maximum
+    priority so they are seen at least once; ineffective ones get zero and
+    are never drawn, which replaces the old filter pass over the buffer.
+    """
+
+    def __init__(self, memory: ReplayMemory, alpha: float = 0.6, beta: float = 0.4,
+                 beta_increment: float = 1e-4, epsilon: float = 1e-3):
+        self.memory = memory
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.tree = SumTree(memory.capacity)
+        # Rebuild priorities for transitions restored from disk
+        effective = self.memory.effective_indices()
+        if len(effective):
+            self.tree.update(effective, np.full(len(effective), self.max_priority ** self.alpha))
+
+    def __len__(self) -> int:
+        return len(self.memory)
+
+    def add(self, features: np.ndarray, action, reward: float,
+            done: bool = False, effective: bool = True) -> int:
+        """Store a transition in the memory and give it a priority"""
+        index = self.memory.add(features, action, reward, done=done, effective=effective)
+        self.tree.set(index, self.max_priority ** self.alpha if effective else 0.0)
+        return index
+
+    def end_episode(self):
+        self.memory.end_episode()
+
+    def flush(self):
+        self.memory.flush()
+
+    def sample(self, batch_size: int, rng: Optional[np.random.Generator] = None) -> Optional[Dict[str, np.ndarray]]:
+        """Stratified proportional sample with importance-sampling weights"""
+        total = self.tree.total
+        if total <= 0:
+            return None
+        rng = rng or np.random.default_rng()
+        segment = total / batch_size
+        values = (np.arange(batch_size) + rng.random(batch_size)) * segment
+        indices = self.tree.find(np.minimum(values, np.nextafter(total, 0)))
+
+        probabilities = self.tree.get(indices) / total
+        weights = (len(self.memory) * np.maximum(probabilities, 1e-12)) ** -self.beta
+        weights = (weights / weights.max()).astype(np.float32)
+        self.beta = min(1.0, self.beta + self.beta_increment)
+
+        batch = self.memory.gather(indices)
+        batch['weights'] = weights
+        return batch
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray):
+        """Batch priority update from the latest TD errors"""
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64).ravel()) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
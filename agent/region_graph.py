@@ -0,0 +1,192 @@
+import heapq
+import numpy as np
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from emblemmind_snapshot import TerrainMap, Unit
+from agent.distance_fields import distance_field
+from agent.tile_features import terrain_hash, terrain_planes
+from utils.terrain_data import IMPASSABLE, chokepoint_terrain_ids
+
+CLUSTER_SIZE = 8  # Tiles per side of the blocks regions are cut from
+
+@dataclass
+class Region:
+    id: int
+    representative: Tuple[int, int]  # Passable tile nearest the region's centroid
+    size: int
+    is_chokepoint: bool
+
+class RegionGraph:
+    """Coarse graph of a chapter map for one movement type.
+
+    Passable tiles are cut into CLUSTER_SIZE blocks, and each block into its
+    4-connected pieces; runs of bridge/door/gate tiles become regions of
+    their own so chokepoints are explicit nodes. Edges join touching regions
+    and cost the terrain movement cost between their representative tiles,
+    so long-range queries run on tens of nodes instead of every tile.
+    """
+
+    def __init__(self, terrain_map: TerrainMap, move_type: str, cluster_size: int = CLUSTER_SIZE):
+        planes = terrain_planes(terrain_map)
+        self.move_type = move_type
+        self.width, self.height = planes.width, planes.height
+        cost = planes.movement_cost(move_type)
+        passable = cost < IMPASSABLE
+        chokepoint = np.isin(planes.terrain_ids, list(chokepoint_terrain_ids())) & passable
+
+        # Tiles share a region when they are in the same block (chokepoints
+        # ignore blocks) and of the same chokepoint-ness
+        block = (np.arange(self.height)[:, None] // cluster_size) * 1000 + np.arange(self.width)[None, :] // cluster_size
+        block = np.where(chokepoint, -1, block)
+        self.region_of = np.full((self.height, self.width), -1, dtype=np.int32)
+        self.regions: List[Region] = []
+        for y in range(self.height):
+            for x in range(self.width):
+                if passable[y, x] and self.region_of[y, x] < 0:
+                    tiles = self._flood(x, y, passable, block, len(self.regions))
+                    self.regions.append(self._make_region(len(self.regions), tiles, bool(chokepoint[y, x])))
+
+        self.edges: Dict[int, Dict[int, float]] = {region.id: {} for region in self.regions}
+        neighbours = set()
+        for a, b in ((self.region_of[:, :-1], self.region_of[:, 1:]), (self.region_of[:-1, :], self.region_of[1:, :])):
+            touching = (a >= 0) & (b >= 0) & (a != b)
+            pairs = list(zip(a[touching].tolist(), b[touching].tolist()))
+            neighbours.update(pairs)
+            neighbours.update((b, a) for a, b in pairs)
+        fields = {}
+        for a, b in neighbours:
+            if a not in fields:
+                fields[a] = distance_field(cost, [self.regions[a].representative])
+            bx, by = self.regions[b].representative
+            self.edges[a][b] = float(fields[a][by, bx])
+
+    def _flood(self, x: int, y: int, passable: np.ndarray, block: np.ndarray, region_id: int) -> List[Tuple[int, int]]:
+        tiles = [(x, y)]
+        self.region_of[y, x] = region_id
+        queue = deque(tiles)
+        while queue:
+            cx, cy = queue.popleft()
+            for nx, ny in ((cx + 1, cy), (cx - 1, cy), (cx, cy + 1), (cx, cy - 1)):
+                if (0 <= nx < self.width and 0 <= ny < self.height and passable[ny, nx]
+                        and self.region_of[ny, nx] < 0 and block[ny, nx] == block[cy, cx]):
+                    self.region_of[ny, nx] = region_id
+                    tiles.append((nx, ny))
+                    queue.append((nx, ny))
+        return tiles
+
+    def _make_region(self, region_id: int, tiles: List[Tuple[int, int]], is_chokepoint: bool) -> Region:
+        cx = sum(x for x, _ in tiles) / len(tiles)
+        cy = sum(y for _, y in tiles) / len(tiles)
+        representative = min(tiles, key=lambda t: abs(t[0] - cx) + abs(t[1] - cy))
+        return Region(region_id, representative, len(tiles), is_chokepoint)
+
+    def __len__(self) -> int:
+        return len(self.regions)
+
+    def region_at(self, position: Tuple[int, int]) -> int:
+        """Region ID of a tile (-1 if impassable or off the map)"""
+        x, y = position
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return int(self.region_of[y, x])
+        return -1
+
+    def region_costs(self, start: int) -> Dict[int, float]:
+        """Dijkstra over the region graph from one region"""
+        costs = {start: 0.0}
+        heap = [(0.0, start)]
+        while heap:
+            cost, region = heapq.heappop(heap)
+            if cost > costs[region]:
+                continue
+            for neighbour, step in self.edges[region].items():
+                if cost + step < costs.get(neighbour, float('inf')):
+                    costs[neighbour] = cost + step
+                    heapq.heappush(heap, (cost + step, neighbour))
+        return costs
+
+    def path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Tuple[List[int], float]:
+        """Region sequence and estimated movement cost between two tiles ([], inf if cut off)"""
+        a, b = self.region_at(start), self.region_at(goal)
+        if a < 0 or b < 0:
+            return [], float('inf')
+        costs, previous = {a: 0.0}, {}
+        heap = [(0.0, a)]
+        while heap:
+            cost, region = heapq.heappop(heap)
+            if region == b:
+                break
+            if cost > costs[region]:
+                continue
+            for neighbour, step in self.edges[region].items():
+                if cost + step < costs.get(neighbour, float('inf')):
+                    costs[neighbour] = cost + step
+                    previous[neighbour] = region
+                    heapq.heappush(heap, (cost + step, neighbour))
+        if b not in costs:
+            return [], float('inf')
+        route = [b]
+        while route[-1] != a:
+            route.append(previous[route[-1]])
+        route.reverse()
+        # Tile -> representative legs are short, so Manhattan is close enough
+        ax, ay = self.regions[a].representative
+        bx, by = self.regions[b].representative
+        estimate = (abs(start[0] - ax) + abs(start[1] - ay) + costs[b]
+                    + abs(goal[0] - bx) + abs(goal[1] - by)) if a != b else abs(start[0] - goal[0]) + abs(start[1] - goal[1])
+        return route, estimate
+
+    def approach_costs(self, goal: int, positions: List[Tuple[int, int]]) -> List[float]:
+        """Estimated movement cost from each tile to a goal region (inf when cut off).
+
+        One Dijkstra from the goal serves every tile; edges are walked in
+        reverse, which only differs by the representatives' own tile costs.
+        """
+        costs = self.region_costs(goal)
+        estimates = []
+        for position in positions:
+            region = self.region_at(position)
+            if region not in costs:
+                estimates.append(float('inf'))
+                continue
+            rx, ry = self.regions[region].representative
+            estimates.append(costs[region] + abs(position[0] - rx) + abs(position[1] - ry))
+        return estimates
+
+    def group_units(self, units: List[Unit]) -> Dict[int, List[Unit]]:
+        """Living units bucketed by the region they stand in"""
+        groups: Dict[int, List[Unit]] = {}
+        for unit in units:
+            region = self.region_at(unit.position)
+            if unit.is_alive and region >= 0:
+                groups.setdefault(region, []).append(unit)
+        return groups
+
+    def nearest_group(self, position: Tuple[int, int], enemies: List[Unit]) -> Optional[Tuple[int, List[Unit], float]]:
+        """(region, enemies there, region cost) of the closest enemy group, or None"""
+        start = self.region_at(position)
+        if start < 0:
+            return None
+        costs = self.region_costs(start)
+        groups = [(costs[region], region, members) for region, members in self.group_units(enemies).items()
+                  if region in costs]
+        if not groups:
+            return None
+        cost, region, members = min(groups, key=lambda g: (g[0], -len(g[2])))
+        return region, members, cost
+
+_graph_cache: "OrderedDict[tuple, RegionGraph]" = OrderedDict()
+_GRAPH_CACHE_SIZE = 16
+
+def region_graph(terrain_map: TerrainMap, move_type: str) -> RegionGraph:
+    """RegionGraph from a small LRU keyed by (terrain hash, movement type)"""
+    key = (terrain_hash(terrain_map), move_type)
+    graph = _graph_cache.get(key)
+    if graph is None:
+        graph = RegionGraph(terrain_map, move_type)
+        _graph_cache[key] = graph
+        while len(_graph_cache) > _GRAPH_CACHE_SIZE:
+            _graph_cache.popitem(last=False)
+    else:
+        _graph_cache.move_to_end(key)
+    return graph
@@ -0,0 +1,181 @@
+import json
+import os
+import numpy as np
+from typing import Dict, Optional
+from agent.action_generator import Action
+from agent.state_evaluator import FEATURE_SIZE
+
+ACTION_TYPES = ('move', 'wait', 'attack', 'rescue', 'item')
+ACTION_CODE_VERSION = 2  # Bumped whenever the encode_action layout changes; stored in the header
+
+# (shift, bits) of each encode_action field; character IDs are 16-bit (e.g. 52916), items 8-bit
+UNIT_FIELD = (0, 16)
+TYPE_FIELD = (16, 4)
+X_FIELD = (20, 8)
+Y_FIELD = (28, 8)
+TARGET_FIELD = (36, 16)
+ITEM_FIELD = (52, 8)
+
+def _pack(value: int, field) -> int:
+    shift, bits = field
+    return (value & ((1 << bits) - 1)) << shift
+
+def _unpack(code: int, field) -> int:
+    shift, bits = field
+    return (code >> shift) & ((1 << bits) - 1)
+
+def encode_action(action: Action) -> int:
+    """Pack an action into one int64: unit, type, target tile, target unit and item"""
+    type_code = ACTION_TYPES.index(action.action_type) if action.action_type in ACTION_TYPES else 0xF
+    target_id = action.target_unit.id if action.target_unit is not None else 0
+    item_id = action.item_id if action.item_id is not None else 0
+    return (
+        _pack(action.unit.id, UNIT_FIELD)
+        | _pack(type_code, TYPE_FIELD)
+        | _pack(action.target_position[0], X_FIELD)
+        | _pack(action.target_position[1], Y_FIELD)
+        | _pack(target_id, TARGET_FIELD)
+        | _pack(item_id, ITEM_FIELD)
+    )
+
+def decode_action(code: int) -> Dict:
+    """Unpack an encode_action code back into its fields"""
+    code = int(code)
+    type_code = _unpack(code, TYPE_FIELD)
+    return {
+        'unit_id': _unpack(code, UNIT_FIELD),
+        'action_type': ACTION_TYPES[type_code] if type_code < len(ACTION_TYPES) else 'unknown',
+        'target_position': (_unpack(code, X_FIELD), _unpack(code, Y_FIELD)),
+        'target_unit_id': _unpack(code, TARGET_FIELD),
+        'item_id': _unpack(code, ITEM_FIELD)
+    }
+
+class ReplayMemory:
+    """Fixed-size ring buffer of transitions in memory-mapped NumPy arrays.
+
+    Each transition is one row: the action's feature vector, its packed
+    action code, the reward, whether it ended the episode, whether it
+    changed anything, and the row index of the next transition in the same
+    episode (-1 when there is none). Rows are written straight into the
+    mapped files, so flush() only syncs dirty pages and a tiny JSON header
+    instead of re-serializing the whole buffer.
+    """
+
+    HEADER_FILE = 'header.json'
+
+    def __init__(self, directory: str, capacity: int = 100000, feature_size: int = FEATURE_SIZE):
+        self.directory = directory
+        self.capacity = capacity
+        self.feature_size = feature_size
+        self.cursor = 0   # Next row to write
+        self.size = 0     # Rows holding valid transitions
+        self._last_index = -1  # Previous row of the running episode
+        os.makedirs(directory, exist_ok=True)
+
+        header_path = os.path.join(directory, self.HEADER_FILE)
+        mode = 'w+'
+        if os.path.exists(header_path):
+            with open(header_path, 'r') as f:
+                header = json.load(f)
+            if header.get('capacity') == capacity and header.get('feature_size') == feature_size \
+                    and header.get('action_code_version') == ACTION_CODE_VERSION:
+                self.cursor = header['cursor']
+                self.size = header['size']
+                mode = 'r+'
+            else:
+                print(f"[REPLAY MEMORY] Header at {header_path} does not match capacity/feature size/action codes, starting fresh.")
+
+        self.features = self._map('features', np.float32, (capacity, feature_size), mode)
+        self.action_codes = self._map('action_codes', np.int64, (capacity,), mode)
+        self.rewards = self._map('rewards', np.float32, (capacity,), mode)
+        self.next_index = self._map('next_index', np.int64, (capacity,), mode)
+        self.dones = self._map('dones', np.bool_, (capacity,), mode)
+        self.effective = self._map('effective', np.bool_, (capacity,), mode)
+        self._dirty = False
+
+    def _map(self, name: str, dtype, shape, mode: str) -> np.memmap:
+        return np.memmap(os.path.join(self.directory, f"{name}.bin"), dtype=dtype, mode=mode, shape=shape)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def bytes_per_transition(self) -> int:
+        return (self.features.itemsize * self.feature_size + self.action_codes.itemsize
+                + self.rewards.itemsize + self.next_index.itemsize
+                + self.dones.itemsize + self.effective.itemsize)
+
+    def add(self, features: np.ndarray, action, reward: float,
+            done: bool = False, effective: bool = True) -> int:
+        """Write one transition (action may be an Action or an encode_action code)"""
+        index = self.cursor
+        previous = (index - 1) % self.capacity
+        if previous != self._last_index:
+            # The row before this one belongs to an older episode (or was just
+            # overwritten), so its link into this slot is stale
+            self.next_index[previous] = -1
+        self.features[index] = features
+        self.action_codes[index] = action if isinstance(action, (int, np.integer)) else encode_action(action)
+        self.rewards[index] = reward
+        self.next_index[index] = -1
+        self.dones[index] = done
+        self.effective[index] = effective
+        if self._last_index >= 0:
+            self.next_index[self._last_index] = index
+        self._last_index = -1 if done else index
+
+        self._dirty = True
+        self.cursor = (self.cursor + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return index
+
+    def end_episode(self):
+        """Mark the last written transition as terminal"""
+        if self._last_index >= 0:
+            self.dones[self._last_index] = True
+            self._dirty = True
+        self._last_index = -1
+
+    def effective_indices(self) -> np.ndarray:
+        """Row indices of transitions that changed the game state"""
+        return np.flatnonzero(self.effective[:self.size])
+
+    def sample(self, batch_size: int, effective_only: bool = True,
+               rng: Optional[np.random.Generator] = None) -> Optional[Dict[str, np.ndarray]]:
+        """Uniformly sample a batch of transitions, or None if there are none"""
+        rng = rng or np.random.default_rng()
+        candidates = self.effective_indices() if effective_only else np.arange(self.size)
+        if len(candidates) == 0:
+            return None
+        indices = rng.choice(candidates, size=min(batch_size, len(candidates)), replace=False)
+        return self.gather(indices)
+
+    def gather(self, indices: np.ndarray) -> Dict[str, np.ndarray]:
+        """Copy the given rows out of the mapped arrays"""
+        return {
+            'indices': indices,
+            'features': np.asarray(self.features[indices]),
+            'action_codes': np.asarray(self.action_codes[indices]),
+            'rewards': np.asarray(self.rewards[indices]),
+            'next_index': np.asarray(self.next_index[indices]),
+            'dones': np.asarray(self.dones[indices])
+        }
+
+    def flush(self):
+        """Sync written rows and the header to disk"""
+        if not self._dirty:
+            return
+        for array in (self.features, self.action_codes, self.rewards,
+                      self.next_index, self.dones, self.effective):
+            array.flush()
+        header_path = os.path.join(self.directory, self.HEADER_FILE)
+        with open(header_path + '.tmp', 'w') as f:
+            json.dump({
+                'capacity': self.capacity,
+                'feature_size': self.feature_size,
+                'action_code_version': ACTION_CODE_VERSION,
+                'cursor': self.cursor,
+                'size': self.size
+            }, f)
+        os.replace(header_path + '.tmp', header_path)
+        self._dirty = False
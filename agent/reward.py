@@ -0,0 +1,80 @@
+from agent.tile_features import terrain_planes
+
+def is_player_dead(snapshot):
+    # Only return True if a critical character (Eliwood=0x01, Hector=0x02, Lyn=0x03) is dead
+    CRITICAL_IDS = {0x01, 0x02, 0x03}
+    for unit in snapshot.units:
+        if unit.id in CRITICAL_IDS and unit.hp[0] == 0:
+            return True
+    return False
+
+def is_level_beaten(snapshot):
+    # Level is beaten if all enemies are dead and at least one enemy has hidden_status != 0x20 (not just item droppers left)
+    return (not any(e.is_alive for e in snapshot.enemies)) and any(getattr(e, 'hidden_status', 0) != 0x20 for e in snapshot.enemies)
+
+def compute_reward(prev_snapshot, curr_snapshot, action=None, level_beaten=False, player_dead=False):
+    """Shaped reward for the transition from prev_snapshot to curr_snapshot"""
+    reward = 0
+    prev_enemies = {e.id: e for e in prev_snapshot.enemies}
+    curr_enemies = {e.id: e for e in curr_snapshot.enemies}
+    prev_units = {u.id: u for u in prev_snapshot.units}
+    curr_units = {u.id: u for u in curr_snapshot.units}
+    # Enemy deaths
+    killed_enemy = False
+    for eid, prev_e in prev_enemies.items():
+        if eid in curr_enemies and prev_e.is_alive and not curr_enemies[eid].is_alive:
+            reward += 100
+            killed_enemy = True
+    # Player deaths
+    for uid, prev_u in prev_units.items():
+        if uid in curr_units and prev_u.is_alive and not curr_units[uid].is_alive:
+            reward -= 100
+    # Damage dealt/taken
+    for eid, prev_e in prev_enemies.items():
+        if eid in curr_enemies:
+            reward += 10 * max(0, prev_e.hp[0] - curr_enemies[eid].hp[0])
+    for uid, prev_u in prev_units.items():
+        if uid in curr_units:
+            reward -= 10 * max(0, prev_u.hp[0] - curr_units[uid].hp[0])
+    # Terrain scoring for move actions
+    if action is not None:
+        if action.action_type == 'move':
+            # Forest/hill +5, fort/gate/throne +10, walls/peaks -10 (see MOVE_REWARD_BY_SYMBOL)
+            x, y = action.target_position
+            planes = terrain_planes(curr_snapshot.map)
+            if 0 <= x < planes.width and 0 <= y < planes.height:
+                reward += int(planes.move_reward[y, x])
+        elif action.action_type == 'attack':
+            reward += 70
+        elif action.action_type == 'item':
+            reward += 2
+        elif action.action_type == 'rescue':
+            reward += 1
+        elif action.action_type == 'wait':
+            reward -= 2
+    # Penalize idle 'wait' actions if low HP and in enemy range
+    if action is not None and action.action_type == 'wait' and action.unit.hp[0] < action.unit.hp[1] * 0.3:
+        for enemy in curr_snapshot.enemies:
+            if enemy.is_alive and abs(action.unit.position[0] - enemy.position[0]) + abs(action.unit.position[1] - enemy.position[1]) <= 2:
+                reward -= 10
+                break
+    # Penalize unproductive actions
+    if action is not None and action.unit.position == action.target_position and not killed_enemy:
+        reward -= 10
+    # Penalty if unit's turn_status did not change to 0x42 after action
+    if action is not None:
+        unit_after = next((u for u in curr_snapshot.units if u.id == action.unit.id), None)
+        if unit_after and unit_after.turn_status != 0x02:
+            reward -= 20
+    # Penalty for being unselectable or not deployed
+    for unit in curr_snapshot.units:
+        if hasattr(unit, 'turn_status'):
+            if unit.turn_status & 0x02:
+                reward -= 10
+            if unit.turn_status & 0x08:
+                reward -= 10
+    if level_beaten:
+        reward += 5000
+    if player_dead:
+        reward -= 5000
+    return reward
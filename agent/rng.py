@@ -0,0 +1,215 @@
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+BRAVE_WEAPON_FLAG = 0x20  # Weapon ability byte 1: strikes twice per attack
+DOUBLE_ATTACK_SPEED = 4   # Attack speed lead needed for a follow-up strike
+
+class FE7RNG:
+    """FE7's combat random number generator.
+
+    The game keeps three 16-bit seeds in IWRAM (exported by
+    fe_memory_reader.lua as rn_seeds). Every RN it draws shifts the seeds, so
+    given the seeds and the order of rolls the outcome of every battle is
+    fixed.
+    """
+
+    def __init__(self, seeds: Sequence[int]):
+        if len(seeds) != 3:
+            raise ValueError("FE7 RNG state is exactly three 16-bit seeds")
+        self.seeds = [s & 0xFFFF for s in seeds]
+        self.consumed = 0
+
+    def copy(self) -> 'FE7RNG':
+        """Independent copy of the current state"""
+        rng = FE7RNG(self.seeds)
+        rng.consumed = self.consumed
+        return rng
+
+    @property
+    def state(self) -> Tuple[int, int, int]:
+        return tuple(self.seeds)
+
+    def next_rn(self) -> int:
+        """Draw the next raw 16-bit RN"""
+        s0, s1, s2 = self.seeds
+        rn = ((s1 << 11) + (s0 >> 5)) & 0xFFFF
+        s2 = (s2 << 1) & 0xFFFF
+        if s1 & 0x8000:
+            s2 += 1
+        rn ^= s2
+        self.seeds = [rn, s0, s1]
+        self.consumed += 1
+        return rn
+
+    def next_rn_100(self) -> int:
+        """Draw the next RN scaled to 0-99"""
+        return (self.next_rn() * 100) >> 16
+
+    def roll_1rn(self, threshold: int) -> bool:
+        """Single-RN roll (used for crits)"""
+        return self.next_rn_100() < threshold
+
+    def roll_2rn(self, threshold: int) -> bool:
+        """Averaged two-RN roll (used for hit)"""
+        return (self.next_rn_100() + self.next_rn_100()) // 2 < threshold
+
+    def peek(self, count: int) -> List[int]:
+        """The next `count` RNs (0-99) without advancing the state"""
+        rng = self.copy()
+        return [rng.next_rn_100() for _ in range(count)]
+
+@dataclass
+class Combatant:
+    """The subset of a battle struct that decides how a battle plays out"""
+    hp: int
+    attack: int
+    defense: int
+    attack_speed: int
+    hit: int
+    crit: int
+    can_counter: bool = True
+    brave: bool = False
+
+    @classmethod
+    def from_battle_struct(cls, battle_struct: Dict, can_counter: Optional[bool] = None) -> 'Combatant':
+        """Build a combatant from TurnSnapshot.parse_battle_struct output"""
+        if can_counter is None:
+            # The game clears the equipped weapon when a unit can't fight back
+            can_counter = (battle_struct.get('equipped_item_after', 0) & 0xFF) != 0
+        return cls(
+            hp=battle_struct['cur_hp'],
+            attack=battle_struct['attack'],
+            defense=battle_struct['defense'],
+            attack_speed=battle_struct['attack_speed'],
+            hit=min(100, battle_struct['battle_hit']),
+            crit=min(100, battle_struct['battle_crit']),
+            can_counter=can_counter,
+            brave=bool(battle_struct.get('weapon_ability_word', 0) & BRAVE_WEAPON_FLAG)
+        )
+
+@dataclass
+class BattleOutcome:
+    """Exact result of one battle for a given RNG state"""
+    attacker_hp: int
+    defender_hp: int
+    strikes: List[Tuple[str, bool, bool, int]] = field(default_factory=list)  # (side, hit, crit, damage)
+    rns_consumed: int = 0
+
+    @property
+    def attacker_died(self) -> bool:
+        return self.attacker_hp <= 0
+
+    @property
+    def defender_died(self) -> bool:
+        return self.defender_hp <= 0
+
+def strike_order(attacker: Combatant, defender: Combatant) -> List[str]:
+    """Order of strikes: attack, counter, then the faster unit's follow-up"""
+    order = ['attacker']
+    if defender.can_counter:
+        order.append('defender')
+    if attacker.attack_speed - defender.attack_speed >= DOUBLE_ATTACK_SPEED:
+        order.append('attacker')
+    elif defender.can_counter and defender.attack_speed - attacker.attack_speed >= DOUBLE_ATTACK_SPEED:
+        order.append('defender')
+    return order
+
+def predict_battle(rng: FE7RNG, attacker: Combatant, defender: Combatant) -> BattleOutcome:
+    """Play a battle out against the RNG, advancing it exactly as the game would.
+
+    Each strike draws two RNs for hit and, when it connects, one more for
+    crit. Skill procs (Sure Strike, Silencer, ...) are not modelled.
+    """
+    hp = {'attacker': attacker.hp, 'defender': defender.hp}
+    units = {'attacker': attacker, 'defender': defender}
+    other = {'attacker': 'defender', 'defender': 'attacker'}
+    outcome = BattleOutcome(attacker_hp=attacker.hp, defender_hp=defender.hp)
+    start = rng.consumed
+    for side in strike_order(attacker, defender):
+        unit, target = units[side], units[other[side]]
+        for _ in range(2 if unit.brave else 1):
+            if hp['attacker'] <= 0 or hp['defender'] <= 0:
+                break
+            hit = rng.roll_2rn(unit.hit)
+            crit = hit and rng.roll_1rn(unit.crit)
+            damage = 0
+            if hit:
+                damage = max(0, unit.attack - target.defense) * (3 if crit else 1)
+                hp[other[side]] = max(0, hp[other[side]] - damage)
+            outcome.strikes.append((side, hit, crit, damage))
+    outcome.attacker_hp = hp['attacker']
+    outcome.defender_hp = hp['defender']
+    outcome.rns_consumed = rng.consumed - start
+    return outcome
+
+def predict_battles(seeds: Sequence[int], battles: List[Tuple]) -> List[BattleOutcome]:
+    """Predict a planned sequence of battles from one RNG state.
+
+    `battles` holds (attacker_id, attacker, defender_id, defender) tuples in
+    the order the actions will be taken. HP carries over between battles for
+    units that fight more than once.
+    """
+    rng = FE7RNG(seeds)
+    current_hp = {}
+    outcomes = []
+    for attacker_id, attacker, defender_id, defender in battles:
+        attacker = Combatant(**{**attacker.__dict__, 'hp': current_hp.get(attacker_id, attacker.hp)})
+        defender = Combatant(**{**defender.__dict__, 'hp': current_hp.get(defender_id, defender.hp)})
+        outcome = predict_battle(rng, attacker, defender)
+        current_hp[attacker_id] = outcome.attacker_hp
+        current_hp[defender_id] = outcome.defender_hp
+        outcomes.append(outcome)
+    return outcomes
+
+def record_battle(log_path: str, seeds_before, attacker_struct: Dict, defender_struct: Dict,
+                  hp_before: Tuple[int, int], seeds_after, hp_after: Tuple[int, int]):
+    """Append one observed battle to a JSONL session log for later validation"""
+    if seeds_before is None or attacker_struct is None or defender_struct is None:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+    with open(log_path, 'a') as f:
+        f.write(json.dumps({
+            'seeds_before': list(seeds_before),
+            'seeds_after': list(seeds_after) if seeds_after is not None else None,
+            'attacker': attacker_struct,
+            'defender': defender_struct,
+            'hp_before': list(hp_before),
+            'hp_after': list(hp_after)
+        }) + "\n")
+
+def validate_recorded_battles(log_path: str) -> Dict[str, int]:
+    """Replay every battle in a session log and count exact matches.
+
+    A battle matches when the predicted HP of both units agrees with what
+    the game produced; the RNG state after the battle is compared
+    separately because level-ups and other non-combat rolls also draw RNs.
+    """
+    results = {'battles': 0, 'hp_matches': 0, 'rng_matches': 0}
+    if not os.path.exists(log_path):
+        return results
+    with open(log_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            rng = FE7RNG(entry['seeds_before'])
+            attacker = Combatant.from_battle_struct(entry['attacker'])
+            defender = Combatant.from_battle_struct(entry['defender'])
+            attacker.hp, defender.hp = entry['hp_before']
+            outcome = predict_battle(rng, attacker, defender)
+            results['battles'] += 1
+            if [outcome.attacker_hp, outcome.defender_hp] == entry['hp_after']:
+                results['hp_matches'] += 1
+            if entry.get('seeds_after') is not None and list(rng.state) == entry['seeds_after']:
+                results['rng_matches'] += 1
+    return results
+
+if __name__ == "__main__":
+    import sys
+    log = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'battle_log.jsonl')
+    stats = validate_recorded_battles(log)
+    print(f"Validated {stats['battles']} battles: {stats['hp_matches']} HP matches, {stats['rng_matches']} RNG matches")
@@ -0,0 +1,365 @@
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from emblemmind_snapshot import TurnSnapshot
+from agent.action_generator import Action
+from agent.tile_features import terrain_planes
+from utils.fe_data_mappings import ITEM_ATTACK_RANGES
+from utils.terrain_data import IMPASSABLE
+
+# Stat indices in Unit.stats (order written by fe_memory_reader.lua)
+STR, SKL, SPD, LCK, DEF = range(5)
+DOUBLE_ATTACK_SPEED = 4
+KILL_BONUS = 20  # Added per living unit on top of the evaluate_state health term
+
+Move = Tuple[int, Tuple[int, int], int]  # (unit index, destination, target index or -1 to wait)
+
+class SkirmishState:
+    """Small mutable FE7 state for tree search, with apply/undo instead of copies.
+
+    Units are the living players followed by the visible living enemies.
+    Rules follow BatchSimulator: each unit moves through terrain (enemy
+    units block) onto a free tile, then may attack with its first usable
+    weapon; damage is STR - DEF, the defender counters if in range and a
+    4+ attack speed lead adds a follow-up strike. Every strike hits, so
+    the game is deterministic. A phase ends once each of its units has
+    acted; units act in a fixed order, which keeps branching to one
+    unit's options per ply.
+    """
+
+    def __init__(self, snapshot: TurnSnapshot, player_phase: bool = True):
+        self.units = [u for u in snapshot.units if u.is_alive] + \
+                     [e for e in snapshot.enemies if e.is_alive and e.is_visible]
+        self.is_enemy = [u.is_enemy for u in self.units]
+        self.hp = [u.hp[0] for u in self.units]
+        self.max_hp = [max(1, u.hp[1]) for u in self.units]
+        self.pos = [tuple(u.position) for u in self.units]
+        self.attack = [u.stats[STR] if len(u.stats) > STR else 0 for u in self.units]
+        self.defense = [u.stats[DEF] if len(u.stats) > DEF else 0 for u in self.units]
+        self.speed = [u.stats[SPD] if len(u.stats) > SPD else 0 for u in self.units]
+        self.mov = [u.movement_range for u in self.units]
+        self.weapon = [next(((item_id, *ITEM_ATTACK_RANGES[item_id]) for item_id, uses in u.items
+                             if uses > 0 and item_id in ITEM_ATTACK_RANGES), None) for u in self.units]
+        self.player_phase = player_phase
+        self.acted = [self.is_enemy[i] == player_phase or (not self.is_enemy[i] and not u.can_act)
+                      for i, u in enumerate(self.units)]
+        planes = terrain_planes(snapshot.map)
+        self.width, self.height = planes.width, planes.height
+        self._costs = {u.movement_type: planes.movement_cost(u.movement_type).tolist() for u in self.units}
+        self._reach_cache: Dict[tuple, List[Tuple[int, int]]] = {}
+        if self.to_act() < 0 and not self.is_terminal():
+            self._end_phase()
+
+    def key(self) -> tuple:
+        return tuple(self.hp), tuple(self.pos), tuple(self.acted), self.player_phase
+
+    def is_terminal(self) -> bool:
+        players = any(hp > 0 for hp, enemy in zip(self.hp, self.is_enemy) if not enemy)
+        enemies = any(hp > 0 for hp, enemy in zip(self.hp, self.is_enemy) if enemy)
+        return not (players and enemies)
+
+    def to_act(self) -> int:
+        """Index of the unit whose turn it is (-1 if the phase is over)"""
+        for i, acted in enumerate(self.acted):
+            if not acted and self.hp[i] > 0 and self.is_enemy[i] != self.player_phase:
+                return i
+        return -1
+
+    def reach(self, i: int) -> List[Tuple[int, int]]:
+        """Free tiles unit i can end its move on, nearest first"""
+        opponents = tuple(p for j, p in enumerate(self.pos) if self.hp[j] > 0 and self.is_enemy[j] != self.is_enemy[i])
+        occupied = frozenset(p for j, p in enumerate(self.pos) if self.hp[j] > 0 and j != i)
+        key = (i, self.pos[i], opponents, occupied)
+        if key not in self._reach_cache:
+            cost = self._costs[self.units[i].movement_type]
+            blocked = set(opponents)
+            best = {self.pos[i]: 0}
+            heap = [(0, self.pos[i])]
+            while heap:
+                d, (x, y) = heapq.heappop(heap)
+                if d > best[(x, y)]:
+                    continue
+                for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                    if 0 <= nx < self.width and 0 <= ny < self.height and (nx, ny) not in blocked:
+                        step = cost[ny][nx]
+                        nd = d + step
+                        if step < IMPASSABLE and nd <= self.mov[i] and nd < best.get((nx, ny), IMPASSABLE):
+                            best[(nx, ny)] = nd
+                            heapq.heappush(heap, (nd, (nx, ny)))
+            self._reach_cache[key] = [p for p, _ in sorted(best.items(), key=lambda item: item[1]) if p not in occupied]
+        return self._reach_cache[key]
+
+    def in_range(self, i: int, tile: Tuple[int, int], j: int) -> bool:
+        weapon = self.weapon[i]
+        if weapon is None:
+            return False
+        distance = abs(tile[0] - self.pos[j][0]) + abs(tile[1] - self.pos[j][1])
+        return weapon[1] <= distance <= weapon[2]
+
+    def moves(self) -> List[Move]:
+        i = self.to_act()
+        if i < 0:
+            return []
+        targets = [j for j in range(len(self.units)) if self.hp[j] > 0 and self.is_enemy[j] != self.is_enemy[i]]
+        moves = []
+        for tile in self.reach(i):
+            moves.append((i, tile, -1))
+            moves.extend((i, tile, j) for j in targets if self.in_range(i, tile, j))
+        return moves
+
+    def battle(self, i: int, tile: Tuple[int, int], j: int) -> Tuple[int, int]:
+        """(attacker HP, defender HP) after i attacks j from tile"""
+        a_hp, d_hp = self.hp[i], self.hp[j]
+        a_dmg = max(0, self.attack[i] - self.defense[j])
+        d_dmg = max(0, self.attack[j] - self.defense[i])
+        distance = abs(tile[0] - self.pos[j][0]) + abs(tile[1] - self.pos[j][1])
+        counters = self.weapon[j] is not None and self.weapon[j][1] <= distance <= self.weapon[j][2]
+        d_hp -= a_dmg
+        if counters and d_hp > 0:
+            a_hp -= d_dmg
+        if self.speed[i] - self.speed[j] >= DOUBLE_ATTACK_SPEED and a_hp > 0 and d_hp > 0:
+            d_hp -= a_dmg
+        elif counters and self.speed[j] - self.speed[i] >= DOUBLE_ATTACK_SPEED and a_hp > 0 and d_hp > 0:
+            a_hp -= d_dmg
+        return max(0, a_hp), max(0, d_hp)
+
+    def apply(self, move: Move) -> tuple:
+        """Play a move; returns the record undo() needs"""
+        i, tile, j = move
+        record = (i, self.pos[i], self.hp[i], j, self.hp[j] if j >= 0 else 0, self.player_phase, list(self.acted))
+        if j >= 0:
+            self.hp[i], self.hp[j] = self.battle(i, tile, j)
+        self.pos[i] = tile
+        self.acted[i] = True
+        if self.to_act() < 0:
+            self._end_phase()
+        return record
+
+    def _end_phase(self):
+        """The other side moves next, all of its units fresh"""
+        self.player_phase = not self.player_phase
+        self.acted = [enemy == self.player_phase for enemy in self.is_enemy]
+
+    def undo(self, record: tuple):
+        i, position, hp, j, target_hp, player_phase, acted = record
+        self.pos[i], self.hp[i] = position, hp
+        if j >= 0:
+            self.hp[j] = target_hp
+        self.player_phase, self.acted = player_phase, acted
+
+    def evaluate(self) -> float:
+        """Players' view: each living unit adds KILL_BONUS + 10 * HP ratio + 5 / (Manhattan distance to the
+        nearest opponent) for its side. This is the evaluate_state ally term, applied to both sides so
+        that damaging an enemy always helps the players."""
+        players = [(i, self.pos[i]) for i, hp in enumerate(self.hp) if hp > 0 and not self.is_enemy[i]]
+        enemies = [(i, self.pos[i]) for i, hp in enumerate(self.hp) if hp > 0 and self.is_enemy[i]]
+        value = 0.0
+        for sign, side, opponents in ((1, players, enemies), (-1, enemies, players)):
+            for i, (x, y) in side:
+                distance = min((abs(x - px) + abs(y - py) for _, (px, py) in opponents), default=0)
+                value += sign * (KILL_BONUS + self.hp[i] / self.max_hp[i] * 10 + (5 / distance if distance > 0 else 0))
+        return value
+
+    def move_score(self, move: Move) -> float:
+        """Cheap ordering heuristic from the mover's side: the change in its own and its target's
+        evaluate() terms, ignoring the distance terms of every other unit"""
+        i, (x, y), j = move
+        distance = min((abs(x - px) + abs(y - py) for k, (px, py) in enumerate(self.pos)
+                        if self.hp[k] > 0 and self.is_enemy[k] != self.is_enemy[i]), default=0)
+        score = 5 / distance if distance > 0 else 0
+        if j >= 0:
+            a_hp, d_hp = self.battle(i, (x, y), j)
+            score += (a_hp - self.hp[i]) / self.max_hp[i] * 10 - (KILL_BONUS if a_hp == 0 else 0)
+            score += (self.hp[j] - d_hp) / self.max_hp[j] * 10 + (KILL_BONUS if d_hp == 0 else 0)
+        return score
+
+    def to_action(self, move: Move) -> Action:
+        i, tile, j = move
+        if j < 0:
+            return Action(unit=self.units[i], action_type='move', target_position=tile)
+        return Action(unit=self.units[i], action_type='attack', target_position=tile,
+                      target_unit=self.units[j], item_id=self.weapon[i][0])
+
+@dataclass
+class SearchStats:
+    nodes: int = 0
+    cutoffs: int = 0
+    first_move_cutoffs: int = 0  # Cutoffs by the first move tried: a measure of move ordering quality
+    tt_hits: int = 0
+    depth: int = 0  # Deepest fully searched depth, in unit actions
+    elapsed: float = 0.0
+
+    @property
+    def nodes_per_sec(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {'nodes': self.nodes, 'nodes_per_sec': round(self.nodes_per_sec), 'cutoffs': self.cutoffs,
+                'first_move_cutoff_rate': round(self.first_move_cutoffs / self.cutoffs, 3) if self.cutoffs else 0.0,
+                'tt_hits': self.tt_hits, 'depth': self.depth, 'elapsed': round(self.elapsed, 3)}
+
+@dataclass
+class SearchResult:
+    action: Optional[Action]
+    value: float
+    principal_variation: List[Move] = field(default_factory=list)
+    will_kill: bool = False
+    stats: SearchStats = field(default_factory=SearchStats)
+
+class _Timeout(Exception):
+    pass
+
+EXACT, LOWER, UPPER = range(3)
+
+class AlphaBetaSearch:
+    """Deterministic iterative-deepening alpha-beta over alternating player/enemy phases.
+
+    Players maximize SkirmishState.evaluate and enemies minimize it; depth
+    counts unit actions, so a phase of n units is n plies. Moves are
+    ordered by the transposition table's best move, then attacks by
+    SkirmishState.move_score, then waits likewise; move_width keeps
+    only that many waits per node (None keeps all). The search stops at
+    time_budget seconds or max_nodes nodes and returns the last fully
+    searched depth; use max_nodes alone for reproducible benchmarks.
+    """
+
+    name = 'alphabeta'
+
+    def __init__(self, time_budget: Optional[float] = 1.0, max_depth: int = 16,
+                 max_nodes: Optional[int] = None, move_width: Optional[int] = 6):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.move_width = move_width
+        self.table: Dict[tuple, Tuple[int, float, int, Optional[Move]]] = {}
+        self.stats = SearchStats()
+        self._deadline = None
+
+    def _ordered(self, state: SkirmishState, best: Optional[Move]) -> List[Move]:
+        scored_attacks, scored_waits = [], []
+        for move in state.moves():
+            (scored_attacks if move[2] >= 0 else scored_waits).append((state.move_score(move), move))
+        scored_attacks.sort(key=lambda item: -item[0])
+        scored_waits.sort(key=lambda item: -item[0])
+        if self.move_width is not None:
+            scored_waits = scored_waits[:self.move_width]
+        moves = [move for _, move in scored_attacks + scored_waits]
+        if best is not None and best in moves:
+            moves.remove(best)
+            moves.insert(0, best)
+        return moves
+
+    def _alphabeta(self, state: SkirmishState, depth: int, alpha: float, beta: float) -> float:
+        stats = self.stats
+        stats.nodes += 1
+        if (self.max_nodes is not None and stats.nodes > self.max_nodes) or \
+                (self._deadline is not None and stats.nodes % 256 == 0 and time.perf_counter() > self._deadline):
+            raise _Timeout()
+        if depth == 0 or state.is_terminal():
+            return state.evaluate()
+        key = state.key()
+        entry = self.table.get(key)
+        best_move = None
+        if entry is not None:
+            entry_depth, value, flag, best_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                    stats.tt_hits += 1
+                    return value
+        moves = self._ordered(state, best_move)
+        if not moves:
+            return state.evaluate()
+        original_alpha, original_beta = alpha, beta
+        maximizing = state.player_phase
+        best_value = float('-inf') if maximizing else float('inf')
+        for index, move in enumerate(moves):
+            record = state.apply(move)
+            try:
+                value = self._alphabeta(state, depth - 1, alpha, beta)
+            finally:
+                state.undo(record)  # Also on timeout, so the root state stays intact
+            if (value > best_value) if maximizing else (value < best_value):
+                best_value, best_move = value, move
+            if maximizing:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                stats.cutoffs += 1
+                stats.first_move_cutoffs += index == 0
+                break
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= original_beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (depth, best_value, flag, best_move)
+        return best_value
+
+    def principal_variation(self, state: SkirmishState, length: int) -> List[Move]:
+        moves, records = [], []
+        for _ in range(length):
+            entry = self.table.get(state.key())
+            if entry is None or entry[3] is None or state.is_terminal():
+                break
+            moves.append(entry[3])
+            records.append(state.apply(entry[3]))
+        for record in reversed(records):
+            state.undo(record)
+        return moves
+
+    def search(self, snapshot: TurnSnapshot) -> SearchResult:
+        state = SkirmishState(snapshot)
+        self.table = {}
+        self.stats = SearchStats()
+        start = time.perf_counter()
+        self._deadline = start + self.time_budget if self.time_budget else None
+        best_move, best_value = None, state.evaluate()
+        for depth in range(1, self.max_depth + 1):
+            try:
+                value = self._alphabeta(state, depth, float('-inf'), float('inf'))
+            except _Timeout:
+                break
+            entry = self.table.get(state.key())
+            if entry is not None and entry[3] is not None:
+                best_move, best_value = entry[3], value
+            self.stats.depth = depth
+        self.stats.elapsed = time.perf_counter() - start
+        if best_move is None:
+            moves = state.moves()  # Out of time before depth 1 finished: best static move
+            best_move = self._ordered(state, None)[0] if moves else None
+        if best_move is None:
+            return SearchResult(None, best_value, stats=self.stats)
+        will_kill = best_move[2] >= 0 and state.battle(*best_move)[1] == 0
+        return SearchResult(state.to_action(best_move), best_value,
+                            self.principal_variation(state, self.stats.depth), will_kill, self.stats)
+
+class GreedySearch:
+    """One-ply baseline: the player move with the best evaluate() right after it."""
+
+    name = 'greedy'
+
+    def __init__(self, time_budget: Optional[float] = None):
+        self.time_budget = time_budget  # Unused; accepted so every mode shares one constructor signature
+        self.stats = SearchStats()
+
+    def search(self, snapshot: TurnSnapshot) -> SearchResult:
+        state = SkirmishState(snapshot)
+        self.stats = SearchStats()
+        start = time.perf_counter()
+        best_move, best_value = None, float('-inf')
+        for move in state.moves() if state.player_phase else []:
+            record = state.apply(move)
+            value = state.evaluate()
+            state.undo(record)
+            self.stats.nodes += 1
+            if value > best_value:
+                best_move, best_value = move, value
+        self.stats.depth = 1 if best_move is not None else 0
+        self.stats.elapsed = time.perf_counter() - start
+        if best_move is None:
+            return SearchResult(None, state.evaluate(), stats=self.stats)
+        will_kill = best_move[2] >= 0 and state.battle(*best_move)[1] == 0
+        return SearchResult(state.to_action(best_move), best_value, [best_move], will_kill, self.stats)
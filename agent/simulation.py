@@ -0,0 +1,78 @@
+import copy
+from typing import Tuple
+from emblemmind_snapshot import TurnSnapshot
+from agent.action_generator import Action
+from utils.fe_data_mappings import ITEM_ATTACK_RANGES
+
+def simulate_action(snapshot: TurnSnapshot, action: Action) -> Tuple[TurnSnapshot, float]:
+    """
+    Simulate the outcome of an action and return the new state and reward.
+    Handles 'move' and 'attack' actions differently:
+    - 'move': moves the unit to the target position.
+    - 'attack': moves the unit to the target position (the tile it attacks from), then
+      simulates an attack on the target unit if in range.
+    """
+    new_snapshot = copy.deepcopy(snapshot)
+    reward = -1  # Default action cost
+
+    if action.action_type == 'move':
+        # Move the unit to the target position
+        for unit in new_snapshot.units:
+            if unit.id == action.unit.id:
+                unit.position = action.target_position
+                unit.turn_status = 0x42  # Mark as acted
+                break
+        terrain = new_snapshot.map.get_terrain_at(action.target_position[0], action.target_position[1])
+        if terrain in ['F', '^']:
+            reward += 10
+        elif terrain == '#':
+            reward -= 10
+
+    elif action.action_type == 'attack' and action.target_unit is not None:
+        # Find the acting unit and the target enemy in the new snapshot
+        acting_unit = None
+        target_enemy = None
+        for unit in new_snapshot.units:
+            if unit.id == action.unit.id:
+                acting_unit = unit
+                break
+        for enemy in new_snapshot.enemies:
+            # Generic enemies share IDs, so the target is the enemy with its ID on its tile
+            if enemy.id == action.target_unit.id and tuple(enemy.position) == tuple(action.target_unit.position):
+                target_enemy = enemy
+                break
+        if acting_unit is not None and target_enemy is not None:
+            # The unit walks to the tile it attacks from, as in the game
+            acting_unit.position = action.target_position
+            # Check if the enemy is in range for the selected weapon
+            item_id = action.item_id
+            if item_id in ITEM_ATTACK_RANGES:
+                min_range, max_range = ITEM_ATTACK_RANGES[item_id]
+                dist = abs(target_enemy.position[0] - acting_unit.position[0]) + abs(target_enemy.position[1] - acting_unit.position[1])
+                if min_range <= dist <= max_range:
+                    # Simulate damage (simple: strength - defense)
+                    attacker_str = acting_unit.stats[0] if len(acting_unit.stats) > 0 else 0
+                    defender_def = target_enemy.stats[4] if len(target_enemy.stats) > 4 else 0
+                    damage = max(0, attacker_str - defender_def)
+                    target_enemy.hp = (max(0, target_enemy.hp[0] - damage), target_enemy.hp[1])
+                    acting_unit.turn_status = 0x42  # Mark as acted
+                    # Reward for defeating an enemy
+                    if target_enemy.hp[0] == 0:
+                        reward += 50  # Defeating an enemy is highly rewarded
+                    else:
+                        reward += damage  # Reward for damage dealt
+                    # TODO: Add more realistic combat (weapon triangle, crit, counterattack, etc.)
+    else:
+        # For other action types, fallback to old logic (move to target position)
+        for unit in new_snapshot.units:
+            if unit.id == action.unit.id:
+                unit.position = action.target_position
+                unit.turn_status = 0x42  # Mark as acted
+                break
+        terrain = new_snapshot.map.get_terrain_at(action.target_position[0], action.target_position[1])
+        if terrain in ['F', '^']:
+            reward += 10
+        elif terrain == '#':
+            reward -= 10
+
+    return new_snapshot, reward
@@ -1,6 +1,46 @@
+import numpy as np
 from typing import Dict, List
 from emblemmind_snapshot import TurnSnapshot, Unit
 from agent.action_generator import Action
+from agent.tile_features import TileFeatures
+from agent.distance_fields import DistanceFields
+
+FEATURE_SIZE = 10  # Width of the network input built by features_to_array
+
+def features_to_vector(feat: Dict) -> List[float]:
+    """Flatten one evaluate_action feature dict into the network input order"""
+    # Basic features
+    feature_vector = [
+        feat['action_type'] / 3.0,  # Normalize to [0,1]
+        feat['unit_health'],
+        feat['target_distance'] / 10.0,  # Normalize assuming max distance of 10
+        feat['terrain_cost'] / 3.0,  # Normalize to [0,1]
+        feat['threat_level'],
+        feat['potential_damage'] / 20.0,  # Normalize assuming max damage of 20
+        feat['position_value']
+    ]
+
+    # Optional features
+    if 'target_health' in feat:
+        feature_vector.extend([
+            feat['target_health'],
+            float(feat['target_is_enemy'])
+        ])
+    else:
+        feature_vector.extend([0.0, 0.0])
+
+    if 'item_id' in feat:
+        feature_vector.append(feat['item_id'] / 1000.0)  # Normalize item ID
+    else:
+        feature_vector.append(0.0)
+
+    return feature_vector
+
+def features_to_array(features: List[Dict]) -> np.ndarray:
+    """Convert feature dictionaries to a (N, FEATURE_SIZE) float32 array"""
+    if not features:
+        return np.zeros((0, FEATURE_SIZE), dtype=np.float32)
+    return np.array([features_to_vector(feat) for feat in features], dtype=np.float32)
 
 class StateEvaluator:
     """Evaluates game states and potential outcomes"""
@@ -10,6 +50,8 @@ class StateEvaluator:
         self.terrain_map = snapshot.map
         self.units = snapshot.units
         self.enemies = snapshot.enemies
+        self.tile_features = TileFeatures(snapshot)  # Tile-dependent features are gathers from these planes
+        self.distance_fields = DistanceFields(snapshot)
 
     def evaluate_state(self) -> float:
         """Evaluate the current game state"""
@@ -47,12 +89,7 @@ class StateEvaluator:
         num_invisible_enemies = len([e for e in self.enemies if not e.is_visible and e.is_alive])
         min_dist_visible_enemy = self._get_min_enemy_distance(action.unit, only_visible=True)
         min_dist_any_enemy = self._get_min_enemy_distance(action.unit, only_visible=False)
-        hidden_threat = 0.0
-        for enemy in self.enemies:
-            if not enemy.is_visible and enemy.is_alive:
-                dist = self._get_distance(action.target_position, enemy.position)
-                if dist <= 5:  # Arbitrary threat radius
-                    hidden_threat += 1.0 / (dist + 1)
+        hidden_threat = float(self.tile_features.at(self.tile_features.hidden_threat, action.target_position, 0.0))
         features = {
             'action_type': self._encode_action_type(action.action_type),
             'unit_health': action.unit.hp[0] / action.unit.hp[1],
@@ -87,45 +124,24 @@ class StateEvaluator:
         return action_types.get(action_type, -1)
 
     def _get_min_enemy_distance(self, unit: Unit, only_visible: bool = True) -> float:
-        """Get minimum distance to any enemy (optionally only visible)"""
-        min_dist = float('inf')
-        for enemy in self.enemies:
-            if enemy.is_alive and (enemy.is_visible or not only_visible):
-                dist = self._get_distance(unit.position, enemy.position)
-                min_dist = min(min_dist, dist)
-        return min_dist if min_dist != float('inf') else 0
+        """Get minimum movement cost to any enemy (optionally only visible)"""
+        return self.distance_fields.min_enemy_distance(unit, only_visible=only_visible)
 
     def _get_min_ally_distance(self, unit: Unit) -> float:
-        """Get minimum distance to any ally"""
-        min_dist = float('inf')
-        for ally in self.units:
-            if ally.is_alive and ally != unit:
-                dist = self._get_distance(unit.position, ally.position)
-                min_dist = min(min_dist, dist)
-        return min_dist if min_dist != float('inf') else 0
+        """Get minimum movement cost to any ally"""
+        return self.distance_fields.min_ally_distance(unit)
 
     def _get_distance(self, pos1: tuple, pos2: tuple) -> float:
         """Calculate Manhattan distance between two positions"""
         return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
 
     def _get_terrain_cost(self, position: tuple) -> int:
-        """Get terrain cost for a position"""
-        terrain = self.terrain_map.get_terrain_at(position[0], position[1])
-        if terrain in ['F', '^']:  # Forest, Hill
-            return 2
-        elif terrain in ['~', 'M']:  # Water, Mountain
-            return 3
-        return 1
+        """Get terrain cost for a position (2 for forest/hill, 3 for water/mountain)"""
+        return int(self.tile_features.at(self.tile_features.terrain.terrain_cost, position, 1))
 
     def _calculate_threat_level(self, action: Action) -> float:
-        """Calculate threat level for an action's target position"""
-        threat = 0.0
-        for enemy in self.enemies:
-            if enemy.is_visible and enemy.is_alive:
-                dist = self._get_distance(action.target_position, enemy.position)
-                if dist <= 2:  # Consider enemies within 2 tiles
-                    threat += (1 / (dist + 1)) * (enemy.hp[0] / enemy.hp[1])
-        return threat
+        """Calculate threat level for an action's target position (visible enemies within 2 tiles)"""
+        return float(self.tile_features.at(self.tile_features.threat_level, action.target_position, 0.0))
 
     def _estimate_potential_damage(self, action: Action) -> float:
         """Estimate potential damage for an attack action"""
@@ -139,12 +155,8 @@ class StateEvaluator:
 
     def _evaluate_position_value(self, position: tuple) -> float:
         """Evaluate the strategic value of a position"""
-        value = 0.0
-
-        # Check for terrain advantages
-        terrain = self.terrain_map.get_terrain_at(position[0], position[1])
-        if terrain in ['^', 'F']:  # Hill, Forest provide defensive bonuses
-            value += 0.5
+        # Hill, Forest provide defensive bonuses
+        value = float(self.tile_features.at(self.tile_features.terrain.position_value, position, 0.0))
 
         # Check proximity to objectives (simplified)
         # TODO: Add actual objective evaluation
@@ -0,0 +1,167 @@
+import hashlib
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Tuple
+from emblemmind_snapshot import TerrainMap, TurnSnapshot, Unit
+from utils.fe_data_mappings import ITEM_ATTACK_RANGES
+from utils.terrain_data import movement_cost_table, terrain_id_grid, terrain_stat_table
+
+GOOD_TERRAIN_SYMBOLS = {'F', '^', '0C', '0D', '11', '0A', '0B', '1F', 'C', 'T'}  # Forest, Thicket, Hill, Fort, Gate, Throne, etc.
+
+# compute_reward's bonus for moving onto a terrain symbol
+MOVE_REWARD_BY_SYMBOL = {
+    'F': 5, '^': 5, '#': -10, 'M': -10,
+    '0C': 5, '0D': 5, '11': 5,
+    '0A': 10, '0B': 10, '1F': 10,
+    '1A': -10, '12': -10
+}
+TERRAIN_COST_BY_SYMBOL = {'F': 2, '^': 2, '~': 3, 'M': 3}  # StateEvaluator's coarse terrain cost
+POSITION_VALUE_BY_SYMBOL = {'F': 0.5, '^': 0.5}
+
+def terrain_hash(terrain_map: TerrainMap) -> str:
+    """Stable key for a map's terrain (symbols plus raw IDs when exported).
+
+    Memoized on the map object, which is never edited after loading, so
+    per-tile callers of terrain_planes() and the distance caches pay for
+    one attribute lookup instead of hashing the grid.
+    """
+    key = terrain_map.__dict__.get('_terrain_hash')
+    if key is None:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{terrain_map.width}x{terrain_map.height}".encode())
+        for row in terrain_map.grid:
+            digest.update(" ".join(row).encode())
+            digest.update(b"\n")
+        if terrain_map.terrain_ids:
+            digest.update(bytes(tid & 0xFF for row in terrain_map.terrain_ids for tid in row))
+        key = terrain_map._terrain_hash = digest.hexdigest()
+    return key
+
+def unit_max_range(unit: Unit) -> int:
+    """Longest attack range over the unit's usable weapons (1 if it has none)"""
+    ranges = [ITEM_ATTACK_RANGES[item_id][1] for item_id, uses in unit.items
+              if uses > 0 and item_id in ITEM_ATTACK_RANGES]
+    return max(ranges) if ranges else 1
+
+def manhattan_field(height: int, width: int, position) -> np.ndarray:
+    """(H, W) Manhattan distance from one tile"""
+    ys, xs = np.mgrid[0:height, 0:width]
+    return np.abs(xs - position[0]) + np.abs(ys - position[1])
+
+class TerrainPlanes:
+    """Static per-map planes; shared by every snapshot of the same chapter map"""
+
+    def __init__(self, terrain_map: TerrainMap):
+        self.width = terrain_map.width
+        self.height = terrain_map.height
+        self.terrain_ids = terrain_id_grid(terrain_map)
+        self.terrain_def = terrain_stat_table('def')[self.terrain_ids]
+        self.terrain_avoid = terrain_stat_table('avoid')[self.terrain_ids]
+        self.terrain_res = terrain_stat_table('res')[self.terrain_ids]
+        self.terrain_cost = self._symbol_plane(terrain_map, TERRAIN_COST_BY_SYMBOL, 1, np.int8)
+        self.position_value = self._symbol_plane(terrain_map, POSITION_VALUE_BY_SYMBOL, 0.0, np.float32)
+        self.move_reward = self._symbol_plane(terrain_map, MOVE_REWARD_BY_SYMBOL, 0, np.int16)
+        self.good_terrain = self._symbol_plane(terrain_map, {s: True for s in GOOD_TERRAIN_SYMBOLS}, False, bool)
+        self._movement_costs: Dict[str, np.ndarray] = {}
+
+    def _symbol_plane(self, terrain_map: TerrainMap, values: Dict, default, dtype) -> np.ndarray:
+        plane = np.full((self.height, self.width), default, dtype=dtype)
+        for y, row in enumerate(terrain_map.grid[:self.height]):
+            for x, symbol in enumerate(row[:self.width]):
+                if symbol in values:
+                    plane[y, x] = values[symbol]
+        return plane
+
+    def movement_cost(self, move_type: str) -> np.ndarray:
+        """(H, W) uint8 movement cost for a movement type (255 = impassable)"""
+        if move_type not in self._movement_costs:
+            self._movement_costs[move_type] = movement_cost_table(move_type)[self.terrain_ids]
+        return self._movement_costs[move_type]
+
+_terrain_cache: "OrderedDict[str, TerrainPlanes]" = OrderedDict()
+_TERRAIN_CACHE_SIZE = 8
+
+def terrain_planes(terrain_map: TerrainMap) -> TerrainPlanes:
+    """TerrainPlanes for a map, from a small LRU keyed by terrain_hash"""
+    key = terrain_hash(terrain_map)
+    planes = _terrain_cache.get(key)
+    if planes is None:
+        planes = TerrainPlanes(terrain_map)
+        _terrain_cache[key] = planes
+        while len(_terrain_cache) > _TERRAIN_CACHE_SIZE:
+            _terrain_cache.popitem(last=False)
+    else:
+        _terrain_cache.move_to_end(key)
+    return planes
+
+class TileFeatures:
+    """Per-snapshot NumPy feature planes shared by every evaluator.
+
+    Static terrain planes come from terrain_planes(); the unit-dependent
+    planes below are built once here so tile features become array gathers
+    instead of per-tile loops over enemies. All planes are indexed [y, x].
+    """
+
+    def __init__(self, snapshot: TurnSnapshot):
+        self.snapshot = snapshot
+        self.terrain = terrain_planes(snapshot.map)
+        height, width = self.height, self.width = snapshot.map.height, snapshot.map.width
+        shape = (height, width)
+
+        self.ally_mask = np.zeros(shape, dtype=bool)
+        self.enemy_mask = np.zeros(shape, dtype=bool)
+        for unit in snapshot.units:
+            if unit.is_alive and self.in_bounds(unit.position):
+                self.ally_mask[unit.position[1], unit.position[0]] = True
+        for enemy in snapshot.enemies:
+            if enemy.is_alive and self.in_bounds(enemy.position):
+                self.enemy_mask[enemy.position[1], enemy.position[0]] = True
+        self.occupied = self.ally_mask | self.enemy_mask
+
+        # Allies orthogonally adjacent to each tile
+        padded = np.pad(self.ally_mask.astype(np.int8), 1)
+        self.ally_adjacency = (padded[:-2, 1:-1] + padded[2:, 1:-1] + padded[1:-1, :-2] + padded[1:-1, 2:])
+
+        self.threat_level = np.zeros(shape, dtype=np.float32)        # StateEvaluator threat (visible enemies within 2)
+        self.hidden_threat = np.zeros(shape, dtype=np.float32)       # Same idea for unseen enemies within 5
+        self.enemy_threat_count = np.zeros(shape, dtype=np.int16)    # Enemies that can move + strike the tile
+        self.incoming_attack = np.zeros(shape, dtype=np.float32)     # Summed raw attack of those enemies
+        self.nearest_enemy_distance = np.full(shape, np.inf, dtype=np.float32)
+        self._threats = []  # (reach mask, attack) per visible enemy, for expected_damage
+        for enemy in snapshot.enemies:
+            if not enemy.is_alive:
+                continue
+            distance = manhattan_field(height, width, enemy.position)
+            if not enemy.is_visible:
+                self.hidden_threat += np.where(distance <= 5, 1.0 / (distance + 1), 0.0)
+                continue
+            hp_ratio = enemy.hp[0] / enemy.hp[1] if enemy.hp[1] else 0.0
+            self.threat_level += np.where(distance <= 2, hp_ratio / (distance + 1), 0.0)
+            reach = distance <= enemy.movement_range + unit_max_range(enemy)
+            attack = float(enemy.stats[0]) if enemy.stats else 0.0
+            self.enemy_threat_count += reach
+            self.incoming_attack += reach * attack
+            self._threats.append((reach, attack))
+            np.minimum(self.nearest_enemy_distance, distance, out=self.nearest_enemy_distance)
+
+    def in_bounds(self, position: Tuple[int, int]) -> bool:
+        return 0 <= position[0] < self.width and 0 <= position[1] < self.height
+
+    def at(self, plane: np.ndarray, position: Tuple[int, int], default=0):
+        """Gather one tile from a plane, with a default off the map"""
+        if not self.in_bounds(position):
+            return default
+        return plane[position[1], position[0]]
+
+    def gather(self, plane: np.ndarray, positions) -> np.ndarray:
+        """Gather many (x, y) tiles at once"""
+        positions = np.asarray(positions).reshape(-1, 2)
+        return plane[positions[:, 1], positions[:, 0]]
+
+    def expected_damage(self, unit: Unit) -> np.ndarray:
+        """(H, W) damage the unit could take from every enemy that can reach each tile"""
+        defense = (unit.stats[4] if len(unit.stats) > 4 else 0) + self.terrain.terrain_def
+        damage = np.zeros((self.height, self.width), dtype=np.float32)
+        for reach, attack in self._threats:
+            damage += reach * np.maximum(0.0, attack - defense)
+        return damage
@@ -0,0 +1,90 @@
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from typing import Dict, List, Sequence, Tuple
+from emblemmind_snapshot import TurnSnapshot
+from agent.action_generator import Action
+from agent.map_planes import NUM_PLANES, build_map_planes
+from agent.tile_features import TileFeatures
+
+class TileScoringNetwork(nn.Module):
+    """Fully convolutional network mapping [C, H, W] map planes to a [H, W] score map"""
+
+    def __init__(self, in_channels: int = NUM_PLANES, hidden: int = 32):
+        super(TileScoringNetwork, self).__init__()
+
+        # Padding keeps H x W; the dilated layer widens the receptive field to 9x9
+        self.network = nn.Sequential(
+            nn.Conv2d(in_channels, hidden, kernel_size=3, padding=1),
+            nn.ReLU(),
+            nn.Conv2d(hidden, hidden, kernel_size=3, padding=1),
+            nn.ReLU(),
+            nn.Conv2d(hidden, hidden, kernel_size=3, padding=2, dilation=2),
+            nn.ReLU(),
+            nn.Conv2d(hidden, 1, kernel_size=1)
+        )
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """[B, C, H, W] planes -> [B, H, W] tile scores"""
+        return self.network(x).squeeze(1)
+
+class TileScorer:
+    """NumPy-facing adapter: one forward pass per unit, then index any tiles"""
+
+    def __init__(self, model: TileScoringNetwork = None):
+        self.model = model or TileScoringNetwork()
+        self.optimizer = optim.Adam(self.model.parameters(), lr=0.001)
+
+    def score_map(self, planes: np.ndarray) -> np.ndarray:
+        """[C, H, W] planes -> [H, W] score map"""
+        with torch.no_grad():
+            scores = self.model(torch.from_numpy(planes).unsqueeze(0))
+        return scores[0].numpy()
+
+    @staticmethod
+    def score_tiles(score_map: np.ndarray, tiles: Sequence[Tuple[int, int]]) -> np.ndarray:
+        """Read scores for (x, y) tiles by fancy indexing"""
+        if len(tiles) == 0:
+            return np.zeros(0, dtype=np.float32)
+        tiles = np.asarray(tiles)
+        return score_map[tiles[:, 1], tiles[:, 0]]
+
+    def evaluate_actions(self, snapshot: TurnSnapshot, actions: List[Action]) -> List[float]:
+        """Score actions by their target tile, one convolutional pass per acting unit"""
+        by_unit: Dict[int, List[int]] = {}
+        for i, action in enumerate(actions):
+            by_unit.setdefault(action.unit.id, []).append(i)
+        scores = [0.0] * len(actions)
+        tile_features = TileFeatures(snapshot)
+        for indices in by_unit.values():
+            unit = actions[indices[0]].unit
+            score_map = self.score_map(build_map_planes(snapshot, unit, tile_features))
+            tile_scores = self.score_tiles(score_map, [actions[i].target_position for i in indices])
+            for i, score in zip(indices, tile_scores.tolist()):
+                actions[i].score = score
+                scores[i] = score
+        return scores
+
+    def train(self, planes: np.ndarray, tiles: Sequence[Tuple[int, int]], targets: Sequence[float]) -> float:
+        """Regress the score at each chosen tile towards its target ([B, C, H, W] planes, same H x W)"""
+        tiles = np.asarray(tiles)
+        self.optimizer.zero_grad()
+        score_maps = self.model(torch.from_numpy(np.ascontiguousarray(planes, dtype=np.float32)))
+        batch = torch.arange(len(tiles))
+        predicted = score_maps[batch, torch.from_numpy(tiles[:, 1]), torch.from_numpy(tiles[:, 0])]
+        loss = nn.functional.mse_loss(predicted, torch.tensor(targets, dtype=torch.float32))
+        loss.backward()
+        self.optimizer.step()
+        return loss.item()
+
+    def save_model(self, path: str):
+        torch.save({
+            'model_state_dict': self.model.state_dict(),
+            'optimizer_state_dict': self.optimizer.state_dict()
+        }, path)
+
+    def load_model(self, path: str):
+        checkpoint = torch.load(path)
+        self.model.load_state_dict(checkpoint['model_state_dict'])
+        self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
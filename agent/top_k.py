@@ -0,0 +1,77 @@
+import heapq
+import numpy as np
+from typing import Callable, Iterable, List, Optional, Sequence
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without sorting all of them"""
+    scores = np.asarray(scores)
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, kind='stable')
+    # argpartition is O(n); only the k survivors get sorted
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+class StreamingTopK:
+    """Bounded min-heap keeping the k best (score, item) pairs seen so far
+
+    Ties keep the item seen first.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap = []
+        self._seen = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def threshold(self) -> float:
+        """Score an item must beat to get in (-inf until k items are held)"""
+        return self._heap[0][0] if len(self._heap) >= self.k > 0 else float('-inf')
+
+    def push(self, score: float, item) -> bool:
+        """Offer an item; returns True if it was kept"""
+        if self.k <= 0:
+            return False
+        entry = (score, -self._seen, item)
+        self._seen += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if score > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def results(self) -> List:
+        """Kept items, best first"""
+        return [item for _, _, item in sorted(self._heap, key=lambda e: (-e[0], -e[1]))]
+
+def stream_top_k(items: Iterable, score_batch: Callable[[List], Sequence[float]], k: int,
+                 upper_bound: Optional[Callable[[object], float]] = None, batch_size: int = 64) -> List:
+    """Top k of a stream, scoring it in batches so memory scales with k + batch_size
+
+    upper_bound, if given, is a cheap optimistic score; once k items are held,
+    anything whose bound cannot beat the current k-th best is skipped unscored.
+    """
+    best = StreamingTopK(k)
+    batch = []
+
+    def flush():
+        for item, score in zip(batch, score_batch(batch)):
+            best.push(float(score), item)
+        batch.clear()
+
+    for item in items:
+        if upper_bound is not None and len(best) >= k and upper_bound(item) <= best.threshold:
+            continue
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return best.results()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from agent.inference_config import InferenceConfig
+from agent.state_evaluator import FEATURE_SIZE
+
+BATCH_SIZES = [10, 100, 1000, 5000]
+MODES = [
+    InferenceConfig(num_threads=1),
+    InferenceConfig(num_threads=1, quantize=True),
+    InferenceConfig(num_threads=1, freeze=True),
+    InferenceConfig(num_threads=1, quantize=True, freeze=True),
+    InferenceConfig(num_threads=4)
+]
+
+def time_call(fn, repeats: int) -> float:
+    """Median seconds per call after a short warm-up"""
+    for _ in range(3):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples))
+
+def report(name: str, batch_size: int, seconds: float):
+    print(f"{name:<22} batch {batch_size:>5}: {seconds * 1000:8.3f} ms  {batch_size / seconds:12.0f} actions/s")
+
+def main():
+    model_path = sys.argv[1] if len(sys.argv) > 1 else None
+    rng = np.random.default_rng(0)
+    batches = {n: rng.random((n, FEATURE_SIZE), dtype=np.float32) for n in BATCH_SIZES}
+
+    from agent.neural_network import NeuralNetworkInterface
+    from agent.numpy_network import NumpyActionEvaluator
+    network = NeuralNetworkInterface()
+    if model_path:
+        network.load_model(model_path)
+
+    print("==== Action evaluator inference benchmark ====")
+    reference = {n: network.score_array(batches[n]) for n in BATCH_SIZES}
+    for config in MODES:
+        network.configure_inference(config)
+        for n in BATCH_SIZES:
+            seconds = time_call(lambda: network.score_array(batches[n]), repeats=50)
+            report(config.mode_name, n, seconds)
+        max_error = max(float(np.abs(network.score_array(batches[n]) - reference[n]).max()) for n in BATCH_SIZES)
+        print(f"{config.mode_name:<22} max abs error vs eager fp32: {max_error:.5f}")
+
+    # Torch-free path used by ActionCoordinator (agent/numpy_network.py)
+    weights_path = os.path.join(tempfile.mkdtemp(), 'benchmark_weights.npz')
+    network.export_numpy_weights(weights_path)
+    evaluator = NumpyActionEvaluator.load(weights_path)
+    for n in BATCH_SIZES:
+        seconds = time_call(lambda: evaluator.forward(batches[n]), repeats=50)
+        report('numpy', n, seconds)
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ import os
 from utils.fe_state_parser import FEStateParser
 from utils.fe_data_mappings import (
     get_item_name, get_character_name, get_class_name,
-    get_weapon_type
+    get_weapon_type, get_class_movement, get_movement_type
 )
 
 @dataclass
@@ -145,8 +145,14 @@ class Unit:
 
     @property
     def movement_range(self) -> int:
-        """Get the unit's movement range"""
-        return self.stats[6] if len(self.stats) > 6 else 0
+        """Get the unit's movement range (class base plus the MOV bonus stored in RAM)"""
+        bonus = self.stats[6] if len(self.stats) > 6 else 0
+        return get_class_movement(self.class_id) + bonus
+
+    @property
+    def movement_type(self) -> str:
+        """Get the unit's movement cost type (Foot, Armours, Fliers, ...)"""
+        return get_movement_type(self.class_id)
 
     @property
     def class_name(self) -> str:
@@ -170,6 +176,7 @@ class TerrainMap:
     height: int
     grid: List[List[str]]  # 2D grid of terrain symbols
     legend: Dict[int, str]  # Mapping of terrain symbols to names
+    terrain_ids: Optional[List[List[int]]] = None  # Raw terrain IDs (tiles.json keys), if exported
 
     def get_terrain_at(self, x: int, y: int) -> str:
         """Get terrain symbol at given coordinates"""
@@ -177,6 +184,12 @@ class TerrainMap:
             return self.grid[y][x]
         return None
 
+    def get_terrain_id_at(self, x: int, y: int) -> Optional[int]:
+        """Get the raw terrain ID at given coordinates, or None if not exported"""
+        if self.terrain_ids and 0 <= x < self.width and 0 <= y < self.height:
+            return self.terrain_ids[y][x]
+        return None
+
 @dataclass
 class TurnSnapshot:
     """Represents the complete game state at a given turn"""
@@ -187,6 +200,7 @@ class TurnSnapshot:
     map: TerrainMap
     units: List[Unit]
     enemies: List[Unit]
+    rng_state: Optional[Tuple[int, int, int]] = None  # Combat RNG seeds (see agent/rng.py)
 
     @property
     def phase_text(self) -> str:
@@ -242,7 +256,8 @@ class TurnSnapshot:
             width=map_data['width'],
             height=map_data['height'],
             grid=map_data['terrain_grid'],
-            legend=map_data['legend']
+            legend=map_data['legend'],
+            terrain_ids=map_data.get('terrain_ids')
         )
 
         # Get turn_phase from turn_phase_raw
@@ -264,7 +279,8 @@ class TurnSnapshot:
             ),
             map=terrain_map,
             units=units,
-            enemies=enemies
+            enemies=enemies,
+            rng_state=state_data['game_state'].get('rn_seeds')
         )
 
     @staticmethod
@@ -310,11 +326,21 @@ class TurnSnapshot:
                             break
                         legend[j - legend_start] = legend_line
 
+            # Parse raw terrain IDs (newer fe_memory_reader.lua only)
+            terrain_ids = None
+            for i in range(terrain_end, len(lines)):
+                if lines[i].strip().startswith("Terrain IDs:"):
+                    rows = [line.split() for line in lines[i + 1:i + 1 + height]]
+                    if len(rows) == height and all(len(row) == width for row in rows):
+                        terrain_ids = [[int(tid, 16) for tid in row] for row in rows]
+                    break
+
             return {
                 'width': width,
                 'height': height,
                 'terrain_grid': terrain_grid,
-                'legend': legend
+                'legend': legend,
+                'terrain_ids': terrain_ids
             }
 
         except Exception as e:
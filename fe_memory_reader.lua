@@ -88,6 +88,9 @@ local MEMORY = {
   camera_x = 0x0202BC2C,       -- Camera pixel position
   camera_y = 0x0202BC2E,       -- Camera pixel position
 
+  -- Combat RNG: three 16-bit seeds (IWRAM), advanced by every RN the game draws
+  rn_seeds = 0x03000000,
+
   -- Character data - exact offsets from CodeBreaker codes
   character = {
     base_addr = 0x0202BD50,    -- Starting address for character slot 1
@@ -530,6 +533,11 @@ local function export_game_state()
     cursor_y = read_byte(MEMORY.cursor_y),
     camera_x = read_word(MEMORY.camera_x),
     camera_y = read_word(MEMORY.camera_y),
+    rn_seeds = {
+      read_word(MEMORY.rn_seeds),
+      read_word(MEMORY.rn_seeds + 2),
+      read_word(MEMORY.rn_seeds + 4)
+    },
     characters = {},
     enemies = {}
   }
@@ -558,12 +566,13 @@ local function export_game_state()
   end
 
   -- Generate a simple hash of state to detect changes
-  local state_hash = string.format("%d-%d-%d-%d-%d-%d-%d-%d-%d-%d",
+  local state_hash = string.format("%d-%d-%d-%d-%d-%d-%d-%d-%d-%d-%d-%d-%d",
     state.turn_phase, state.current_turn, state.chapter_id,
     state.cursor_x, state.cursor_y, char_count, enemy_count,
     state.characters[1] and state.characters[1].current_hp or 0,
     state.enemies[1] and state.enemies[1].current_hp or 0,
-    state.enemies[1] and state.enemies[1].x_pos or 0)
+    state.enemies[1] and state.enemies[1].x_pos or 0,
+    state.rn_seeds[1], state.rn_seeds[2], state.rn_seeds[3])
 
   -- Log to console if enabled and only on specified frames to reduce spam
   if enable_console_logging and (frame_counter % console_log_frequency == 0) then
@@ -579,6 +588,7 @@ local function export_game_state()
     console.log(string.format("Gold: %d", state.gold))
     console.log(string.format("Cursor Position: (%d, %d)", state.cursor_x, state.cursor_y))
     console.log(string.format("Camera Position: (%d, %d)", state.camera_x, state.camera_y))
+    console.log(string.format("RN Seeds: %04X %04X %04X", state.rn_seeds[1], state.rn_seeds[2], state.rn_seeds[3]))
     console.log(string.format("Character Count: %d", char_count))
     console.log(string.format("Enemy Count: %d", enemy_count))
 
@@ -639,6 +649,7 @@ local function export_game_state()
       file:write(string.format("cursor_y=%d\n", state.cursor_y))
       file:write(string.format("camera_x=%d\n", state.camera_x))
       file:write(string.format("camera_y=%d\n", state.camera_y))
+      file:write(string.format("rn_seeds=%d,%d,%d\n", state.rn_seeds[1], state.rn_seeds[2], state.rn_seeds[3]))
 
       -- Add REALTIME_DATA section
       file:write("REALTIME_DATA\n")
@@ -914,6 +925,16 @@ local function buildTerrainMap()
       file:write("H = House/Village, C = Castle/Fort, = = Road/Bridge, # = Wall, D = Door/Gate\n")
       file:write("R = Floor/Roof, T = Throne, B = Brace, X = Dark terrain\n")
 
+      -- Write the raw terrain IDs (symbols above are ambiguous, e.g. Fort/Chest/C Room all map to "C")
+      file:write("\nTerrain IDs:\n")
+      for y = 0, height-1 do
+        local ids = {}
+        for x = 0, width-1 do
+          table.insert(ids, string.format("%02X", map[y][x]))
+        end
+        file:write(table.concat(ids, " ") .. "\n")
+      end
+
       -- Close the file
       file:close()
 
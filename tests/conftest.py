@@ -0,0 +1,15 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from emblemmind_snapshot import TurnSnapshot
+
+DATA_DIR = os.path.join(ROOT, 'data')
+
+@pytest.fixture
+def snapshot():
+    """The sample FE7 state shipped in data/ (Lyn, Sain and Kent against Glass and four Bandits)"""
+    return TurnSnapshot.from_files(os.path.join(DATA_DIR, 'fe_state.txt'), os.path.join(DATA_DIR, 'fe_map.txt'))
@@ -0,0 +1,33 @@
+import numpy as np
+from agent.action_coordinator import ActionCoordinator
+from agent.action_generator import ActionGenerator
+from agent.action_pruning import ActionPruner, pareto_front, pareto_representatives
+
+def test_every_dropped_row_has_a_front_row_at_least_as_good():
+    rng = np.random.default_rng(0)
+    vectors = rng.integers(0, 3, size=(40, 3)).astype(np.float64)
+    front = pareto_front(vectors)
+    representative, dominators = pareto_representatives(vectors)
+    for i in range(len(vectors)):
+        j = representative[i]
+        assert front[j]
+        assert (vectors[j] >= vectors[i]).all()
+        assert (j == i) == bool(front[i])
+        assert (dominators[i] == 0) == (not any(((v >= vectors[i]).all() and (v > vectors[i]).any()) for v in vectors))
+
+def test_fallbacks_cover_every_pruned_action(snapshot):
+    actions = ActionGenerator(snapshot).generate_all_actions()
+    pruner = ActionPruner()
+    coordinator = ActionCoordinator(snapshot)
+    kept, fallbacks = pruner.prune_with_fallbacks(snapshot, actions, coordinator.state_evaluator.tile_features,
+                                                  coordinator.state_evaluator.distance_fields)
+    assert kept == ActionPruner().prune(snapshot, actions, coordinator.state_evaluator.tile_features,
+                                        coordinator.state_evaluator.distance_fields)
+    dropped = [a for spare in fallbacks.values() for a in spare]
+    assert dropped
+    assert len(kept) + len(dropped) == len(actions)
+    assert {id(a) for a in kept + dropped} == {id(a) for a in actions}
+    for i, spare in fallbacks.items():
+        for action in spare:
+            assert action.unit is kept[i].unit
+            assert action.action_type == kept[i].action_type
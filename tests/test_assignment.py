@@ -0,0 +1,135 @@
+import gc
+import itertools
+import random
+import time
+import pytest
+from agent.assignment import (MAX_SUBSETS, AttackOption, _resolve_target, _SubsetTable, _target_value, hungarian,
+                              solve_assignment, two_rn_hit_probability)
+
+def brute_force_hungarian(weights):
+    rows, columns = len(weights), len(weights[0])
+    return max(sum(weights[r][c] for r, c in enumerate(perm)) for perm in itertools.permutations(range(columns), rows))
+
+@pytest.mark.parametrize('seed', range(20))
+def test_hungarian_matches_brute_force(seed):
+    rng = random.Random(seed)
+    rows = rng.randint(1, 4)
+    columns = rng.randint(rows, 5)
+    weights = [[rng.uniform(-5, 10) for _ in range(columns)] for _ in range(rows)]
+    assignment = hungarian(weights)
+    assert len(set(assignment)) == rows
+    assert sum(weights[r][c] for r, c in enumerate(assignment)) == pytest.approx(brute_force_hungarian(weights))
+
+def random_options(rng, attackers, targets, tiles):
+    options = []
+    for attacker in range(attackers):
+        for target in range(targets):
+            for tile in rng.sample(tiles, rng.randint(0, 2)):
+                p = rng.choice([0.3, 0.6, 0.9, 1.0])
+                damage = [(rng.randint(3, 12), p), (0, 1 - p)] if p < 1 else [(rng.randint(3, 12), 1.0)]
+                options.append(AttackOption(attacker, target, tile, 1, damage, risk=rng.choice([0.0, 0.0, 0.2, 0.5])))
+    return options
+
+def spread_options(rng, attackers, targets):
+    """Enemies two tiles apart; each attacker reaches one to four of them, from up to three tiles next to each"""
+    spots = rng.sample([(x, y) for x in range(0, 16, 2) for y in range(0, 12, 2)], targets)
+    options = []
+    for attacker in range(attackers):
+        for target in rng.sample(range(targets), rng.randint(1, 4)):
+            x, y = spots[target]
+            tiles = rng.sample([(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)], rng.randint(1, 3))
+            for item_id in range(rng.randint(1, 2)):
+                p = rng.choice([0.3, 0.6, 0.9, 1.0])
+                damage = [(rng.randint(3, 12), p), (0, 1 - p)] if p < 1 else [(rng.randint(3, 12), 1.0)]
+                risk = rng.choice([0.0, 0.0, 0.2, 0.5])
+                options.extend(AttackOption(attacker, target, tile, item_id, damage, risk) for tile in tiles)
+    return options
+
+def brute_force_value(options, enemy_hp, values):
+    by_attacker = {}
+    for option in options:
+        by_attacker.setdefault(option.attacker, []).append(option)
+    best = 0.0
+    for choice in itertools.product(*[[None] + group for group in by_attacker.values()]):
+        chosen = [o for o in choice if o is not None]
+        if len({o.tile for o in chosen}) < len(chosen):
+            continue
+        value = sum(_target_value([o for o in chosen if o.target == t], hp, values[t])[0] for t, hp in enemy_hp.items())
+        best = max(best, value)
+    return best
+
+@pytest.mark.parametrize('max_subsets', [MAX_SUBSETS, 1])  # 1: no target gets a subset table
+@pytest.mark.parametrize('seed', range(25))
+def test_solve_assignment_is_optimal_on_small_instances(seed, max_subsets, monkeypatch):
+    monkeypatch.setattr('agent.assignment.MAX_SUBSETS', max_subsets)
+    rng = random.Random(seed)
+    tiles = [(x, 0) for x in range(4)]
+    targets = rng.randint(1, 3)
+    options = random_options(rng, rng.randint(1, 4), targets, tiles)
+    enemy_hp = {t: rng.randint(5, 20) for t in range(targets)}
+    values = {t: rng.choice([1.0, 2.0]) for t in range(targets)}
+    plan = solve_assignment(options, enemy_hp, values, time_limit=None)
+    assert plan.optimal
+    assert len({o.attacker for o in plan.steps}) == len(plan.steps)
+    assert len({o.tile for o in plan.steps}) == len(plan.steps)
+    assert plan.value == pytest.approx(brute_force_value(options, enemy_hp, values))
+
+@pytest.mark.parametrize('seed', range(5))
+def test_solve_assignment_proves_10x10_plans_in_milliseconds(seed):
+    rng = random.Random(seed)
+    options = spread_options(rng, 10, 10)
+    enemy_hp = {t: rng.randint(5, 20) for t in range(10)}
+    start = time.perf_counter()
+    plan = solve_assignment(options, enemy_hp, time_limit=None)
+    assert time.perf_counter() - start < 0.1  # About 10-20ms here
+    assert plan.optimal
+    assert plan.nodes < 1000
+    assert len({o.tile for o in plan.steps}) == len(plan.steps)
+
+def test_solve_assignment_keeps_to_time_limit():
+    rng = random.Random(0)
+    options = random_options(rng, 10, 10, [(x, y) for x in range(5) for y in range(4)])  # Every pair, shared tiles
+    enemy_hp = {t: rng.randint(5, 20) for t in range(10)}
+    gc.collect()  # Otherwise a full collection of the test session's heap can land inside the 20ms
+    start = time.perf_counter()
+    plan = solve_assignment(options, enemy_hp, time_limit=0.02)
+    assert time.perf_counter() - start < 0.03
+    assert len({o.attacker for o in plan.steps}) == len(plan.steps)
+    assert len({o.tile for o in plan.steps}) == len(plan.steps)
+
+def test_solve_assignment_moves_attackers_to_free_tiles():
+    # Attacker 0 can strike from either tile, attacker 1 only from the first; both fit once 0 takes the second
+    options = [AttackOption(0, 0, tile, 1, [(10, 1.0)]) for tile in [(0, 0), (1, 0)]]
+    options.append(AttackOption(1, 1, (0, 0), 1, [(10, 1.0)]))
+    plan = solve_assignment(options, {0: 10, 1: 10})
+    assert plan.expected_kills == 2
+    assert {(o.attacker, o.tile) for o in plan.steps} == {(0, (1, 0)), (1, (0, 0))}
+
+@pytest.mark.parametrize('seed', range(5))
+def test_subset_table_matches_resolve_target(seed):
+    rng = random.Random(seed)
+    attacks = []
+    for attacker in range(4):
+        for item_id in range(rng.randint(1, 2)):
+            damage = [(rng.randint(0, 9), 0.5), (rng.randint(3, 12), 0.3), (0, 0.2)]
+            attacks.append(AttackOption(attacker, 0, (attacker, 0), item_id, damage, rng.choice([0.0, 0.3])))
+    rng.shuffle(attacks)  # Any order stands in for finishing order
+    tiles = {id(a): {tile: a for tile in rng.sample([(0, 1), (1, 0), (1, 1)], rng.randint(1, 2))} for a in attacks}
+    table = _SubsetTable(attacks, 15, tiles)
+    choices = [[None] + [a for a in attacks if a.attacker == attacker] for attacker in range(4)]
+    for chosen in itertools.product(*choices):
+        subset = [a for a in attacks if a in chosen]
+        index = sum(table.code[id(a)] for a in subset)
+        remaining, risk = _resolve_target(subset, 15)
+        assert table.kills[index] == pytest.approx(remaining.get(0, 0.0))
+        assert table.risks[index] == pytest.approx(risk)
+        assert table.seated[index] == any(len(set(seats)) == len(seats)
+                                          for seats in itertools.product(*(tiles[id(a)] for a in subset)))
+
+def test_two_rn_hit_probability():
+    assert two_rn_hit_probability(0) == 0
+    assert two_rn_hit_probability(100) == 1
+    assert two_rn_hit_probability(150) == 1
+    assert two_rn_hit_probability(50) == 0.505  # a + b <= 99: 5050 of the 10000 pairs
+    assert two_rn_hit_probability(80) == 0.922  # Only the 780 pairs with a + b >= 160 miss
+    assert two_rn_hit_probability.cache_info().currsize > 0
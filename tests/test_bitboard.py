@@ -0,0 +1,70 @@
+import random
+import numpy as np
+import pytest
+from agent import distance_fields
+from agent.bitboard import BitboardLayout, SnapshotBoards, popcount
+from utils.fe_data_mappings import ITEM_ATTACK_RANGES
+
+def all_tiles(layout):
+    return [(x, y) for y in range(layout.height) for x in range(layout.width)]
+
+def test_shift_drops_tiles_instead_of_wrapping_rows():
+    layout = BitboardLayout(5, 4)
+    right_edge = layout.from_positions([(4, y) for y in range(4)])
+    left_edge = layout.from_positions([(0, y) for y in range(4)])
+    assert layout.shift(right_edge, 1, 0) == 0
+    assert layout.shift(left_edge, -1, 0) == 0
+    assert layout.shift(layout.bit(0, 3), 0, 1) == 0
+    assert layout.shift(layout.bit(0, 0), 0, -1) == 0
+    rng = random.Random(0)
+    for _ in range(50):
+        tiles = rng.sample(all_tiles(layout), 6)
+        dx, dy = rng.randint(-3, 3), rng.randint(-3, 3)
+        expected = {(x + dx, y + dy) for x, y in tiles if 0 <= x + dx < 5 and 0 <= y + dy < 4}
+        assert set(layout.positions(layout.shift(layout.from_positions(tiles), dx, dy))) == expected
+
+def test_ring_matches_manhattan_distance():
+    layout = BitboardLayout(7, 6)
+    board = layout.from_positions([(1, 1), (5, 4)])
+    for min_range, max_range in ((1, 1), (1, 2), (2, 3)):
+        ring = layout.ring(board, min_range, max_range)
+        expected = {(x, y) for x, y in all_tiles(layout)
+                    if any(min_range <= abs(x - sx) + abs(y - sy) <= max_range for sx, sy in ((1, 1), (5, 4)))}
+        assert set(layout.positions(ring)) == expected
+        assert popcount(ring) == len(expected)
+
+@pytest.mark.parametrize('size', [(5, 4), (15, 10), (9, 9)])
+def test_mask_and_word_round_trips(size):
+    layout = BitboardLayout(*size)
+    rng = np.random.default_rng(sum(size))
+    mask = rng.random((layout.height, layout.width)) < 0.4
+    board = layout.from_mask(mask)
+    assert np.array_equal(layout.to_mask(board), mask)
+    assert layout.from_words(layout.words(board)) == board
+    assert layout.words(board).dtype == np.dtype('<u8')
+    assert set(layout.positions(board)) == {(int(x), int(y)) for y, x in zip(*np.nonzero(mask))}
+
+def old_enemy_can_attack_tile(enemy, x, y, snapshot):
+    """trial_run's nested loop before the bitboards"""
+    move_range = enemy.movement_range
+    for item_id, uses in enemy.items:
+        if uses > 0 and item_id in ITEM_ATTACK_RANGES:
+            min_range, max_range = ITEM_ATTACK_RANGES[item_id]
+            for dx in range(-move_range, move_range + 1):
+                for dy in range(-move_range, move_range + 1):
+                    ex, ey = enemy.position[0] + dx, enemy.position[1] + dy
+                    if 0 <= ex < snapshot.map.width and 0 <= ey < snapshot.map.height:
+                        if abs(dx) + abs(dy) <= move_range:
+                            dist = abs(ex - x) + abs(ey - y)
+                            if min_range <= dist <= max_range:
+                                if not snapshot.get_unit_at(ex, ey):
+                                    return True
+    return False
+
+def test_enemy_threat_matches_the_old_loop_on_every_tile(snapshot, monkeypatch):
+    monkeypatch.setattr(distance_fields, '_path_tables', {})  # Manhattan movement, as the old loop
+    boards = SnapshotBoards(snapshot)
+    for enemy in snapshot.enemies:
+        threat = boards.enemy_threat(enemy)
+        for x, y in all_tiles(boards.layout):
+            assert boards.layout.test(threat, (x, y)) == old_enemy_can_attack_tile(enemy, x, y, snapshot)
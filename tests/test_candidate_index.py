@@ -0,0 +1,75 @@
+from agent.action_generator import Action
+from agent.candidate_index import CandidateIndex
+
+def bandit_twins(snapshot):
+    bandits = [e for e in snapshot.enemies if e.is_alive and e.is_visible and e.name == 'Bandit']
+    return next((a, b) for a in bandits for b in bandits if a is not b and a.id == b.id)
+
+def test_killing_one_same_id_enemy_keeps_attacks_on_its_twin(snapshot):
+    lyn, sain = snapshot.units[0], snapshot.units[1]
+    first, second = bandit_twins(snapshot)
+    attacks = [Action(lyn, 'attack', (0, 0), first, item_id=1), Action(lyn, 'attack', (0, 1), second, item_id=1)]
+    index = CandidateIndex([lyn, sain], [attacks, [Action(sain, 'move', (0, 0))]], snapshot)
+    old_position = sain.position
+    sain.position = (0, 2)
+    index.apply(sain, old_position, killed=first)
+    assert index.live_actions(lyn.id) == [attacks[1]]
+    assert index.has_attack(lyn.id)
+
+def test_occupied_tiles_block_candidates(snapshot):
+    lyn, sain = snapshot.units[0], snapshot.units[1]
+    moves = [Action(lyn, 'move', (0, 0)), Action(lyn, 'move', (0, 1))]
+    index = CandidateIndex([lyn, sain], [moves, [Action(sain, 'move', (0, 0))]], snapshot)
+    old_position = sain.position
+    sain.position = (0, 0)
+    index.apply(sain, old_position)
+    assert index.live_actions(lyn.id) == [moves[1]]
+
+def test_fallback_tile_is_promoted_when_the_kept_tile_is_occupied(snapshot):
+    lyn, sain = snapshot.units[0], snapshot.units[1]
+    kept, spare, other = Action(lyn, 'move', (0, 0)), Action(lyn, 'move', (0, 1)), Action(lyn, 'move', (1, 3))
+    index = CandidateIndex([lyn, sain], [[kept, other], [Action(sain, 'move', (0, 0))]], snapshot,
+                           fallbacks=[{0: [spare]}, {}])
+    assert index.live_actions(lyn.id) == [kept, other]
+    old_position = sain.position
+    sain.position = (0, 0)
+    index.apply(sain, old_position)
+    assert index.live_actions(lyn.id) == [spare, other]
+    old_position = sain.position
+    sain.position = (0, 2)
+    index.apply(sain, old_position)
+    assert index.live_actions(lyn.id) == [kept, other]
+
+def test_attack_slot_counts_while_a_fallback_is_live(snapshot):
+    lyn, sain = snapshot.units[0], snapshot.units[1]
+    bandit = next(e for e in snapshot.enemies if e.name == 'Bandit')
+    x, y = bandit.position
+    kept, spare = Action(lyn, 'attack', (x - 1, y), bandit, item_id=1), Action(lyn, 'attack', (x, y - 1), bandit, item_id=1)
+    index = CandidateIndex([lyn, sain], [[kept], [Action(sain, 'move', (x - 1, y))]], snapshot, fallbacks=[{0: [spare]}, {}])
+    old_position = sain.position
+    sain.position = (x - 1, y)
+    index.apply(sain, old_position)
+    assert index.has_attack(lyn.id)
+    assert index.live_actions(lyn.id) == [spare]
+    index.apply(sain, sain.position, killed=bandit)
+    assert not index.has_attack(lyn.id)
+    assert index.live_actions(lyn.id) == []
+
+def test_attack_version_changes_only_when_the_unit_s_attacks_go_stale(snapshot):
+    lyn, sain, kent = snapshot.units
+    first, second = bandit_twins(snapshot)
+    attacks = [Action(lyn, 'attack', (0, 0), first, item_id=1), Action(lyn, 'attack', (0, 1), second, item_id=1)]
+    index = CandidateIndex([lyn, sain, kent], [attacks, [Action(sain, 'move', (5, 5))], [Action(kent, 'move', (5, 6))]],
+                           snapshot)
+    version = index.attack_version(lyn.id)
+    old_position = kent.position
+    kent.position = (5, 6)
+    index.apply(kent, old_position)
+    assert index.attack_version(lyn.id) == version
+    index.apply(sain, sain.position, struck=second)
+    assert index.attack_version(lyn.id) != version
+    version = index.attack_version(lyn.id)
+    old_position = sain.position
+    sain.position = (0, 0)
+    index.apply(sain, old_position)
+    assert index.attack_version(lyn.id) != version
@@ -0,0 +1,20 @@
+from agent.environment import EmblemMindEnv, SimulatorBackend
+
+def test_legal_macro_attack_moves_the_unit_and_damages_its_target(snapshot):
+    snapshot.units[0].position = (2, 4)  # Two tiles from the Bandit at (4, 4), so the attack needs a move
+    env = EmblemMindEnv(SimulatorBackend(snapshot))
+    env.reset()
+    space = env.macro_space()
+    enemies = env.snapshot.enemies
+    attack = next(m for m in space.legal_actions(0)
+                  if m.verb == 'attack' and env.snapshot.units[0].position != m.destination
+                  and sum(e.id == enemies[m.target].id for e in enemies) > 1)
+    target = env.snapshot.enemies[attack.target]
+    twin = next(e for e in env.snapshot.enemies if e.id == target.id and e is not target)
+    hp, twin_hp = target.hp[0], twin.hp[0]
+    env.step_macro(0, space.encode(attack))
+    lyn = env.snapshot.units[0]
+    enemies = {(e.id, e.position): e.hp[0] for e in env.snapshot.enemies}
+    assert lyn.position == attack.destination
+    assert enemies[(target.id, target.position)] == hp - (lyn.stats[0] - target.stats[4])
+    assert enemies[(twin.id, twin.position)] == twin_hp
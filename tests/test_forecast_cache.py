@@ -0,0 +1,19 @@
+from agent.forecast_cache import ForecastCache
+
+def test_key_tracks_equipped_weapon_and_uses(snapshot):
+    lyn, bandit = snapshot.units[0], snapshot.enemies[1]
+    tile = (bandit.position[0] - 1, bandit.position[1])
+    key = ForecastCache.make_key(lyn, None, bandit, snapshot, tile)
+    item_id, uses = lyn.items[0]
+    lyn.items[0] = (item_id, uses - 1)
+    assert ForecastCache.make_key(lyn, None, bandit, snapshot, tile) != key
+    lyn.items[0] = (item_id, 0)  # Broken: the next weapon is equipped
+    assert ForecastCache.make_key(lyn, None, bandit, snapshot, tile) != key
+
+def test_cached_struct_takes_the_requested_position():
+    cache = ForecastCache()
+    cache.put(('matchup',), {'x': 1, 'y': 2, 'attack': 5})
+    assert cache.get(('matchup',), position=(7, 3)) == {'x': 7, 'y': 3, 'attack': 5}
+    assert cache.get(('matchup',)) == {'x': 1, 'y': 2, 'attack': 5}
+    assert cache.get(('other',)) is None
+    assert cache.stats()['memory_hits'] == 2 and cache.stats()['misses'] == 1
@@ -0,0 +1,76 @@
+import random
+import pytest
+from agent import distance_fields
+from agent.action_generator import Action
+from agent.incremental_evaluator import IncrementalEvaluator
+from agent.path_tables import PathTables
+from agent.simulation import simulate_action
+from agent.state_evaluator import StateEvaluator
+
+@pytest.fixture(params=['dijkstra', 'path_tables'])
+def distances(request, snapshot, tmp_path, monkeypatch):
+    """Run each test without and with registered path tables"""
+    monkeypatch.setattr(distance_fields, '_path_tables', {})
+    monkeypatch.setattr(distance_fields, '_field_cache', distance_fields.OrderedDict())
+    if request.param == 'path_tables':
+        PathTables(str(tmp_path)).ensure(snapshot.chapter_id, snapshot.map,
+                                         [u.movement_type for u in snapshot.units + snapshot.enemies])
+    return request.param
+
+def random_action(evaluator, rng):
+    snapshot = evaluator.snapshot
+    unit = rng.choice(snapshot.units)
+    targets = [e for e in snapshot.enemies if e.is_alive and e.is_visible]
+    roll = rng.random()
+    if roll < 0.3 or not targets:
+        position = (rng.randrange(snapshot.map.width), rng.randrange(snapshot.map.height))
+        return [Action(unit, 'move', position)]
+    target = rng.choice(targets)
+    x, y = target.position
+    # Swing the Iron Sword (range 1) from next to the target until it falls or the roll says stop;
+    # the first attack walks there itself half of the time
+    adjacent = (x - 1, y) if x > 0 else (x + 1, y)
+    actions = [Action(unit, 'move', adjacent)] if rng.random() < 0.5 else []
+    actions += [Action(unit, 'attack', adjacent, target, item_id=1)] * rng.randint(1, 8)
+    return actions
+
+@pytest.mark.parametrize('seed', range(5))
+def test_incremental_value_matches_full_evaluation(snapshot, distances, seed):
+    rng = random.Random(seed)
+    evaluator = IncrementalEvaluator(snapshot)
+    assert evaluator.value == pytest.approx(StateEvaluator(snapshot).evaluate_state())
+    kills = 0
+    for _ in range(40):
+        for action in random_action(evaluator, rng):
+            alive = sum(e.is_alive for e in evaluator.snapshot.enemies)
+            before = evaluator.value
+            predicted = evaluator.delta(action)
+            assert evaluator.value == before
+            assert evaluator.apply(action) == pytest.approx(predicted)
+            assert evaluator.value == pytest.approx(StateEvaluator(evaluator.snapshot).evaluate_state())
+            kills += alive - sum(e.is_alive for e in evaluator.snapshot.enemies)
+    assert kills > 0
+
+def test_attack_hits_the_targeted_same_id_enemy(snapshot, distances):
+    bandits = [e for e in snapshot.enemies if e.id == 59936]
+    sain = snapshot.units[1]
+    evaluator = IncrementalEvaluator(snapshot)
+    x, y = bandits[1].position
+    evaluator.apply(Action(sain, 'move', (x - 1, y)))
+    evaluator.apply(Action(sain, 'attack', (x - 1, y), bandits[1], item_id=1))
+    hp = [e.hp[0] for e in evaluator.snapshot.enemies if e.id == 59936]
+    assert hp == [bandits[0].hp[0], bandits[1].hp[0] - 5]
+    assert evaluator.check()
+
+def test_attack_from_another_tile_resolves_like_simulate_action(snapshot, distances):
+    sain = snapshot.units[1]
+    bandit = next(e for e in snapshot.enemies if e.position == (4, 4))
+    attack = Action(sain, 'attack', (4, 5), bandit, item_id=1)
+    assert sain.position != attack.target_position
+    evaluator = IncrementalEvaluator(snapshot)
+    predicted = evaluator.delta(attack)
+    assert evaluator.apply(attack) == pytest.approx(predicted) != 0
+    simulated, _ = simulate_action(snapshot, attack)
+    assert evaluator.snapshot.units[1].position == simulated.units[1].position == (4, 5)
+    assert [e.hp for e in evaluator.snapshot.enemies] == [e.hp for e in simulated.enemies]
+    assert evaluator.value == pytest.approx(StateEvaluator(simulated).evaluate_state())
@@ -0,0 +1,73 @@
+import random
+import numpy as np
+from agent.distance_fields import distance_field
+from agent.incremental_paths import IncrementalDistanceField, IncrementalThreatMap, PhaseDistanceFields
+from agent.tile_features import terrain_planes
+from utils.terrain_data import IMPASSABLE
+
+def fresh_field(cost, sources, blocked):
+    cost = cost.copy()
+    for x, y in blocked:
+        cost[y, x] = IMPASSABLE
+    field = distance_field(cost, sources)
+    for x, y in sources:
+        field[y, x] = 0  # Sources count as reached even when blocked
+    return field
+
+def test_incremental_field_matches_fresh_dijkstra(snapshot):
+    cost = terrain_planes(snapshot.map).movement_cost('Foot')
+    height, width = cost.shape
+    rng = random.Random(42)
+    tiles = [(x, y) for y in range(height) for x in range(width)]
+    sources = set(rng.sample(tiles, 3))
+    blocked = set()
+    field = IncrementalDistanceField(cost, sources)
+    seeded = IncrementalDistanceField.from_field(cost, distance_field(cost, sources), sources)
+    for _ in range(200):
+        tile = rng.choice(tiles)
+        operation = rng.randrange(4)
+        if operation == 1 and not sources:
+            operation = 3
+        if operation == 0:
+            sources.add(tile)
+        elif operation == 1:
+            tile = rng.choice(sorted(sources))
+            sources.discard(tile)
+        elif operation == 2:
+            blocked.add(tile)
+        else:
+            blocked.discard(tile)
+        for f in (field, seeded):
+            if operation == 0:
+                f.add_source(tile)
+            elif operation == 1:
+                f.remove_source(tile)
+            else:
+                f.set_blocked(tile, operation == 2)
+        expected = fresh_field(cost, sources, blocked - sources)
+        assert np.array_equal(field.field, expected)
+        assert np.array_equal(seeded.field, expected)
+
+def test_phase_fields_remove_one_of_two_same_id_enemies(snapshot):
+    enemies = [e for e in snapshot.enemies if e.is_alive and e.is_visible]
+    twins = [e for e in enemies if sum(o.id == e.id for o in enemies) > 1]
+    assert len(twins) >= 2
+    phase = PhaseDistanceFields(snapshot, enemies)
+    phase.field('Foot')
+    killed = twins[0]
+    phase.remove_enemy(phase.slot_of(killed))
+    remaining = [e.position for e in enemies if e is not killed]
+    expected = distance_field(terrain_planes(snapshot.map).movement_cost('Foot'), remaining)
+    assert np.array_equal(phase.field('Foot').field, expected)
+    assert phase.slot_of(twins[1]) >= 0
+
+def test_threat_map_matches_a_rebuild_after_moves_and_kills(snapshot):
+    threat = IncrementalThreatMap(snapshot)
+    lyn = snapshot.units[0]
+    killed = next(e for e in snapshot.enemies if e.name == 'Bandit')
+    old = lyn.position
+    lyn.position = (old[0] + 1, old[1])
+    threat.move_ally(old, lyn.position)
+    threat.remove_enemy(threat.slot_of(killed))
+    killed.hp = (0, killed.hp[1])
+    assert np.array_equal(threat.count, IncrementalThreatMap(snapshot).count)
@@ -0,0 +1,31 @@
+import itertools
+from agent.macro_actions import ITEM_SLOTS, VERBS, MacroAction, MacroActionSpace
+
+def test_encode_decode_round_trip_over_the_whole_code_range(snapshot):
+    space = MacroActionSpace(snapshot)
+    targets, items = range(-1, space.max_targets), range(-1, ITEM_SLOTS)
+    codes = set()
+    for x, y, verb, target, item_slot in itertools.product(range(space.width), range(space.height), VERBS, targets, items):
+        macro = MacroAction(0, (x, y), verb, target, item_slot)
+        code = space.encode(macro)
+        assert 0 <= code < space.size
+        assert space.decode(0, code) == macro
+        codes.add(code)
+    assert len(codes) == space.size
+
+def test_legal_actions_round_trip_through_codes_and_actions(snapshot):
+    # Put Sain next to a Bandit so attacks are legal too
+    bandit = next(e for e in snapshot.enemies if e.name == 'Bandit' and e.position == (4, 4))
+    snapshot.units[1].position = (4, 5)
+    space = MacroActionSpace(snapshot)
+    for slot in range(len(snapshot.units)):
+        legal = space.legal_actions(slot)
+        assert legal
+        codes = [space.encode(macro) for macro in legal]
+        assert len(set(codes)) == len(codes)
+        assert space.mask(slot).sum() == len(legal)
+        for macro, code in zip(legal, codes):
+            assert space.decode(slot, code) == macro
+            assert space.from_action(space.to_action(macro)) == macro
+    attacks = [m for m in space.legal_actions(1) if m.verb == 'attack']
+    assert any(snapshot.enemies[m.target] is bandit for m in attacks)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from agent import distance_fields
+from agent.bitboard import SnapshotBoards
+from agent.distance_fields import DistanceFields, distance_field
+from agent.incremental_paths import PhaseDistanceFields
+from agent.path_tables import PathTables
+from agent.tile_features import terrain_planes
+
+@pytest.fixture
+def tables(tmp_path, snapshot, monkeypatch):
+    monkeypatch.setattr(distance_fields, '_path_tables', {})
+    monkeypatch.setattr(distance_fields, '_field_cache', distance_fields.OrderedDict())
+    tables = PathTables(str(tmp_path))
+    tables.ensure(snapshot.chapter_id, snapshot.map, [u.movement_type for u in snapshot.units + snapshot.enemies])
+    return tables
+
+def test_table_rows_match_dijkstra(tables, snapshot):
+    unit = snapshot.units[1]
+    table = tables.get(snapshot.chapter_id, snapshot.map, unit.movement_type)
+    cost = terrain_planes(snapshot.map).movement_cost(unit.movement_type)
+    sources = [e.position for e in snapshot.enemies]
+    assert np.array_equal(table.nearest_field(sources), distance_field(cost, sources))
+    assert table.distance(unit.position, sources[0]) == distance_field(cost, [unit.position])[sources[0][1], sources[0][0]]
+
+def test_distance_queries_go_through_registered_tables(tables, snapshot):
+    fields = DistanceFields(snapshot)
+    phase = PhaseDistanceFields(snapshot, [e for e in snapshot.enemies if e.is_alive and e.is_visible])
+    for unit in snapshot.units:
+        cost = terrain_planes(snapshot.map).movement_cost(unit.movement_type)
+        expected = distance_field(cost, [e.position for e in snapshot.enemies if e.is_alive and e.is_visible])
+        x, y = unit.position
+        assert fields.min_enemy_distance(unit) == expected[y, x]
+        assert phase.min_enemy_distance(unit.movement_type, unit.position) == expected[y, x]
+        assert phase.fields[unit.movement_type].last_updated == 0  # Seeded from the table, no Dijkstra run
+
+def test_table_seeded_phase_field_is_repaired_when_enemies_die(tables, snapshot):
+    enemies = [e for e in snapshot.enemies if e.is_alive and e.is_visible]
+    phase = PhaseDistanceFields(snapshot, enemies)
+    cost = terrain_planes(snapshot.map).movement_cost('Foot')
+    phase.field('Foot')
+    for killed in enemies[:3]:
+        phase.remove_enemy(phase.slot_of(killed))
+        remaining = [e.position for e in enemies if e not in enemies[:enemies.index(killed) + 1]]
+        assert np.array_equal(phase.field('Foot').field, distance_field(cost, remaining))
+
+def test_enemy_threat_uses_terrain_reach(tables, snapshot):
+    boards = SnapshotBoards(snapshot)
+    registered = dict(distance_fields._path_tables)
+    distance_fields._path_tables.clear()
+    manhattan_boards = SnapshotBoards(snapshot)
+    manhattan_threats = [manhattan_boards.layout.to_mask(manhattan_boards.enemy_threat(e)) for e in snapshot.enemies]
+    distance_fields._path_tables.update(registered)
+    narrower = False
+    for enemy, manhattan in zip(snapshot.enemies, manhattan_threats):
+        threat = boards.layout.to_mask(boards.enemy_threat(enemy))
+        assert not (threat & ~manhattan).any()
+        narrower |= bool((manhattan & ~threat).any())
+    assert narrower  # Forests and peaks on the sample map cut some enemy's reach
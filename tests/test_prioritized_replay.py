@@ -0,0 +1,33 @@
+import numpy as np
+from agent.prioritized_replay import PrioritizedReplay, SumTree
+from agent.replay_memory import ReplayMemory
+
+def test_sum_tree_totals_and_prefix_lookup():
+    rng = np.random.default_rng(0)
+    priorities = rng.random(13)
+    tree = SumTree(13)
+    tree.update(np.arange(13), priorities)
+    assert np.isclose(tree.total, priorities.sum())
+    tree.set(4, 2.5)
+    priorities[4] = 2.5
+    assert np.isclose(tree.total, priorities.sum())
+    bounds = np.cumsum(priorities)
+    values = rng.random(1000) * tree.total
+    assert np.array_equal(tree.find(values), np.searchsorted(bounds, values, side='right'))
+
+def test_sampling_frequency_follows_priorities():
+    tree = SumTree(4)
+    tree.update([0, 1, 2, 3], [1.0, 2.0, 0.0, 5.0])
+    values = np.random.default_rng(1).random(80000) * tree.total
+    counts = np.bincount(tree.find(values), minlength=4) / len(values)
+    assert counts[2] == 0
+    assert np.allclose(counts, [1 / 8, 2 / 8, 0, 5 / 8], atol=0.01)
+
+def test_ineffective_transitions_are_never_sampled(tmp_path):
+    replay = PrioritizedReplay(ReplayMemory(str(tmp_path), capacity=8, feature_size=2))
+    for i in range(6):
+        replay.add(np.zeros(2, dtype=np.float32), i, 0.0, effective=i % 2 == 0)
+    replay.update_priorities(np.array([0, 2, 4]), np.array([0.0, 1.0, 3.0]))
+    batch = replay.sample(256, rng=np.random.default_rng(2))
+    assert set(batch['indices'].tolist()) <= {0, 2, 4}
+    assert batch['weights'].max() == 1.0
@@ -0,0 +1,28 @@
+import numpy as np
+from agent.distance_fields import distance_field
+from agent.region_graph import RegionGraph
+from agent.tile_features import terrain_planes
+from utils.terrain_data import IMPASSABLE
+
+def test_every_passable_tile_has_a_region(snapshot):
+    graph = RegionGraph(snapshot.map, 'Foot')
+    passable = terrain_planes(snapshot.map).movement_cost('Foot') < IMPASSABLE
+    assert np.array_equal(graph.region_of >= 0, passable)
+    assert sum(region.size for region in graph.regions) == int(passable.sum())
+
+def test_nearest_group_and_approach_costs(snapshot):
+    graph = RegionGraph(snapshot.map, 'Foot', cluster_size=4)
+    lyn = snapshot.units[0]
+    enemies = [e for e in snapshot.enemies if e.is_alive and e.is_visible]
+    region, members, cost = graph.nearest_group(lyn.position, enemies)
+    assert members and all(graph.region_at(e.position) == region for e in members)
+    representative = graph.regions[region].representative
+    assert graph.approach_costs(region, [representative]) == [0.0]
+    # The estimate tracks the true walking cost to the group's representative
+    field = distance_field(terrain_planes(snapshot.map).movement_cost('Foot'), [representative])
+    tiles = [(x, y) for y in range(graph.height) for x in range(graph.width) if graph.region_at((x, y)) >= 0]
+    estimates = np.array(graph.approach_costs(region, tiles))
+    truth = np.array([field[y, x] for x, y in tiles])
+    reachable = np.isfinite(truth)
+    assert np.array_equal(np.isfinite(estimates), reachable)
+    assert np.corrcoef(estimates[reachable], truth[reachable])[0, 1] > 0.9
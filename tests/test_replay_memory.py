@@ -0,0 +1,30 @@
+import numpy as np
+from agent.action_generator import Action
+from agent.replay_memory import ReplayMemory, decode_action, encode_action
+
+def test_action_code_round_trip_keeps_16_bit_ids(snapshot):
+    lyn, glass = snapshot.units[0], snapshot.enemies[0]
+    bandits = [e for e in snapshot.enemies if e.name == 'Bandit']
+    actions = [Action(lyn, 'attack', (3, 4), bandit, item_id=lyn.items[0][0]) for bandit in bandits[:1]]
+    actions += [Action(unit, 'move', (14, 9)) for unit in snapshot.units]
+    actions.append(Action(lyn, 'attack', (0, 0), glass, item_id=153))
+    codes = [encode_action(a) for a in actions]
+    assert len(set(codes)) == len(codes)
+    for action, code in zip(actions, codes):
+        assert 0 <= code < 2 ** 63
+        fields = decode_action(code)
+        assert fields['unit_id'] == action.unit.id
+        assert fields['action_type'] == action.action_type
+        assert fields['target_position'] == tuple(action.target_position)
+        assert fields['target_unit_id'] == (action.target_unit.id if action.target_unit else 0)
+        assert fields['item_id'] == (action.item_id or 0)
+
+def test_codes_survive_the_mapped_buffer(tmp_path, snapshot):
+    lyn = snapshot.units[0]
+    memory = ReplayMemory(str(tmp_path), capacity=4, feature_size=3)
+    code = encode_action(Action(lyn, 'move', (2, 5)))
+    memory.add(np.zeros(3, dtype=np.float32), code, 1.0)
+    memory.flush()
+    reopened = ReplayMemory(str(tmp_path), capacity=4, feature_size=3)
+    assert len(reopened) == 1
+    assert decode_action(reopened.action_codes[0])['unit_id'] == lyn.id
@@ -0,0 +1,43 @@
+import json
+import os
+import pytest
+from agent.rng import Combatant, FE7RNG, predict_battle, validate_recorded_battles
+
+# Lyn vs a Bandit, battle structs exported from the sample state, both ways round
+BATTLE_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'battle_log.jsonl')
+
+# (side, hit, crit, damage) for every strike of each logged battle
+EXPECTED_STRIKES = [
+    [('attacker', True, False, 8)],
+    [('attacker', True, False, 8), ('attacker', True, True, 24)],
+    [('attacker', True, False, 9), ('defender', True, False, 8), ('defender', True, False, 8)],
+    [('attacker', False, False, 0), ('defender', True, True, 24)],
+]
+
+def load_log():
+    with open(BATTLE_LOG) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def test_first_rn_matches_the_generator_by_hand():
+    # rn = (s1 << 11) + (s0 >> 5) = 4096, s2 << 1 = 6, 4096 ^ 6 = 4102; 4102 * 100 >> 16 = 6
+    rng = FE7RNG((1, 2, 3))
+    assert rng.next_rn() == 4102
+    assert rng.state == (4102, 1, 2)
+    assert FE7RNG((1, 2, 3)).next_rn_100() == 6
+
+@pytest.mark.parametrize('index', range(len(EXPECTED_STRIKES)))
+def test_recorded_battle_outcome(index):
+    entry = load_log()[index]
+    attacker = Combatant.from_battle_struct(entry['attacker'])
+    defender = Combatant.from_battle_struct(entry['defender'])
+    attacker.hp, defender.hp = entry['hp_before']
+    rng = FE7RNG(entry['seeds_before'])
+    outcome = predict_battle(rng, attacker, defender)
+    assert outcome.strikes == EXPECTED_STRIKES[index]
+    assert [outcome.attacker_hp, outcome.defender_hp] == entry['hp_after']
+    assert list(rng.state) == entry['seeds_after']
+    assert outcome.rns_consumed == sum(3 if hit else 2 for _, hit, _, _ in EXPECTED_STRIKES[index])
+
+def test_validate_recorded_battles_counts_every_match():
+    stats = validate_recorded_battles(BATTLE_LOG)
+    assert stats == {'battles': 4, 'hp_matches': 4, 'rng_matches': 4}
@@ -0,0 +1,42 @@
+import pytest
+from agent.search import AlphaBetaSearch, SkirmishState
+
+def minimax(state, depth):
+    """Plain full-width minimax over the same game tree, no pruning or table"""
+    if depth == 0 or state.is_terminal():
+        return state.evaluate()
+    moves = state.moves()
+    if not moves:
+        return state.evaluate()
+    values = []
+    for move in moves:
+        record = state.apply(move)
+        values.append(minimax(state, depth - 1))
+        state.undo(record)
+    return max(values) if state.player_phase else min(values)
+
+def skirmish(snapshot, mov):
+    # Put Sain next to a Bandit so attacks and counters appear in the tree
+    snapshot.units[1].position = (4, 5)
+    state = SkirmishState(snapshot)
+    state.mov = [min(m, mov) for m in state.mov]  # Short moves keep full-width minimax cheap
+    return state
+
+@pytest.mark.parametrize('depth', [1, 2, 3, 4, 5])
+def test_alphabeta_equals_minimax_at_fixed_depth(snapshot, depth):
+    state = skirmish(snapshot, 2)
+    key = state.key()
+    expected = minimax(state, depth)
+    search = AlphaBetaSearch(time_budget=None, move_width=None)
+    for d in range(1, depth + 1):  # Iterative deepening, sharing the table as search() does
+        value = search._alphabeta(state, d, float('-inf'), float('inf'))
+    assert state.key() == key
+    assert value == pytest.approx(expected)
+    if depth > 3:  # Past the three player plies, enemy replies give alpha-beta something to cut
+        assert search.stats.cutoffs > 0
+
+def test_search_value_equals_minimax(snapshot):
+    state = skirmish(snapshot, 99)
+    result = AlphaBetaSearch(time_budget=None, max_depth=2, move_width=None).search(snapshot)
+    assert result.stats.depth == 2
+    assert result.value == pytest.approx(minimax(state, 2))
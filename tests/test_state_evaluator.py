@@ -0,0 +1,18 @@
+from agent.action_generator import Action
+from agent.distance_fields import distance_field
+from agent.state_evaluator import StateEvaluator
+from agent.tile_features import terrain_planes
+
+def test_min_distance_features_use_terrain_movement_cost(snapshot):
+    evaluator = StateEvaluator(snapshot)
+    lyn = snapshot.units[0]
+    features = evaluator.evaluate_action(Action(lyn, 'move', lyn.position))
+    x, y = lyn.position
+    cost = terrain_planes(snapshot.map).movement_cost(lyn.movement_type)
+    visible = [e.position for e in snapshot.enemies if e.is_alive and e.is_visible]
+    everyone = [e.position for e in snapshot.enemies if e.is_alive]
+    assert features['min_dist_visible_enemy'] == distance_field(cost, visible)[y, x]
+    assert features['min_dist_any_enemy'] == distance_field(cost, everyone)[y, x]
+    # Every step costs at least 1, so terrain distance is never below Manhattan
+    assert features['min_dist_visible_enemy'] >= min(abs(x - ex) + abs(y - ey) for ex, ey in visible)
+    assert not any(name.startswith('terrain_dist') for name in features)
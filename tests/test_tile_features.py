@@ -0,0 +1,19 @@
+import copy
+from agent.tile_features import terrain_hash, terrain_planes
+
+def test_terrain_hash_is_memoized_per_map(snapshot):
+    terrain_map = snapshot.map
+    key = terrain_hash(terrain_map)
+    assert terrain_map._terrain_hash == key
+    assert terrain_hash(copy.deepcopy(terrain_map)) == key
+    fresh = copy.copy(terrain_map)
+    del fresh.__dict__['_terrain_hash']
+    assert terrain_hash(fresh) == key  # Recomputed from the grid, same key
+    assert terrain_planes(terrain_map) is terrain_planes(fresh)
+
+def test_different_terrain_gets_a_different_hash(snapshot):
+    other = copy.deepcopy(snapshot.map)
+    other.__dict__.pop('_terrain_hash', None)
+    other.grid = [list(row) for row in other.grid]
+    other.grid[0][0] = 'M' if other.grid[0][0] != 'M' else 'F'
+    assert terrain_hash(other) != terrain_hash(snapshot.map)
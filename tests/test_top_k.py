@@ -0,0 +1,61 @@
+import random
+import numpy as np
+import pytest
+from agent.action_coordinator import ActionCoordinator
+from agent.top_k import StreamingTopK, stream_top_k, top_k_indices
+
+@pytest.mark.parametrize('seed', range(10))
+def test_streaming_top_k_matches_top_k_indices(seed):
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(0, 20, size=200).astype(np.float64)  # Plenty of ties
+    k = int(rng.integers(1, 30))
+    best = StreamingTopK(k)
+    for i, score in enumerate(scores):
+        best.push(score, i)
+    # Same scores as top_k_indices; among ties the stream keeps the earliest items (a stable sort)
+    assert [scores[i] for i in best.results()] == scores[top_k_indices(scores, k)].tolist()
+    assert best.results() == np.argsort(-scores, kind='stable')[:k].tolist()
+
+def test_ties_keep_the_earliest_item():
+    best = StreamingTopK(2)
+    for item in 'abcd':
+        best.push(1.0, item)
+    assert best.results() == ['a', 'b']
+    assert best.threshold == 1.0
+    assert not best.push(1.0, 'e')
+    assert best.push(2.0, 'f')
+    assert best.results() == ['f', 'a']
+
+def test_upper_bound_skips_items_that_cannot_get_in():
+    scored = []
+
+    def score_batch(batch):
+        scored.extend(batch)
+        return [float(x) for x in batch]
+
+    items = [9, 8, 7, 1, 2, 3, 10]
+    result = stream_top_k(items, score_batch, 3, upper_bound=lambda x: x, batch_size=1)
+    assert result == [10, 9, 8]
+    assert scored == [9, 8, 7, 10]  # 1, 2 and 3 were bounded out once three items were held
+
+class KeyedScorer:
+    """Deterministic stand-in network: a fixed random score per distinct action"""
+
+    def __init__(self, seed):
+        self.seed = seed
+
+    def evaluate_actions(self, actions, features):
+        return [random.Random(f"{self.seed}:{a.unit.id}:{a.action_type}:{a.target_position}:"
+                              f"{a.target_unit.position if a.target_unit else None}:{a.item_id}").random()
+                for a in actions]
+
+@pytest.mark.parametrize('seed', range(3))
+def test_get_best_actions_matches_sort_then_top_k(snapshot, seed):
+    scorer = KeyedScorer(seed)
+    coordinator = ActionCoordinator(snapshot, neural_network=scorer)
+    coordinator.prune_actions = False
+    actions = coordinator.action_generator.generate_all_actions()
+    scores = np.asarray(scorer.evaluate_actions(actions, None))
+    expected = [actions[i] for i in top_k_indices(scores, 5)]
+    key = lambda a: (a.unit.id, a.action_type, a.target_position, a.item_id)
+    assert [key(a) for a in coordinator.get_best_actions(5)] == [key(a) for a in expected]
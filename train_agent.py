@@ -22,7 +22,7 @@ def main():
 
     # Load the current game state
     snapshot = TurnSnapshot.from_files(state_file_path, map_file_path)
-    coordinator = ActionCoordinator(snapshot)
+    coordinator = ActionCoordinator(snapshot, model_path=os.path.join(current_dir, 'saved_model.pt'))
 
     # Get the best actions (top 5)
     best_actions = coordinator.get_best_actions(num_actions=5)
@@ -3,31 +3,61 @@
 import os
 import time
 import random
-from collections import deque
 from emblemmind_snapshot import TurnSnapshot
 from agent.action_coordinator import ActionCoordinator
 from agent.action_generator import Action
 from agent.bizhawk_controller import press_key, press_reset, GBA_KEY_MAP, focus_bizhawk
-from utils.fe_data_mappings import ITEM_ATTACK_RANGES
+from agent.forecast_cache import ForecastCache
+from agent.inference_config import InferenceConfig
+from agent.learner import AsyncLearner
+from agent.phase_scorer import PhaseScorer
+from agent.prioritized_replay import PrioritizedReplay
+from agent.replay_memory import ReplayMemory
+from agent.rng import record_battle
+from agent.reward import compute_reward, is_player_dead, is_level_beaten
+from agent.state_evaluator import features_to_array
+from agent.tile_features import terrain_planes
+from agent.incremental_paths import IncrementalThreatMap, PhaseDistanceFields
+from agent.incremental_evaluator import IncrementalEvaluator
+from agent.path_tables import PathTables
+from agent.region_graph import region_graph
+from agent.bitboard import snapshot_boards
+from agent.candidate_index import CandidateIndex
+from agent.assignment import AttackOption, solve_assignment
+from agent.planner import Planner
 
 # Paths
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
 STATE_FILE = os.path.join(DATA_DIR, 'fe_state.txt')
 MAP_FILE = os.path.join(DATA_DIR, 'fe_map.txt')
+FORECAST_CACHE_PATH = os.path.join(DATA_DIR, 'forecast_cache.sqlite')
+BATTLE_LOG_PATH = os.path.join(DATA_DIR, 'battle_log.jsonl')  # Observed battles for validating agent/rng.py
+REPLAY_MEMORY_DIR = os.path.join(DATA_DIR, 'replay_memory')
+LEARNER_WEIGHTS_PATH = os.path.join(DATA_DIR, 'learner_weights.npz')  # Published by agent/learner.py
+PATH_TABLE_DIR = os.path.join(DATA_DIR, 'path_tables')  # Per-chapter all-pairs distances, see agent/path_tables.py
+MODEL_PATH = 'saved_model.pt'
 
 # RL parameters
 EPSILON_START = 1.0
 EPSILON_END = 0.1
 EPSILON_DECAY = 500  # Number of episodes to decay over
-REPLAY_BUFFER_SIZE = 1000
+REPLAY_BUFFER_SIZE = 100000  # Transitions; each row is under 100 bytes on disk
 BATCH_SIZE = 32
-replay_buffer = deque(maxlen=REPLAY_BUFFER_SIZE)
+ASYNC_TRAINING = True  # Train in a separate learner process instead of at the end of each episode
+replay_memory = None  # PrioritizedReplay, or an AsyncLearner forwarding to the learner's memory
+coordinator = None  # Long-lived ActionCoordinator, created at the first player phase
+INFERENCE_CONFIG = InferenceConfig.from_env()  # Torch threads/int8/frozen graph, see agent/inference_config.py
 SIMULATION_MODE = False  # Set to True to use fast simulation for RL, False for real BizHawk
+forecast_cache = ForecastCache(FORECAST_CACHE_PATH)  # Shared across episodes, runs and processes
+path_tables = PathTables(PATH_TABLE_DIR)  # Built the first time a chapter is seen, memory-mapped on replays
+SEARCH_MODE = None  # 'greedy' or 'alphabeta' to pick each action with agent/planner.py; None keeps the scripted policy
+SEARCH_TIME_BUDGET = 1.0  # Seconds per planned action
+planner = Planner(SEARCH_MODE, time_budget=SEARCH_TIME_BUDGET) if SEARCH_MODE else None
 
 # --- Utility: Identify good terrain tiles by symbol ---
-GOOD_TERRAIN_SYMBOLS = {'F', '^', '0C', '0D', '11', '0A', '0B', '1F', 'C', 'T'}  # Forest, Thicket, Hill, Fort, Gate, Throne, etc.
 GOOD_TERRAIN_MIN_DEF = 1  # Minimum defense bonus to consider a tile 'good' (for struct-based fallback)
 GOOD_TERRAIN_MAX_PROBES = 2  # Only probe up to this many 'good' tiles per enemy
+FAR_TARGET_TURNS = 2  # Beyond this many turns of movement, move toward the nearest enemy group on the region graph
 
 # --- Helper Functions ---
 def wait_for_state_update(prev_snapshot, timeout=3):
@@ -43,26 +73,12 @@ def wait_for_state_update(prev_snapshot, timeout=3):
             return snapshot
     return snapshot
 
-def is_player_dead(snapshot):
-    # Only return True if a critical character (Eliwood=0x01, Hector=0x02, Lyn=0x03) is dead
-    CRITICAL_IDS = {0x01, 0x02, 0x03}
-    for unit in snapshot.units:
-        if unit.id in CRITICAL_IDS and unit.hp[0] == 0:
-            return True
-    return False
-
-def is_level_beaten(snapshot):
-    # Level is beaten if all enemies are dead and at least one enemy has hidden_status != 0x20 (not just item droppers left)
-    return (not any(e.is_alive for e in snapshot.enemies)) and any(e.hidden_status != 0x20 for e in snapshot.enemies)
-
 def find_empty_tile(snapshot):
     """Find a tile with no units on it (returns (x, y))."""
-    for y in range(snapshot.map.height):
-        for x in range(snapshot.map.width):
-            if not snapshot.get_unit_at(x, y):
-                return (x, y)
+    boards = snapshot_boards(snapshot)
+    empty = boards.layout.full & ~boards.occupied
     # Fallback: top-left
-    return (0, 0)
+    return next(boards.layout.positions(empty & -empty), (0, 0))
 
 def end_turn_in_bizhawk(cursor_pos, snapshot):
     # Only block ending turn if the unit with id==1 (Eliwood) can still act or hasn't acted
@@ -385,98 +401,17 @@ def log_state(snapshot):
         if not u.has_acted and u.can_act:
             print(f"  - {u.name} at {u.position} HP: {u.hp[0]}/{u.hp[1]} Status: {u.turn_status_text}")
 
-def compute_reward(prev_snapshot, curr_snapshot, action=None, level_beaten=False, player_dead=False):
-    reward = 0
-    prev_enemies = {e.id: e for e in prev_snapshot.enemies}
-    curr_enemies = {e.id: e for e in curr_snapshot.enemies}
-    prev_units = {u.id: u for u in prev_snapshot.units}
-    curr_units = {u.id: u for u in curr_snapshot.units}
-    # Enemy deaths
-    killed_enemy = False
-    for eid, prev_e in prev_enemies.items():
-        if eid in curr_enemies and prev_e.is_alive and not curr_enemies[eid].is_alive:
-            reward += 100
-            killed_enemy = True
-    # Player deaths
-    for uid, prev_u in prev_units.items():
-        if uid in curr_units and prev_u.is_alive and not curr_units[uid].is_alive:
-            reward -= 100
-    # Damage dealt/taken
-    for eid, prev_e in prev_enemies.items():
-        if eid in curr_enemies:
-            reward += 10 * max(0, prev_e.hp[0] - curr_enemies[eid].hp[0])
-    for uid, prev_u in prev_units.items():
-        if uid in curr_units:
-            reward -= 10 * max(0, prev_u.hp[0] - curr_units[uid].hp[0])
-    # Terrain scoring for move actions
-    if action is not None:
-        if action.action_type == 'move':
-            terrain = curr_snapshot.map.get_terrain_at(action.target_position[0], action.target_position[1])
-            terrain_bonus = 0
-            if terrain in ['F', '^']:
-                terrain_bonus = 5
-            elif terrain == '#':
-                terrain_bonus = -10
-            elif terrain in ['M']:
-                terrain_bonus = -10
-            elif terrain in ['0C', '0D', '11']:
-                terrain_bonus = 5
-            elif terrain in ['0A', '0B', '1F']:
-                terrain_bonus = 10
-            elif terrain in ['1A', '12']:
-                terrain_bonus = -10
-            reward += terrain_bonus
-        elif action.action_type == 'attack':
-            reward += 70
-        elif action.action_type == 'item':
-            reward += 2
-        elif action.action_type == 'rescue':
-            reward += 1
-        elif action.action_type == 'wait':
-            reward -= 2
-    # Penalize idle 'wait' actions if low HP and in enemy range
-    if action is not None and action.action_type == 'wait' and action.unit.hp[0] < action.unit.hp[1] * 0.3:
-        for enemy in curr_snapshot.enemies:
-            if enemy.is_alive and abs(action.unit.position[0] - enemy.position[0]) + abs(action.unit.position[1] - enemy.position[1]) <= 2:
-                reward -= 10
-                break
-    # Penalize unproductive actions
-    if action is not None and action.unit.position == action.target_position and not killed_enemy:
-        reward -= 10
-    # Penalty if unit's turn_status did not change to 0x42 after action
-    if action is not None:
-        unit_after = next((u for u in curr_snapshot.units if u.id == action.unit.id), None)
-        if unit_after and unit_after.turn_status != 0x02:
-            reward -= 20
-    # Penalty for being unselectable or not deployed
-    for unit in curr_snapshot.units:
-        if hasattr(unit, 'turn_status'):
-            if unit.turn_status & 0x02:
-                reward -= 10
-            if unit.turn_status & 0x08:
-                reward -= 10
-    if level_beaten:
-        reward += 5000
-    if player_dead:
-        reward -= 5000
-    return reward
-
-def sample_experiences(buffer, batch_size):
-    return random.sample(buffer, min(len(buffer), batch_size))
-
-def train_neural_network(coordinator, buffer):
-    if len(buffer) < BATCH_SIZE:
+def train_neural_network(coordinator, memory):
+    if len(memory) < BATCH_SIZE:
         return
-    # Discard ineffective/broken actions
-    filtered = [exp for exp in buffer if exp[0] != exp[3] or exp[2] != 0]
-    if not filtered:
+    # Only effective transitions (state changed or non-zero reward) have priority > 0
+    batch = memory.sample(BATCH_SIZE)
+    if batch is None:
         print("[TRAIN] No effective experiences to train on.")
         return
-    batch = sample_experiences(filtered, BATCH_SIZE)
-    actions = [exp[1] for exp in batch]
-    rewards = [exp[2] for exp in batch]
-    coordinator.train_on_experience(actions, rewards)
-    print(f"[TRAIN] Trained on {len(batch)} experiences.")
+    td_errors = coordinator.train_on_batch(batch['features'], batch['rewards'], weights=batch['weights'])
+    memory.update_priorities(batch['indices'], td_errors)
+    print(f"[TRAIN] Trained on {len(batch['rewards'])} experiences.")
 
 def wait_for_animation_complete(prev_snapshot, timeout=5.0, stable_checks=5):
     last_positions = []
@@ -498,6 +433,7 @@ def wait_for_animation_complete(prev_snapshot, timeout=5.0, stable_checks=5):
 def filter_actions(actions, snapshot=None, movement_map=None, range_map=None):
     # Exclude actions for dead, unselectable, not deployed, rescued, or invisible units
     filtered = []
+    boards = snapshot_boards(snapshot) if snapshot is not None else None
     for a in actions:
         if not a.unit.is_alive:
             continue
@@ -511,7 +447,7 @@ def filter_actions(actions, snapshot=None, movement_map=None, range_map=None):
         # Exclude move actions to occupied or unreachable tiles
         if a.action_type == 'move' and snapshot is not None and movement_map is not None:
             x, y = a.target_position
-            if snapshot.get_unit_at(x, y):
+            if boards.layout.test(boards.occupied, (x, y)):
                 continue
             if y >= len(movement_map) or x >= len(movement_map[y]) or movement_map[y][x] == 0xFF:
                 continue
@@ -557,23 +493,18 @@ def parse_map_section(section_name):
 
 # --- Survivability and Battle Struct Utilities ---
 def enemy_can_attack_tile(enemy, x, y, snapshot):
-    move_range = enemy.movement_range
-    for item_id, uses in enemy.items:
-        if uses > 0 and item_id in ITEM_ATTACK_RANGES:
-            min_range, max_range = ITEM_ATTACK_RANGES[item_id]
-            for dx in range(-move_range, move_range + 1):
-                for dy in range(-move_range, move_range + 1):
-                    ex, ey = enemy.position[0] + dx, enemy.position[1] + dy
-                    if 0 <= ex < snapshot.map.width and 0 <= ey < snapshot.map.height:
-                        if abs(dx) + abs(dy) <= move_range:
-                            dist = abs(ex - x) + abs(ey - y)
-                            if min_range <= dist <= max_range:
-                                if not snapshot.get_unit_at(ex, ey):
-                                    return True
-    return False
-
-def probe_battle_struct_for_attack(attacker, defender, target_tile, state_file, move_cursor_to, press_key, get_cursor_position):
+    # One bit test against the enemy's cached threat bitboard (see agent/bitboard.py)
+    boards = snapshot_boards(snapshot)
+    return boards.layout.test(boards.enemy_threat(enemy), (x, y))
+
+def probe_battle_struct_for_attack(attacker, defender, target_tile, state_file, move_cursor_to, press_key, get_cursor_position, snapshot=None):
     from agent.action_generator import Action
+    key = None
+    if snapshot is not None:
+        key = ForecastCache.make_key(attacker, None, defender, snapshot, target_tile)
+        cached = forecast_cache.get(key, position=target_tile)
+        if cached is not None:
+            return cached
     action = Action(
         unit=attacker,
         action_type='attack',
@@ -582,6 +513,8 @@ def probe_battle_struct_for_attack(attacker, defender, target_tile, state_file,
     )
     cursor_pos = get_cursor_position()
     cursor_pos, battle_struct = perform_attack_action(action, cursor_pos, probe=True)
+    if key is not None:
+        forecast_cache.put(key, battle_struct)
     return battle_struct
 
 def score_tile_for_survivability(unit, x, y, snapshot, state_file, move_cursor_to, press_key, get_cursor_position):
@@ -591,7 +524,7 @@ def score_tile_for_survivability(unit, x, y, snapshot, state_file, move_cursor_t
         if not enemy.is_alive or not enemy.is_visible:
             continue
         if enemy_can_attack_tile(enemy, x, y, snapshot):
-            battle_struct = probe_battle_struct_for_attack(enemy, unit, (x, y), state_file, move_cursor_to, press_key, get_cursor_position)
+            battle_struct = probe_battle_struct_for_attack(enemy, unit, (x, y), state_file, move_cursor_to, press_key, get_cursor_position, snapshot)
             if battle_struct:
                 predicted_damage = max(0, battle_struct['attack'] - unit.stats[4])
                 total_expected_damage += predicted_damage
@@ -603,11 +536,18 @@ def score_tile_for_survivability(unit, x, y, snapshot, state_file, move_cursor_t
         terrain_bonus += 2
     return -10 * death_risk - total_expected_damage + terrain_bonus
 
-def probe_all_weapons_battle_structs(attacker, defender, target_tile, state_file, move_cursor_to, press_key, get_cursor_position):
+def probe_all_weapons_battle_structs(attacker, defender, target_tile, state_file, move_cursor_to, press_key, get_cursor_position, snapshot=None):
     from agent.action_generator import Action
     results = []
     for slot_idx, (item_id, uses) in enumerate(attacker.items):
         if uses > 0:
+            # Reuse a previously probed forecast for the same matchup instead of driving the emulator
+            key = ForecastCache.make_key(attacker, item_id, defender, snapshot, target_tile) if snapshot is not None else None
+            if key is not None:
+                cached = forecast_cache.get(key, position=target_tile)
+                if cached is not None:
+                    results.append((cached, item_id, slot_idx))
+                    continue
             action = Action(
                 unit=attacker,
                 action_type='attack',
@@ -618,12 +558,190 @@ def probe_all_weapons_battle_structs(attacker, defender, target_tile, state_file
             cursor_pos = get_cursor_position()
             cursor_pos, battle_struct = perform_attack_action(action, cursor_pos, probe=True)
             if battle_struct is not None:
+                if key is not None:
+                    forecast_cache.put(key, battle_struct)
                 results.append((battle_struct, item_id, slot_idx))
     return results
 
+def score_attack_actions(unit, attack_actions, snapshot):
+    """Probe every weapon for a unit's attacks; (score, action, will_kill, battle_struct) per option"""
+    scored_attacks = []
+    probed_pairs = set()
+    # Pre-filter: Only probe 'good' tiles if there are few, else probe all
+    boards = snapshot_boards(snapshot)
+    good_attacks = sum(1 for aa in attack_actions if boards.layout.test(boards.good_terrain, aa.target_position))
+    only_good_tiles = 0 < good_attacks <= GOOD_TERRAIN_MAX_PROBES
+    for a in attack_actions:
+        # Deduplicate by (target_position, target_unit.id)
+        probe_key = (a.target_position, a.target_unit.id if a.target_unit else None)
+        if probe_key in probed_pairs:
+            continue
+        probed_pairs.add(probe_key)
+        if only_good_tiles and not boards.layout.test(boards.good_terrain, a.target_position):
+            continue  # Skip bad tiles
+        # Probe all weapons for this attack action
+        weapon_results = probe_all_weapons_battle_structs(unit, a.target_unit, a.target_position, STATE_FILE, move_cursor_to, press_key, get_cursor_position, snapshot)
+        for battle_struct, item_id, slot_idx in weapon_results:
+            if battle_struct:
+                will_kill = battle_struct['attack'] >= a.target_unit.hp[0] or battle_struct.get('cur_hp', 1) <= 0
+                will_die = battle_struct['cur_hp'] <= 0 or battle_struct['attack'] >= unit.hp[0]
+                score = 0
+                # --- Use actual terrain defense/avoid/resistance from battle struct ---
+                terrain_def = battle_struct.get('terrain_def', 0)
+                terrain_avo = battle_struct.get('terrain_avo', 0)
+                terrain_res = battle_struct.get('terrain_res', 0)
+                terrain_bonus = 0
+                if terrain_def > 0 or terrain_avo > 0 or terrain_res > 0:
+                    # Prioritize tiles with any defensive bonus
+                    terrain_bonus = 10 + terrain_def * 2 + terrain_avo + terrain_res
+                score += terrain_bonus
+                # --- End terrain bonus ---
+                if will_kill:
+                    score += 100
+                if will_die:
+                    score -= 100
+                score += battle_struct['attack']
+                score += battle_struct['hit'] // 10
+                score += battle_struct['crit'] // 10
+                # Create a new action for this weapon
+                weapon_action = Action(
+                    unit=a.unit,
+                    action_type=a.action_type,
+                    target_position=a.target_position,
+                    target_unit=a.target_unit,
+                    item_id=item_id
+                )
+                scored_attacks.append((score, weapon_action, will_kill, battle_struct))
+            else:
+                scored_attacks.append((0, a, False, None))
+    return scored_attacks
+
+def cached_attack_scores(unit, attack_actions, snapshot, candidates, forecasts):
+    """score_attack_actions, reused until the candidate index reports a change to the unit's attacks"""
+    version = candidates.attack_version(unit.id)
+    cached = forecasts.get(unit.id)
+    if cached is None or cached[0] != version:
+        cached = forecasts[unit.id] = (version, score_attack_actions(unit, attack_actions, snapshot))
+    return cached[1]
+
+def plan_attacks(units, unit_actions, snapshot, candidates, forecasts):
+    """Kill-assignment plan over every attack unit's probed options (see agent/assignment.py).
+
+    Returns (unit, action, will_kill) for the plan's first step, or None
+    when no unit should attack. forecasts holds each unit's scored attacks
+    across iterations of the phase (see cached_attack_scores).
+    """
+    options, will_kills, enemy_hp = [], {}, {}
+    alive = {(e.id, e.position): e.hp[0] for e in snapshot.enemies if e.is_alive and e.is_visible}
+    for unit, actions in zip(units, unit_actions):
+        attack_actions = [a for a in actions if a.action_type == 'attack']
+        for _, action, will_kill, battle_struct in cached_attack_scores(unit, attack_actions, snapshot,
+                                                                        candidates, forecasts):
+            target = (action.target_unit.id, action.target_unit.position)
+            if battle_struct is None or target not in alive:
+                continue
+            option = AttackOption.from_forecast(action, target, battle_struct)
+            options.append(option)
+            will_kills[id(option)] = will_kill
+            enemy_hp[target] = alive[target]
+    plan = solve_assignment(options, enemy_hp)
+    print(f"[ASSIGNMENT] {len(plan.steps)} attacks, expected kills {plan.expected_kills:.2f}, "
+          f"risk {plan.risk:.2f}, {plan.nodes} nodes, optimal={plan.optimal}")
+    if not plan.steps:
+        return None
+    first = plan.steps[0]
+    unit = next(u for u in units if u.id == first.attacker)
+    return unit, first.action, will_kills[id(first)]
+
+def search_action(units, unit_actions, snapshot):
+    """The planner's move as (unit, action, will_kill), or None when it matches no probed candidate"""
+    result = planner.plan(snapshot)
+    print(f"[SEARCH] {planner.mode}: {result.stats.as_dict()}")
+    planned = result.action
+    if planned is None:
+        return None
+    for unit, actions in zip(units, unit_actions):
+        if unit.id != planned.unit.id:
+            continue
+        for a in actions:
+            if a.action_type == planned.action_type and tuple(a.target_position) == tuple(planned.target_position) and \
+                    (a.target_unit is None) == (planned.target_unit is None) and \
+                    (a.target_unit is None or (a.target_unit.id, a.target_unit.position) ==
+                     (planned.target_unit.id, planned.target_unit.position)):
+                return unit, a, result.will_kill
+    return None
+
+def approach_costs(unit, move_actions, enemies, phase_fields, snapshot):
+    """Region-graph cost from each move's tile to the nearest enemy group, when every enemy is far away.
+
+    Zeros (no preference) while some enemy is within FAR_TARGET_TURNS turns,
+    where the terrain distance fields already point the right way.
+    """
+    nearest = phase_fields.min_enemy_distance(unit.movement_type, unit.position)
+    if not enemies or nearest <= FAR_TARGET_TURNS * max(1, unit.movement_range):
+        return [0.0] * len(move_actions)
+    graph = region_graph(snapshot.map, unit.movement_type)
+    group = graph.nearest_group(unit.position, enemies)
+    if group is None:
+        return [0.0] * len(move_actions)
+    region, members, cost = group
+    print(f"[REGION GRAPH] {unit.name} approaching {len(members)} enemies in region {region} (cost {cost:.0f})")
+    return graph.approach_costs(region, [a.target_position for a in move_actions])
+
+def probe_unit_actions(action_generator, unit, snapshot, cursor_pos):
+    """Select a unit in BizHawk to read its movement/range maps and return its filtered actions"""
+    print(f"[DEBUG] Probing unit: {unit.name} at {unit.position}, can_act={unit.can_act}, has_acted={unit.has_acted}")
+    print(f"[DEBUG] {unit.name} items: {unit.items}")
+    cursor_pos = move_cursor_to(unit.position, cursor_pos)
+    pos_check = get_cursor_position()
+    if pos_check != unit.position:
+        print(f"[ERROR] Cursor not on expected unit {unit.name} at {unit.position}, but at {pos_check}. Skipping unit.")
+        return cursor_pos, []
+    press_key('x', duration=0.05)
+    time.sleep(0.05)
+    press_key('UP', duration=0.05)
+    time.sleep(0.05)
+    press_key('DOWN', duration=0.05)
+    time.sleep(0.05)
+    movement_map = parse_map_section('MOVEMENT_MAP')
+    range_map = parse_map_section('RANGE_MAP')
+    actions = action_generator._generate_unit_actions(unit, movement_map, range_map)
+    non_wait_actions = [a for a in actions if not (a.action_type == 'wait' and a.target_position == unit.position)]
+    filtered_actions = filter_actions(non_wait_actions, snapshot, movement_map, range_map)
+    print(f"[DEBUG] Filtered actions for {unit.name}: {[a.action_type for a in filtered_actions]}")
+    return_to_map()
+    cursor_pos = get_cursor_position() or cursor_pos
+    time.sleep(0.1)
+    return cursor_pos, filtered_actions
+
+def log_battle_outcome(prev_snapshot, snapshot, action):
+    """Record the RNG state and battle structs around an executed attack"""
+    def hp_of(snap, unit_id, enemy):
+        pool = snap.enemies if enemy else snap.units
+        unit = next((u for u in pool if u.id == unit_id), None)
+        return unit.hp[0] if unit else 0
+    try:
+        record_battle(
+            BATTLE_LOG_PATH,
+            prev_snapshot.rng_state,
+            TurnSnapshot.parse_battle_struct(STATE_FILE, struct='attacker'),
+            TurnSnapshot.parse_battle_struct(STATE_FILE, struct='defender'),
+            (action.unit.hp[0], action.target_unit.hp[0]),
+            snapshot.rng_state,
+            (hp_of(snapshot, action.unit.id, False), hp_of(snapshot, action.target_unit.id, True))
+        )
+    except Exception as e:
+        print(f"[BATTLE LOG ERROR] {e}")
+
 def trial_run():
     print("==== Fire Emblem Autonomous Agent Trial Run ====")
-    global coordinator
+    global coordinator, replay_memory
+    if ASYNC_TRAINING:
+        replay_memory = AsyncLearner(REPLAY_MEMORY_DIR, REPLAY_BUFFER_SIZE, LEARNER_WEIGHTS_PATH,
+                                     batch_size=BATCH_SIZE, init_checkpoint=MODEL_PATH)
+        replay_memory.start()
+    else:
+        replay_memory = PrioritizedReplay(ReplayMemory(REPLAY_MEMORY_DIR, REPLAY_BUFFER_SIZE))
     episode = 0
     while True:
         episode += 1
@@ -638,6 +756,8 @@ def trial_run():
             print(f"Error loading state: {e}")
             time.sleep(0.1)
             continue
+        path_tables.ensure(snapshot.chapter_id, snapshot.map,
+                           [u.movement_type for u in snapshot.units + snapshot.enemies])
         done = False
         episode_experience = []
         while not done:
@@ -653,7 +773,14 @@ def trial_run():
                 print("Waiting for player phase...")
                 snapshot = wait_for_state_update(snapshot)
                 continue
-            coordinator = ActionCoordinator(snapshot)
+            # One coordinator for the whole run so the loaded/trained network carries over
+            if coordinator is None:
+                coordinator = ActionCoordinator(snapshot, model_path=MODEL_PATH, inference_config=INFERENCE_CONFIG)
+            else:
+                coordinator.update(snapshot)
+            if ASYNC_TRAINING:
+                # Between phases: pick up whatever the learner has published, never wait for it
+                replay_memory.sync(coordinator)
             cursor_pos = snapshot.cursor_position
             player_died = False
             # --- PROBE ALL ACTIONABLE UNITS ONCE ---
@@ -665,34 +792,24 @@ def trial_run():
             unit_positions = {u.id: u.position for u in initial_units}
             unit_statuses = {u.id: u.turn_status for u in initial_units}
             for unit in initial_units:
-                print(f"[DEBUG] Probing unit: {unit.name} at {unit.position}, can_act={unit.can_act}, has_acted={unit.has_acted}")
-                print(f"[DEBUG] {unit.name} items: {unit.items}")
-                cursor_pos = move_cursor_to(unit.position, cursor_pos)
-                pos_check = get_cursor_position()
-                if pos_check != unit.position:
-                    print(f"[ERROR] Cursor not on expected unit {unit.name} at {unit.position}, but at {pos_check}. Skipping unit.")
-                    continue
-                press_key('x', duration=0.05)
-                time.sleep(0.05)
-                press_key('UP', duration=0.05)
-                time.sleep(0.05)
-                press_key('DOWN', duration=0.05)
-                time.sleep(0.05)
-                movement_map = parse_map_section('MOVEMENT_MAP')
-                range_map = parse_map_section('RANGE_MAP')
-                actions = coordinator.action_generator._generate_unit_actions(unit, movement_map, range_map)
-                non_wait_actions = [a for a in actions if not (a.action_type == 'wait' and a.target_position == unit.position)]
-                filtered_actions = filter_actions(non_wait_actions, snapshot, movement_map, range_map)
-                print(f"[DEBUG] Filtered actions for {unit.name}: {[a.action_type for a in filtered_actions]}")
+                cursor_pos, filtered_actions = probe_unit_actions(coordinator.action_generator, unit, snapshot, cursor_pos)
                 if filtered_actions:
                     actionable_units.append(unit)
                     actionable_actions.append(filtered_actions)
-                return_to_map()
-                cursor_pos = get_cursor_position() or cursor_pos
-                time.sleep(0.1)
+            # Drop dominated move/attack tiles, then score every unit's candidates in one forward pass.
+            # The dropped tiles stay behind their kept tile as fallbacks in case it gets occupied.
+            pruned = [coordinator.prune_with_fallbacks(actions) for actions in actionable_actions]
+            actionable_actions = [kept for kept, _ in pruned]
+            fallbacks = [dropped for _, dropped in pruned]
+            phase_scores = PhaseScorer(coordinator).score(actionable_units, actionable_actions)
             # --- MAIN ACTION LOOP ---
             # Maintain internal enemy list for this turn
             internal_enemies = [e for e in snapshot.enemies if e.is_alive and e.is_visible]
+            phase_fields = PhaseDistanceFields(snapshot, internal_enemies)  # Repaired in place as enemies die
+            threat_map = IncrementalThreatMap(snapshot)  # Enemy reach per tile, repaired as units move or die
+            phase_value = IncrementalEvaluator(snapshot)  # evaluate_state, updated per executed action
+            candidates = CandidateIndex(actionable_units, actionable_actions, snapshot, fallbacks)  # Updated per executed action
+            attack_forecasts = {}  # unit id -> (attack version, scored attacks), reused across iterations
             # --- NEW: Check if all actionable units have no attack actions ---
             all_no_attack = True
             for actions in actionable_actions:
@@ -710,84 +827,29 @@ def trial_run():
                     done = True
                 break
             while actionable_units:
-                # Prioritize attack units first
-                attack_first_units = []
-                attack_first_actions = []
-                other_units = []
-                other_actions = []
-                for unit, actions in zip(actionable_units, actionable_actions):
-                    # Filter out attack actions on already-defeated enemies
-                    filtered_actions = []
-                    for a in actions:
-                        if a.action_type == 'attack' and a.target_unit is not None:
-                            if not any(e.id == a.target_unit.id for e in internal_enemies):
-                                continue  # Target already dead
-                        filtered_actions.append(a)
-                    if any(a.action_type == 'attack' for a in filtered_actions):
-                        attack_first_units.append(unit)
-                        attack_first_actions.append(filtered_actions)
-                    else:
-                        other_units.append(unit)
-                        other_actions.append(filtered_actions)
+                # Prioritize attack units first (attacks on defeated enemies and moves onto
+                # newly occupied tiles are already dropped by the candidate index)
+                attack_first_units, attack_first_actions, other_units, other_actions = candidates.partition()
                 acted = False
-                # Use attack-first, then others
-                for idx, (unit, actions) in enumerate(list(zip(attack_first_units + other_units, attack_first_actions + other_actions))):
+                ordered_units = attack_first_units + other_units
+                ordered_actions = attack_first_actions + other_actions
+                planned = search_action(ordered_units, ordered_actions, snapshot) if planner is not None else None
+                if planned is None and len(attack_first_units) > 1:
+                    # Several attackers: solve who hits whom jointly instead of letting the first unit pick greedily
+                    planned = plan_attacks(attack_first_units, attack_first_actions, snapshot, candidates, attack_forecasts)
+                if planned is not None:
+                    first = ordered_units.index(planned[0])
+                    ordered_units.insert(0, ordered_units.pop(first))
+                    ordered_actions.insert(0, ordered_actions.pop(first))
+                # Use the planned unit, then attack-first, then others
+                for idx, (unit, actions) in enumerate(list(zip(ordered_units, ordered_actions))):
                     print(f"[DEBUG] Acting with unit: {unit.name}")
                     attack_actions = [a for a in actions if a.action_type == 'attack']
-                    if attack_actions:
+                    if planned is not None and unit is planned[0]:
+                        _, chosen_action, chosen_will_kill = planned
+                    elif attack_actions:
                         print(f"[DEBUG] {unit.name} has {len(attack_actions)} attack actions available.")
-                        scored_attacks = []
-                        probed_pairs = set()
-                        for a in attack_actions:
-                            # Deduplicate by (target_position, target_unit.id)
-                            probe_key = (a.target_position, a.target_unit.id if a.target_unit else None)
-                            if probe_key in probed_pairs:
-                                continue
-                            probed_pairs.add(probe_key)
-                            # Pre-filter: Only probe 'good' tiles if there are few, else probe all
-                            candidate_tiles = []
-                            for aa in attack_actions:
-                                if is_good_terrain(snapshot, aa.target_position[0], aa.target_position[1]):
-                                    candidate_tiles.append(aa)
-                            if 0 < len(candidate_tiles) <= GOOD_TERRAIN_MAX_PROBES:
-                                # Only probe good tiles
-                                if not is_good_terrain(snapshot, a.target_position[0], a.target_position[1]):
-                                    continue  # Skip bad tiles
-                            # Probe all weapons for this attack action
-                            weapon_results = probe_all_weapons_battle_structs(unit, a.target_unit, a.target_position, STATE_FILE, move_cursor_to, press_key, get_cursor_position)
-                            for battle_struct, item_id, slot_idx in weapon_results:
-                                if battle_struct:
-                                    will_kill = battle_struct['attack'] >= a.target_unit.hp[0] or battle_struct.get('cur_hp', 1) <= 0
-                                    will_die = battle_struct['cur_hp'] <= 0 or battle_struct['attack'] >= unit.hp[0]
-                                    score = 0
-                                    # --- Use actual terrain defense/avoid/resistance from battle struct ---
-                                    terrain_def = battle_struct.get('terrain_def', 0)
-                                    terrain_avo = battle_struct.get('terrain_avo', 0)
-                                    terrain_res = battle_struct.get('terrain_res', 0)
-                                    terrain_bonus = 0
-                                    if terrain_def > 0 or terrain_avo > 0 or terrain_res > 0:
-                                        # Prioritize tiles with any defensive bonus
-                                        terrain_bonus = 10 + terrain_def * 2 + terrain_avo + terrain_res
-                                    score += terrain_bonus
-                                    # --- End terrain bonus ---
-                                    if will_kill:
-                                        score += 100
-                                    if will_die:
-                                        score -= 100
-                                    score += battle_struct['attack']
-                                    score += battle_struct['hit'] // 10
-                                    score += battle_struct['crit'] // 10
-                                    # Create a new action for this weapon
-                                    weapon_action = Action(
-                                        unit=a.unit,
-                                        action_type=a.action_type,
-                                        target_position=a.target_position,
-                                        target_unit=a.target_unit,
-                                        item_id=item_id
-                                    )
-                                    scored_attacks.append((score, weapon_action, will_kill))
-                                else:
-                                    scored_attacks.append((0, a, False))
+                        scored_attacks = list(cached_attack_scores(unit, attack_actions, snapshot, candidates, attack_forecasts))
                         if not scored_attacks:
                             print(f"[WARN] No valid attack actions for {unit.name}. Skipping unit.")
                             continue
@@ -799,15 +861,13 @@ def trial_run():
                         move_actions = [a for a in actions if a.action_type == 'move']
                         if move_actions:
                             scored_moves = []
-                            for a in move_actions:
-                                # Score by negative distance to nearest enemy
-                                min_enemy_dist = float('inf')
-                                for enemy in internal_enemies:
-                                    dist = abs(a.target_position[0] - enemy.position[0]) + abs(a.target_position[1] - enemy.position[1])
-                                    if dist < min_enemy_dist:
-                                        min_enemy_dist = dist
-                                # Prefer closer to enemy
-                                score = -min_enemy_dist
+                            approach = approach_costs(unit, move_actions, internal_enemies, phase_fields, snapshot)
+                            for a, approach_cost in zip(move_actions, approach):
+                                # Terrain-aware distance to the nearest remaining enemy
+                                min_enemy_dist = phase_fields.min_enemy_distance(unit.movement_type, a.target_position)
+                                # Prefer closer to the enemy group being approached, then to any enemy,
+                                # then tiles fewer enemies can reach, then the better resulting state value
+                                score = (-approach_cost, -min_enemy_dist, -threat_map.threatened_by(a.target_position), phase_value.delta(a))
                                 scored_moves.append((score, a))
                             if not scored_moves:
                                 print(f"[WARN] No valid move actions for {unit.name}. Skipping unit.")
@@ -821,25 +881,22 @@ def trial_run():
                             if random.random() < epsilon:
                                 chosen_action = random.choice(actions)
                             else:
-                                features = [coordinator.get_action_features(a) for a in actions]
-                                scores = coordinator.neural_network.evaluate_actions(actions, features)
-                                best_idx = max(range(len(scores)), key=lambda i: scores[i])
-                                chosen_action = actions[best_idx]
+                                chosen_action = phase_scores.top_k(unit.id, 1, allowed=actions)[0]
                         chosen_will_kill = False
                     print(f"[DEBUG] Chosen action for {unit.name}: {chosen_action.action_type} to {chosen_action.target_position}")
                     prev_snapshot = snapshot
+                    old_position = unit.position
                     if SIMULATION_MODE:
                         snapshot, reward = coordinator.simulate_action(prev_snapshot, chosen_action)
                         for u in actionable_units:
                             if u.id == unit.id:
                                 u.position = chosen_action.target_position
                                 u.turn_status = 0x02  # Mark as acted
-                        # Remove enemy if killed
-                        if chosen_action.action_type == 'attack' and chosen_action.target_unit is not None and chosen_will_kill:
-                            internal_enemies = [e for e in internal_enemies if e.id != chosen_action.target_unit.id]
                     else:
                         cursor_pos, snapshot = execute_action_in_bizhawk(chosen_action, cursor_pos, prev_snapshot)
                         reward = compute_reward(prev_snapshot, snapshot, chosen_action)
+                        if chosen_action.action_type == 'attack' and chosen_action.target_unit is not None:
+                            log_battle_outcome(prev_snapshot, snapshot, chosen_action)
                         # --- Check if unit is marked as moved in new snapshot ---
                         acted_unit = next((u for u in snapshot.units if u.id == unit.id), None)
                         if acted_unit and acted_unit.turn_status not in [0x02]:
@@ -852,9 +909,6 @@ def trial_run():
                         for u in actionable_units:
                             if u.id == unit.id:
                                 u.position = chosen_action.target_position
-                        # Remove enemy if killed (use battle struct info)
-                        if chosen_action.action_type == 'attack' and chosen_action.target_unit is not None and chosen_will_kill:
-                            internal_enemies = [e for e in internal_enemies if e.id != chosen_action.target_unit.id]
                         # --- NEW: After a non-lethal attack, update the acting unit's position to match the new snapshot ---
                         if chosen_action.action_type == 'attack' and (not chosen_will_kill):
                             # Find the latest position of the acting unit in the new snapshot
@@ -863,7 +917,23 @@ def trial_run():
                                 for u in actionable_units:
                                     if u.id == unit.id:
                                         u.position = updated_unit.position
-                    replay_buffer.append((prev_snapshot, chosen_action, reward, snapshot))
+                    killed = chosen_action.target_unit if chosen_action.action_type == 'attack' and chosen_will_kill else None
+                    if killed is not None:
+                        # Remove the killed enemy by slot (generic enemies share character IDs)
+                        slot = phase_fields.slot_of(killed)
+                        internal_enemies = [e for e in internal_enemies if (e.id, e.position) != (killed.id, killed.position)]
+                        phase_fields.remove_enemy(slot)
+                        threat_map.remove_enemy(slot)
+                    threat_map.move_ally(old_position, unit.position)
+                    struck = chosen_action.target_unit if chosen_action.action_type == 'attack' else None
+                    candidates.apply(unit, old_position, killed, struck)
+                    phase_value.apply(chosen_action)
+                    print(f"[STATE VALUE] {phase_value.value:.2f} after {unit.name}'s {chosen_action.action_type}")
+                    replay_memory.add(
+                        features_to_array([coordinator.get_action_features(chosen_action)])[0],
+                        chosen_action, reward,
+                        effective=(prev_snapshot != snapshot or reward != 0)
+                    )
                     episode_experience.append((prev_snapshot, chosen_action, reward, snapshot))
                     if is_player_dead(snapshot):
                         print("A player unit has died during action. Resetting level.")
@@ -873,6 +943,7 @@ def trial_run():
                     remove_idx = actionable_units.index(unit)
                     actionable_units.pop(remove_idx)
                     actionable_actions.pop(remove_idx)
+                    candidates.remove_unit(unit.id)
                     break  # Only act with one unit per loop, then re-prioritize
                 if player_died or not acted:
                     break
@@ -884,22 +955,24 @@ def trial_run():
                     snapshot = wait_for_state_update(snapshot)
                 else:
                     done = True
-        if episode_experience:
-            train_neural_network(coordinator, replay_buffer)
+        replay_memory.end_episode()
+        if episode_experience and not ASYNC_TRAINING:
+            train_neural_network(coordinator, replay_memory)
+        print(f"[FORECAST CACHE] {forecast_cache.stats()}")
+        if coordinator is not None:
+            print(f"[ACTION PRUNING] {coordinator.action_pruner.stats()}")
         if done:
             print(f"[EPISODE {episode}] Success! Restarting for next trial...")
             time.sleep(0.2)
-        if episode % 10 == 0:
-            try:
-                with open(REPLAY_BUFFER_PATH, 'wb') as f:
-                    pickle.dump(list(replay_buffer), f)
-                print(f"[REPLAY BUFFER] Saved to {REPLAY_BUFFER_PATH} at episode {episode}")
-            except Exception as e:
-                print(f"[REPLAY BUFFER ERROR] {e}")
+        try:
+            replay_memory.flush()
+        except Exception as e:
+            print(f"[REPLAY MEMORY ERROR] {e}")
 
 def is_good_terrain(snapshot, x, y):
-    symbol = snapshot.map.get_terrain_at(x, y)
-    return symbol in GOOD_TERRAIN_SYMBOLS
+    # Forest, Thicket, Hill, Fort, Gate, Throne, etc. (GOOD_TERRAIN_SYMBOLS in agent/tile_features.py)
+    planes = terrain_planes(snapshot.map)
+    return 0 <= x < planes.width and 0 <= y < planes.height and bool(planes.good_terrain[y, x])
 
 if __name__ == "__main__":
     try:
@@ -908,8 +981,12 @@ if __name__ == "__main__":
         trial_run()
     except KeyboardInterrupt:
         print("\n[INTERRUPT] Trial run stopped. Saving model...")
-        if 'coordinator' in locals():
-            coordinator.save_model("saved_model.pt")
-            print("Model saved to saved_model.pt.")
+        if isinstance(replay_memory, AsyncLearner):
+            # The learner holds the trained weights and saves them to MODEL_PATH on shutdown
+            replay_memory.close()
+            print(f"Learner stopped, model saved to {MODEL_PATH}.")
+        elif coordinator is not None:
+            coordinator.save_model(MODEL_PATH)
+            print(f"Model saved to {MODEL_PATH}.")
         else:
             print("Coordinator not defined, model not saved.")
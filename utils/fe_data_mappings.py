@@ -655,6 +655,22 @@ def get_class_name(class_id):
     """Get the name of a class by its ID"""
     return CLASS_NAMES.get(class_id, f"Unknown Class (0x{class_id:02X})")
 
+def _job_name(class_id):
+    """Class name in the form used by the movement tables ('Hero (M)' -> 'Male Hero')"""
+    name = get_class_name(class_id)
+    for suffix, prefix in ((" (M)", "Male "), (" (F)", "Female ")):
+        if name.endswith(suffix):
+            return prefix + name[:-len(suffix)]
+    return name
+
+def get_class_movement(class_id):
+    """Get the base movement of a class (the MOV stat in RAM only holds bonuses)"""
+    return _movement_dict.get(_job_name(class_id), 5)
+
+def get_movement_type(class_id):
+    """Get the movement cost type of a class (one of _valid_move_types)"""
+    return _job_movement_type.get(_job_name(class_id), "Foot")
+
 def get_weapon_type(item_id):
     """Determine weapon type from item ID"""
     if item_id == 0:
@@ -99,6 +99,10 @@ class FEStateParser:
         if key == "stats" and "," in value:
             return tuple(map(int, value.split(",")))
 
+        # Special case for the three combat RNG seeds
+        if key == "rn_seeds" and "," in value:
+            return tuple(map(int, value.split(",")))
+
         # Special case for items (comma-separated list of item IDs)
         if key == "items":
             items = []
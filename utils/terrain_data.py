@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""
+Terrain data utility
+
+Looks up terrain stats (def/avoid/res, ...) from data/tiles.json by raw
+terrain ID. Maps exported before fe_memory_reader.lua wrote raw IDs only
+have display symbols, so each symbol falls back to a representative ID.
+"""
+
+import json
+import os
+from typing import Dict, Optional
+import numpy as np
+
+TILES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'tiles.json')
+
+# Representative terrain ID for each display symbol in fe_map.txt
+SYMBOL_TERRAIN_IDS = {
+    '-': 0x00, '.': 0x01, '=': 0x02, 'V': 0x03, 'H': 0x05, 'A': 0x06,
+    'C': 0x0A, 'G': 0x0B, 'F': 0x0C, 'S': 0x0E, 'D': 0x1E, '~': 0x10,
+    '^': 0x11, 'M': 0x12, '#': 0x1A, '*': 0x1C, 'P': 0x1D, 'T': 0x1F,
+    'R': 0x22, 'X': 0x3B
+}
+
+_tiles = None
+
+def get_tiles() -> Dict[int, Dict]:
+    """All terrain entries from tiles.json keyed by integer terrain ID"""
+    global _tiles
+    if _tiles is None:
+        try:
+            with open(TILES_FILE, 'r') as f:
+                _tiles = {int(key, 16): value for key, value in json.load(f).items()}
+        except (OSError, ValueError) as e:
+            print(f"[TERRAIN ERROR] Could not load {TILES_FILE}: {e}")
+            _tiles = {}
+    return _tiles
+
+def get_terrain_info(terrain_id: int) -> Dict:
+    """tiles.json entry for a terrain ID (empty dict if unknown)"""
+    return get_tiles().get(terrain_id, {})
+
+def symbol_to_terrain_id(symbol: str) -> Optional[int]:
+    """Best-effort terrain ID for a display symbol (unknown IDs are written as hex)"""
+    if symbol in SYMBOL_TERRAIN_IDS:
+        return SYMBOL_TERRAIN_IDS[symbol]
+    try:
+        return int(symbol, 16)
+    except (TypeError, ValueError):
+        return None
+
+def terrain_id_grid(terrain_map) -> np.ndarray:
+    """(H, W) uint8 grid of terrain IDs, from raw IDs when exported, else from symbols"""
+    if terrain_map.terrain_ids:
+        return np.array(terrain_map.terrain_ids, dtype=np.uint8)
+    grid = np.zeros((terrain_map.height, terrain_map.width), dtype=np.uint8)
+    for y, row in enumerate(terrain_map.grid[:terrain_map.height]):
+        for x, symbol in enumerate(row[:terrain_map.width]):
+            terrain_id = symbol_to_terrain_id(symbol)
+            grid[y, x] = terrain_id if terrain_id is not None else 0x01
+    return grid
+
+def terrain_stat_table(stat: str) -> np.ndarray:
+    """256-entry lookup table of one tiles.json stat ('def', 'avoid', 'res') by terrain ID"""
+    table = np.zeros(256, dtype=np.float32)
+    for terrain_id, info in get_tiles().items():
+        table[terrain_id] = info.get(stat, 0) or 0
+    return table
+
+IMPASSABLE = 255
+
+# Approximation of FE7's per-movement-type cost tables, keyed by terrain ID.
+# Terrain missing from a table costs 1; walls, roofs, doors and similar
+# blockers are impassable for every type.
+_BLOCKED = {0x00: IMPASSABLE, 0x19: IMPASSABLE, 0x1A: IMPASSABLE, 0x1B: IMPASSABLE,
+            0x1E: IMPASSABLE, 0x22: IMPASSABLE, 0x3F: IMPASSABLE}
+_GROUND = {**_BLOCKED, 0x15: IMPASSABLE, 0x16: IMPASSABLE, 0x12: IMPASSABLE, 0x0D: IMPASSABLE}
+MOVEMENT_COSTS = {
+    'Foot': {**_GROUND, 0x0C: 2, 0x0E: 1, 0x0F: 2, 0x10: 5, 0x11: 3, 0x1C: 2, 0x1D: 2},
+    'Armours': {**_GROUND, 0x0C: 2, 0x0E: 2, 0x0F: 3, 0x10: IMPASSABLE, 0x11: IMPASSABLE, 0x1C: 2, 0x1D: 2},
+    'Knights1': {**_GROUND, 0x0C: 3, 0x0E: 2, 0x0F: 3, 0x10: IMPASSABLE, 0x11: IMPASSABLE, 0x1C: 3, 0x1D: IMPASSABLE},
+    'Knights2': {**_GROUND, 0x0C: 3, 0x0E: 2, 0x0F: 3, 0x10: IMPASSABLE, 0x11: 6, 0x1C: 3, 0x1D: IMPASSABLE},
+    'Nomads': {**_GROUND, 0x0C: 3, 0x0E: 1, 0x0F: 2, 0x10: IMPASSABLE, 0x11: 5, 0x1C: 3, 0x1D: IMPASSABLE},
+    'NomadTroopers': {**_GROUND, 0x0C: 3, 0x0E: 1, 0x0F: 2, 0x10: IMPASSABLE, 0x11: 4, 0x1C: 3, 0x1D: IMPASSABLE},
+    'Fighters': {**_GROUND, 0x0C: 2, 0x0E: 1, 0x0F: 2, 0x10: 5, 0x11: 3, 0x12: 4, 0x1C: 2, 0x1D: 2},
+    'Bandits': {**_GROUND, 0x0C: 2, 0x0E: 1, 0x0F: 2, 0x10: 5, 0x11: 3, 0x12: 4, 0x1C: 2, 0x1D: 2},
+    'Pirates': {**_GROUND, 0x0C: 2, 0x0E: 1, 0x0F: 2, 0x10: 2, 0x11: 3, 0x15: 2, 0x16: 2, 0x1C: 2, 0x1D: 2},
+    'Mages': {**_GROUND, 0x0C: 2, 0x0E: 1, 0x0F: 1, 0x10: 5, 0x11: 3, 0x1C: 2, 0x1D: 2},
+    'Fliers': dict(_BLOCKED)
+}
+
+def movement_cost_table(move_type: str) -> np.ndarray:
+    """256-entry uint8 lookup table of movement cost by terrain ID (IMPASSABLE = 255)"""
+    table = np.ones(256, dtype=np.uint8)
+    for terrain_id, cost in MOVEMENT_COSTS.get(move_type, MOVEMENT_COSTS['Foot']).items():
+        table[terrain_id] = cost
+    return table
+
+CHOKEPOINT_NAMES = ('Bridge', 'Door', 'Gate')
+
+def chokepoint_terrain_ids() -> frozenset:
+    """Terrain IDs whose tiles.json name marks a chokepoint (bridges, doors, gates)"""
+    return frozenset(terrain_id for terrain_id, info in get_tiles().items()
+                     if any(name in info.get('name', '') for name in CHOKEPOINT_NAMES))